@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Compares the JSON libraries supported by :mod:`routingpy.json_backend` on the test fixture responses and on
+a synthetic Valhalla ``sources_to_targets`` response.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_json --size 2000
+"""
+import argparse
+import timeit
+
+from routingpy.json_backend import BACKENDS, get_json_backend
+from tests.test_helper import ENDPOINTS_RESPONSES
+
+
+def valhalla_matrix(size):
+    """Returns a Valhalla matrix response with ``size`` x ``size`` cells."""
+    return {
+        "sources_to_targets": [
+            [
+                {"distance": 1.234 * (i + j), "time": i + j, "to_index": j, "from_index": i}
+                for j in range(size)
+            ]
+            for i in range(size)
+        ],
+        "units": "kilometers",
+    }
+
+
+def bench(payloads, repeat):
+    backends = []
+    for name in BACKENDS:
+        try:
+            backends.append(get_json_backend(name))
+        except ImportError:
+            print("{} is not installed, skipping".format(name))
+
+    print("{:<40}{}".format("payload", "".join("{:>22}".format(b.name) for b in backends)))
+    for label, payload in payloads:
+        encoded = get_json_backend("json").dumps(payload)
+        # Loop small payloads, so that each measurement takes long enough
+        number = max(1, 10**6 // len(encoded))
+        row = []
+        for backend in backends:
+            decode = (
+                min(timeit.repeat(lambda: backend.loads(encoded), number=number, repeat=repeat)) / number
+            )
+            encode = (
+                min(timeit.repeat(lambda: backend.dumps(payload), number=number, repeat=repeat)) / number
+            )
+            row.append("{:>11.3f} /{:>9.3f}".format(decode * 1000, encode * 1000))
+        print("{:<40}{}".format("{} ({} kB)".format(label, len(encoded) // 1000), "".join(row)))
+
+    print("\nBest of {} runs, decode / encode in milliseconds".format(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--size", type=int, default=1000, help="rows and columns of the synthetic matrix"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    args = parser.parse_args()
+
+    payloads = []
+    for router, responses in ENDPOINTS_RESPONSES.items():
+        for endpoint, response in responses.items():
+            if isinstance(response, dict):
+                payloads.append(("{}/{}".format(router, endpoint), response))
+    payloads.append(("valhalla/matrix {0}x{0}".format(args.size), valhalla_matrix(args.size)))
+
+    bench(payloads, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
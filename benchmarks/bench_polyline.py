@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Compares the pure Python and the vectorized numpy polyline decoders of :mod:`routingpy.utils` on synthetic
+routes of increasing length.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_polyline --points 10000 100000
+"""
+import argparse
+import random
+import timeit
+
+from routingpy import utils
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def random_polyline(n_points, precision):
+    """Returns an encoded random walk of ``n_points`` points around Berlin."""
+    factor = 10**precision
+    lat, lng = 52.5, 13.4
+    previous = (0, 0)
+    encoded = []
+    for _ in range(n_points):
+        lat += random.uniform(-0.001, 0.001)
+        lng += random.uniform(-0.001, 0.001)
+        point = (round(lat * factor), round(lng * factor))
+        encoded.append(_encode_value(point[0] - previous[0]))
+        encoded.append(_encode_value(point[1] - previous[1]))
+        previous = point
+    return "".join(encoded)
+
+
+def bench(n_points, repeat):
+    print(
+        "{:>10}{:>11}{:>12}{:>14}{:>14}{:>10}".format(
+            "points", "precision", "chars", "python ms", "numpy ms", "speedup"
+        )
+    )
+    for n in n_points:
+        for precision in (5, 6):
+            polyline = random_polyline(n, precision)
+            timings = []
+            for min_length in (float("inf"), 0):
+                utils.VECTORIZE_MIN_LENGTH = min_length
+                timings.append(
+                    min(
+                        timeit.repeat(
+                            lambda: utils._decode(polyline, precision), number=1, repeat=repeat
+                        )
+                    )
+                )
+            print(
+                "{:>10}{:>11}{:>12}{:>14.2f}{:>14.2f}{:>9.1f}x".format(
+                    n,
+                    precision,
+                    len(polyline),
+                    timings[0] * 1000,
+                    timings[1] * 1000,
+                    timings[0] / timings[1],
+                )
+            )
+
+    print("\nBest of {} runs".format(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--points", type=int, nargs="+", default=[100, 1000, 10000, 100000], help="points per route"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    args = parser.parse_args()
+
+    random.seed(0)
+    bench(args.points, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
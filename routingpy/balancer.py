@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Load balancing between several replicas of a self-hosted routing engine, with passive health checks.
+
+Pass a list of base URLs instead of a single one to any router. Every attempt, retries included, goes to the
+replica picked by the strategy. Replicas failing ``max_failures`` times in a row (timeouts, connection errors,
+HTTP 5xx) are taken out of rotation for ``cooldown`` seconds.
+
+Example:
+
+>>> from routingpy import OSRM
+>>> router = OSRM(["http://osrm-1:5000", "http://osrm-2:5000"], balancing="least_outstanding")
+>>> # ... many requests later ...
+>>> print(router.client.endpoint_pool.stats["http://osrm-1:5000"])
+{'requests': 5012, 'failures': 3, 'outstanding': 2, 'latency': 0.041, 'ejected': False, 'ejections': 1}
+"""
+import random
+import threading
+import time
+
+#: The balancing strategies of :class:`EndpointPool`.
+STRATEGIES = ("round_robin", "least_outstanding", "latency")
+
+
+class Endpoint(object):
+    """A replica in an :class:`EndpointPool` and its statistics. Only modified by the pool."""
+
+    def __init__(self, url):
+        self.url = url
+        self.requests = 0
+        self.failures = 0
+        self.outstanding = 0
+        self.latency = None
+        self.ejections = 0
+        self._consecutive_failures = 0
+        self._ejected_until = None
+
+    def _available(self, now):
+        return self._ejected_until is None or now >= self._ejected_until
+
+    @property
+    def stats(self):
+        """The number of requests and failures, the requests in flight, the moving average of the latency in
+        seconds (None before the first response), whether the replica is out of rotation and how often it was.
+
+        :rtype: dict
+        """
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "ejected": not self._available(time.monotonic()),
+            "ejections": self.ejections,
+        }
+
+    def __repr__(self):
+        return "Endpoint({!r})".format(self.url)
+
+
+class EndpointPool(object):
+    """
+    Thread-safe pool of replicas of the same routing engine, which picks one per request attempt.
+
+    Strategies:
+
+    - ``round_robin``: one replica after the other.
+    - ``least_outstanding``: the replica with the fewest requests in flight, e.g. for requests of very different
+      cost like large matrices.
+    - ``latency``: random, weighted by the inverse of each replica's average latency, so faster replicas get
+      more requests without starving the others.
+    """
+
+    def __init__(
+        self, base_urls, strategy="round_robin", max_failures=2, cooldown=30, latency_decay=0.3
+    ):
+        """
+        :param base_urls: The base URLs of the replicas. Should not have a trailing slash.
+        :type base_urls: list of str
+
+        :param strategy: One of :data:`STRATEGIES`. Default "round_robin".
+        :type strategy: str
+
+        :param max_failures: Number of consecutive failures after which a replica is taken out of rotation.
+            Default 2.
+        :type max_failures: int
+
+        :param cooldown: Seconds a failing replica is out of rotation. Afterwards, a single failure takes it
+            out again. Default 30.
+        :type cooldown: float
+
+        :param latency_decay: Weight of the latest response in the moving average of the latency. Default 0.3.
+        :type latency_decay: float
+        """
+        if not base_urls:
+            raise ValueError("At least one base URL is required.")
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                "strategy must be one of {}, not {!r}.".format(", ".join(STRATEGIES), strategy)
+            )
+        if max_failures < 1:
+            raise ValueError("max_failures must be at least 1.")
+
+        self.endpoints = [Endpoint(url) for url in base_urls]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.latency_decay = latency_decay
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        """The base URLs of all replicas.
+
+        :rtype: list of str
+        """
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self):
+        """Picks the replica for the next attempt, which has to be handed back with :meth:`release`.
+
+        If all replicas are out of rotation, the one returning first is picked rather than failing.
+
+        :rtype: Endpoint
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint._available(now)]
+            if not candidates:
+                candidates = [min(self.endpoints, key=lambda endpoint: endpoint._ejected_until)]
+
+            # Rotating the candidates spreads ties evenly between replicas
+            start = self._counter % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            self._counter += 1
+
+            if self.strategy == "least_outstanding":
+                endpoint = min(candidates, key=lambda endpoint: endpoint.outstanding)
+            elif self.strategy == "latency":
+                endpoint = self._pick_by_latency(candidates)
+            else:
+                endpoint = candidates[0]
+
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+
+        return endpoint
+
+    @staticmethod
+    def _pick_by_latency(candidates):
+        known = [endpoint.latency for endpoint in candidates if endpoint.latency is not None]
+        # Replicas without responses yet count as the fastest, so that they get measured
+        best = min(known) if known else 1.0
+        weights = [
+            1 / max(endpoint.latency if endpoint.latency is not None else best, 1e-6)
+            for endpoint in candidates
+        ]
+        return random.choices(candidates, weights)[0]
+
+    def release(self, endpoint, latency=None, failed=False):
+        """Reports the outcome of an attempt on ``endpoint``.
+
+        :param endpoint: The replica returned by :meth:`acquire`.
+        :type endpoint: Endpoint
+
+        :param latency: Seconds until the response arrived.
+        :type latency: float
+
+        :param failed: True if the replica failed, i.e. timed out, refused the connection or responded with
+            HTTP 5xx. None if the attempt was interrupted, e.g. cancelled, which doesn't count either way.
+        :type failed: bool
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            if failed is None:
+                return
+
+            if failed:
+                endpoint.failures += 1
+                endpoint._consecutive_failures += 1
+                if endpoint._consecutive_failures >= self.max_failures and endpoint._available(
+                    time.monotonic()
+                ):
+                    endpoint._ejected_until = time.monotonic() + self.cooldown
+                    endpoint.ejections += 1
+                    # Back in rotation after the cooldown on probation, one more failure ejects it again
+                    endpoint._consecutive_failures = self.max_failures - 1
+                return
+
+            endpoint._consecutive_failures = 0
+            endpoint._ejected_until = None
+            if latency is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.latency_decay * (latency - endpoint.latency)
+
+    @property
+    def stats(self):
+        """The :attr:`Endpoint.stats` of every replica by base URL.
+
+        :rtype: dict
+        """
+        with self._lock:
+            return {endpoint.url: endpoint.stats for endpoint in self.endpoints}
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Concurrent batch requests, available on every router via :class:`BatchMixin`.
+"""
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple, Union  # noqa: F401
+
+from .direction import ChunkedDirection
+from .matrix import MatrixTile, TiledMatrix, _empty_like
+
+DEFAULT_MAX_WORKERS = 10
+
+
+def run_many(func, queries, max_workers=None, return_exceptions=False, async_client=False, **kwargs):
+    """
+    Calls ``func`` once per query on a bounded worker pool and returns the results in input order.
+
+    :param func: The (bound) router method to call, e.g. ``router.directions``.
+    :type func: callable
+
+    :param queries: The argument sets to call ``func`` with. Each one is either a dict of keyword
+        arguments or a tuple of positional arguments. Lists are rejected, since a list of locations would be
+        ambiguous with a list of arguments.
+    :type queries: iterable of dict or tuple
+
+    :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+    :type max_workers: int
+
+    :param return_exceptions: If True, an exception raised for a query is put into the results list at the
+        query's position instead of being raised. Default False.
+    :type return_exceptions: bool
+
+    :param async_client: If True, ``func`` returns awaitables and the batch is run on the event loop
+        instead of a thread pool. A coroutine is returned then.
+    :type async_client: bool
+
+    :param kwargs: Keyword arguments passed to every call. Arguments given in a query take precedence.
+
+    :returns: The results (or exceptions) in the order of ``queries``.
+    :rtype: list
+    """
+    calls = [_split_query(query, kwargs) for query in queries]
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+
+    if async_client:
+        return _run_many_async(func, calls, max_workers, return_exceptions)
+
+    if not calls:
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+        # Run each call in a copy of the caller's context, e.g. to respect routingpy.cache.bypass_cache()
+        futures = [
+            pool.submit(contextvars.copy_context().run, func, *args, **call_kwargs)
+            for args, call_kwargs in calls
+        ]
+
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    for pending in futures:
+                        pending.cancel()
+                    raise
+                results.append(e)
+
+    return results
+
+
+async def _run_many_async(func, calls, max_workers, return_exceptions):
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def _call(args, call_kwargs):
+        async with semaphore:
+            return await func(*args, **call_kwargs)
+
+    return await asyncio.gather(
+        *[_call(args, call_kwargs) for args, call_kwargs in calls], return_exceptions=return_exceptions
+    )
+
+
+def _split_query(query, common_kwargs):
+    """Returns the positional and keyword arguments of a single query."""
+    if isinstance(query, dict):
+        return (), dict(common_kwargs, **query)
+    elif isinstance(query, tuple):
+        return query, dict(common_kwargs)
+
+    raise TypeError(
+        "Each query must be a dict of keyword arguments, e.g. {{'locations': ...}}, or a tuple of positional "
+        "arguments, not {}".format(type(query).__name__)
+    )
+
+
+def _blocks(indices, size):
+    return [indices[i : i + size] for i in range(0, len(indices), size)]
+
+
+def _tile_queries(locations, sources, destinations, tile_size, location_params):
+    """
+    Splits a matrix request into tiles of at most ``tile_size`` sources by destinations.
+
+    :returns: The tiles' source and destination indices into ``locations`` and the ``matrix`` keyword arguments
+        for each tile.
+    :rtype: tuple of list
+    """
+    sources = list(range(len(locations))) if sources is None else list(sources)
+    destinations = list(range(len(locations))) if destinations is None else list(destinations)
+
+    tiles = []
+    queries = []
+    for tile_sources in _blocks(sources, tile_size[0]):
+        for tile_destinations in _blocks(destinations, tile_size[1]):
+            # Each tile only sends the locations it needs, shared ones only once
+            positions = {}
+            for idx in tile_sources + tile_destinations:
+                positions.setdefault(idx, len(positions))
+            tile_locations = list(positions)
+
+            query = {
+                "locations": [locations[idx] for idx in tile_locations],
+                "sources": [positions[idx] for idx in tile_sources],
+                "destinations": [positions[idx] for idx in tile_destinations],
+            }
+            for param, values in location_params.items():
+                query[param] = [values[idx] for idx in tile_locations]
+
+            tiles.append((tile_sources, tile_destinations))
+            queries.append(query)
+
+    return tiles, queries, len(sources), len(destinations)
+
+
+def _stitch_tiles(tiles, results, n_sources, n_destinations, tile_size):
+    """Places the tiles' results into one :class:`routingpy.matrix.TiledMatrix`."""
+    matrices = {"durations": None, "distances": None}
+    matrix_tiles = []
+
+    for tile_idx, ((tile_sources, tile_destinations), result) in enumerate(zip(tiles, results)):
+        if isinstance(result, BaseException):
+            matrix_tiles.append(MatrixTile(tile_sources, tile_destinations, None, result))
+            continue
+        matrix_tiles.append(MatrixTile(tile_sources, tile_destinations, result, None))
+
+        # Tiles are ordered by source block first
+        n_destination_blocks = -(-n_destinations // tile_size[1])
+        row_offset = tile_idx // n_destination_blocks * tile_size[0]
+        col_offset = tile_idx % n_destination_blocks * tile_size[1]
+
+        for name in matrices:
+            values = getattr(result, name)
+            if values is None:
+                continue
+            if matrices[name] is None:
+                matrices[name] = _empty_like(values, n_sources, n_destinations)
+            if isinstance(matrices[name], list):
+                for row_idx, row in enumerate(values):
+                    matrices[name][row_offset + row_idx][col_offset : col_offset + len(row)] = row
+            else:
+                n_rows, n_cols = values.shape
+                matrices[name][
+                    row_offset : row_offset + n_rows, col_offset : col_offset + n_cols
+                ] = values
+
+    return TiledMatrix(matrices["durations"], matrices["distances"], matrix_tiles)
+
+
+def _chunk_queries(locations, chunk_size, location_params):
+    """
+    Splits a route into sections of at most ``chunk_size`` locations. Consecutive sections share a location, so
+    that the sections join up to the complete route.
+
+    :returns: The ``directions`` keyword arguments for each section.
+    :rtype: list of dict
+    """
+    if chunk_size < 2:
+        raise ValueError("chunk_size must be at least 2, not {}.".format(chunk_size))
+
+    queries = []
+    start = 0
+    while True:
+        end = min(start + chunk_size, len(locations))
+        query = {"locations": locations[start:end]}
+        for param, values in location_params.items():
+            query[param] = values[start:end]
+        queries.append(query)
+
+        if end == len(locations):
+            return queries
+        start = end - 1
+
+
+class BatchMixin:
+    """
+    Adds concurrent batch variants of the request methods to a router. All requests of a batch share the
+    router's client, i.e. its HTTP session.
+
+    If the router's client was set up with ``skip_api_error``, a query failing with a
+    :class:`routingpy.exceptions.RouterApiError` results in an empty result object, like for the single requests.
+
+    Example:
+
+    >>> router = Valhalla()
+    >>> routes = router.directions_many(
+    ...     [{"locations": [[8.5, 47.3], [8.6, 47.4]]}, {"locations": [[8.7, 47.3], [8.6, 47.4]]}],
+    ...     profile="auto",
+    ...     max_workers=4,
+    ... )
+    """
+
+    #: The maximum number of sources and destinations per request for :meth:`matrix_tiled`.
+    _MATRIX_TILE_SIZE = None
+    #: ``matrix`` arguments with one value per location, which :meth:`matrix_tiled` splits up as well.
+    _MATRIX_LOCATION_PARAMS = ()
+    #: The maximum number of locations per request for :meth:`directions_chunked`.
+    _DIRECTIONS_MAX_LOCATIONS = None
+    #: ``directions`` arguments with one value per location, which :meth:`directions_chunked` splits up as well.
+    _DIRECTIONS_LOCATION_PARAMS = ()
+    #: Request methods the router doesn't implement, whose batch variants raise NotImplementedError.
+    _UNSUPPORTED_METHODS = ()
+
+    @staticmethod
+    def _route_legs(raw):
+        """Returns the legs of a non-alternative directions response, None if the router doesn't know legs."""
+        return None
+
+    def _check_supported(self, method):
+        if method in self._UNSUPPORTED_METHODS:
+            raise NotImplementedError("{} doesn't support {}.".format(self.__class__.__name__, method))
+
+    def _run_many(self, func, queries, max_workers, return_exceptions, kwargs):
+        return run_many(
+            func,
+            queries,
+            max_workers=max_workers,
+            return_exceptions=return_exceptions,
+            async_client=asyncio.iscoroutinefunction(self.client._request),
+            **kwargs,
+        )
+
+    def directions_many(
+        self,
+        queries: Iterable[Union[dict, tuple]],
+        max_workers: Optional[int] = None,
+        return_exceptions: Optional[bool] = False,
+        **kwargs,
+    ):
+        """
+        Requests directions for many argument sets concurrently. See :func:`run_many` for details.
+
+        :param queries: The argument sets for ``directions``, each a dict of keyword arguments or a tuple
+            of positional arguments.
+        :type queries: iterable of dict or tuple
+
+        :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+        :type max_workers: int
+
+        :param return_exceptions: Return exceptions in place of the failed query's result instead of raising
+            the first one. Default False.
+        :type return_exceptions: bool
+
+        :param kwargs: Arguments for ``directions`` shared by all queries, e.g. ``profile``.
+
+        :returns: The directions in the order of ``queries``. With an asynchronous client, an awaitable.
+        :rtype: list of :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
+        """
+        self._check_supported("directions")
+        return self._run_many(self.directions, queries, max_workers, return_exceptions, kwargs)
+
+    def matrix_many(
+        self,
+        queries: Iterable[Union[dict, tuple]],
+        max_workers: Optional[int] = None,
+        return_exceptions: Optional[bool] = False,
+        **kwargs,
+    ):
+        """
+        Requests matrices for many argument sets concurrently. See :func:`run_many` for details.
+
+        :param queries: The argument sets for ``matrix``, each a dict of keyword arguments or a tuple
+            of positional arguments.
+        :type queries: iterable of dict or tuple
+
+        :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+        :type max_workers: int
+
+        :param return_exceptions: Return exceptions in place of the failed query's result instead of raising
+            the first one. Default False.
+        :type return_exceptions: bool
+
+        :param kwargs: Arguments for ``matrix`` shared by all queries, e.g. ``profile``.
+
+        :returns: The matrices in the order of ``queries``. With an asynchronous client, an awaitable.
+        :rtype: list of :class:`routingpy.matrix.Matrix`
+        """
+        self._check_supported("matrix")
+        return self._run_many(self.matrix, queries, max_workers, return_exceptions, kwargs)
+
+    def isochrones_many(
+        self,
+        queries: Iterable[Union[dict, tuple]],
+        max_workers: Optional[int] = None,
+        return_exceptions: Optional[bool] = False,
+        **kwargs,
+    ):
+        """
+        Requests isochrones for many argument sets concurrently. See :func:`run_many` for details.
+
+        :param queries: The argument sets for ``isochrones``, each a dict of keyword arguments or a tuple
+            of positional arguments.
+        :type queries: iterable of dict or tuple
+
+        :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+        :type max_workers: int
+
+        :param return_exceptions: Return exceptions in place of the failed query's result instead of raising
+            the first one. Default False.
+        :type return_exceptions: bool
+
+        :param kwargs: Arguments for ``isochrones`` shared by all queries, e.g. ``profile``.
+
+        :returns: The isochrones in the order of ``queries``. With an asynchronous client, an awaitable.
+        :rtype: list of :class:`routingpy.isochrone.Isochrones`
+        """
+        self._check_supported("isochrones")
+        return self._run_many(self.isochrones, queries, max_workers, return_exceptions, kwargs)
+
+    def matrix_tiled(
+        self,
+        locations: Sequence,
+        *args,
+        sources: Optional[Sequence[int]] = None,
+        destinations: Optional[Sequence[int]] = None,
+        tile_size: Optional[Union[int, Tuple[int, int]]] = None,
+        max_workers: Optional[int] = None,
+        raise_on_error: Optional[bool] = False,
+        **kwargs,
+    ):
+        """
+        Requests a matrix larger than the provider allows per request. The sources and destinations are split into
+        blocks, each combination of blocks is requested concurrently as a separate matrix and the results are stitched
+        together again.
+
+        Failed tiles leave their cells None and are listed in ``failed_tiles`` of the result, unless
+        ``raise_on_error`` is True.
+
+        Example:
+
+        >>> router = OSRM("http://localhost:5000")
+        >>> matrix = router.matrix_tiled(locations, tile_size=100, max_workers=4)
+        >>> for tile in matrix.failed_tiles:
+        ...     print(tile.sources, tile.destinations, tile.error)
+
+        :param locations: The locations, as for ``matrix``.
+        :type locations: list
+
+        :param args: Further positional arguments for ``matrix``, e.g. ``profile``.
+
+        :param sources: Indices of the locations to use as sources. Default all.
+        :type sources: list of int
+
+        :param destinations: Indices of the locations to use as destinations. Default all.
+        :type destinations: list of int
+
+        :param tile_size: Maximum number of sources and destinations per request, either one number for both or a
+            tuple of (sources, destinations). Default the provider's public limit, e.g. (10, 10) for Google.
+            Set it according to the server's configuration for self-hosted engines.
+        :type tile_size: int or tuple of int
+
+        :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+        :type max_workers: int
+
+        :param raise_on_error: Raise the first exception of a failed tile, instead of reporting it. Default False.
+        :type raise_on_error: bool
+
+        :param kwargs: Further keyword arguments for ``matrix``, applying to all tiles. Per-location arguments, such as
+            OSRM's ``radiuses``, are split up accordingly.
+
+        :returns: The complete matrix. With an asynchronous client, an awaitable.
+        :rtype: :class:`routingpy.matrix.TiledMatrix`
+        """
+        self._check_supported("matrix")
+        tile_size = tile_size or self._MATRIX_TILE_SIZE
+        if tile_size is None:
+            raise ValueError(
+                "{} has no default tile size, specify tile_size.".format(type(self).__name__)
+            )
+        if isinstance(tile_size, int):
+            tile_size = (tile_size, tile_size)
+
+        location_params = {
+            param: kwargs.pop(param)
+            for param in self._MATRIX_LOCATION_PARAMS
+            if kwargs.get(param) is not None
+        }
+        tiles, queries, n_sources, n_destinations = _tile_queries(
+            locations, sources, destinations, tile_size, location_params
+        )
+
+        def matrix(locations, **tile_kwargs):
+            return self.matrix(locations, *args, **tile_kwargs)
+
+        results = self._run_many(matrix, queries, max_workers, not raise_on_error, kwargs)
+        if asyncio.iscoroutine(results):
+
+            async def _stitch():
+                return _stitch_tiles(tiles, await results, n_sources, n_destinations, tile_size)
+
+            return _stitch()
+
+        return _stitch_tiles(tiles, results, n_sources, n_destinations, tile_size)
+
+    def directions_chunked(
+        self,
+        locations: Sequence,
+        *args,
+        chunk_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        **kwargs,
+    ):
+        """
+        Requests a route with more locations than the provider allows per request. The locations are split into
+        sections which overlap by one location, each section is requested concurrently and the results are merged
+        into one route. Routes within the limit are requested in one go.
+
+        Example:
+
+        >>> router = MapboxOSRM(api_key)
+        >>> route = router.directions_chunked(stops, profile="driving")
+        >>> print(route.duration, len(route.chunks))
+
+        :param locations: The locations in order of visit, as for ``directions``.
+        :type locations: list
+
+        :param args: Further positional arguments for ``directions``, e.g. ``profile``.
+
+        :param chunk_size: Maximum number of locations per request. Default the provider's public limit, e.g. 25 for
+            Mapbox.
+        :type chunk_size: int
+
+        :param max_workers: Maximum number of requests in flight at the same time. Default 10.
+        :type max_workers: int
+
+        :param kwargs: Further keyword arguments for ``directions``, applying to all sections. Per-location arguments,
+            such as Mapbox's ``radiuses``, are split up accordingly.
+
+        :raises ValueError: for alternative routes or waypoint optimization, which can't be merged across sections.
+
+        :returns: The complete route. With an asynchronous client, an awaitable.
+        :rtype: :class:`routingpy.direction.ChunkedDirection`
+        """
+        self._check_supported("directions")
+        chunk_size = chunk_size or self._DIRECTIONS_MAX_LOCATIONS
+        if chunk_size is None:
+            raise ValueError(
+                "{} has no default chunk size, specify chunk_size.".format(type(self).__name__)
+            )
+        for param in ("alternatives", "optimize"):
+            if kwargs.get(param):
+                raise ValueError("{} is not supported for chunked directions.".format(param))
+
+        location_params = {
+            param: kwargs.pop(param)
+            for param in self._DIRECTIONS_LOCATION_PARAMS
+            if kwargs.get(param) is not None
+        }
+        queries = _chunk_queries(list(locations), chunk_size, location_params)
+
+        def directions(locations, **chunk_kwargs):
+            return self.directions(locations, *args, **chunk_kwargs)
+
+        results = self._run_many(directions, queries, max_workers, False, kwargs)
+        if asyncio.iscoroutine(results):
+
+            async def _merge():
+                return ChunkedDirection(await results, self._route_legs)
+
+            return _merge()
+
+        return ChunkedDirection(results, self._route_legs)
@@ -0,0 +1,414 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Response caches, which can be passed to a client to avoid sending the same request twice.
+
+Example:
+
+>>> from routingpy import OSRM
+>>> from routingpy.cache import MemoryCache
+>>> cache = MemoryCache(maxsize=10000, ttl=3600)
+>>> router = OSRM(cache=cache)
+>>> route = router.directions(locations=[[8.5, 47.3], [8.6, 47.4]])
+>>> route = router.directions(locations=[[8.5, 47.3], [8.6, 47.4]])  # served from the cache
+>>> print(cache.stats)
+{'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+CacheKey = namedtuple("CacheKey", ["method", "base_url", "url", "body"])
+CacheKey.__doc__ = """Identifies a request: the HTTP method, the client's base URL, the path with the query string
+as produced by :meth:`routingpy.client_base.BaseClient._generate_auth_url` and the canonicalized POST body."""
+
+_bypass = ContextVar("routingpy_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_cache():
+    """
+    Context manager to send the requests made within it to the server, without reading from or writing to
+    any cache. Applies to the current thread or asyncio task only.
+
+    >>> with bypass_cache():
+    ...     route = router.directions(locations=[[8.5, 47.3], [8.6, 47.4]])
+    """
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed():
+    """Returns True within a :func:`bypass_cache` block."""
+    return _bypass.get()
+
+
+class BaseCache(metaclass=ABCMeta):
+    """Abstract base class every cache inherits from. Implementations need to be thread-safe."""
+
+    #: Whether :meth:`get` and :meth:`set` do I/O. The async client calls blocking caches in a worker thread
+    #: instead of on the event loop.
+    blocking = False
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key):
+        """Returns the cached response for ``key`` or None if there is no valid entry.
+
+        :param key: The request's key.
+        :type key: :class:`CacheKey`
+
+        :rtype: dict or bytes or None
+        """
+        pass
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """Stores a response.
+
+        :param key: The request's key.
+        :type key: :class:`CacheKey`
+
+        :param value: The parsed JSON response or binary body.
+        :type value: dict or bytes
+
+        :param ttl: Seconds until the entry expires, overrides the cache's default TTL.
+        :type ttl: int or float
+        """
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """Removes all entries."""
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @property
+    def stats(self):
+        """The number of hits, misses, evictions and the current number of entries.
+
+        :rtype: dict
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self)}
+
+    def _count(self, hit=False, miss=False, evictions=0):
+        with self._stats_lock:
+            self.hits += hit
+            self.misses += miss
+            self.evictions += evictions
+
+
+class MemoryCache(BaseCache):
+    """
+    Thread-safe in-memory LRU cache with a per-entry time to live.
+
+    Responses are stored as parsed JSON and handed out without copying, so hits skip both the request and
+    the JSON decoding. Don't modify the ``raw`` responses of routingpy's result objects when using a cache.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        """
+        :param maxsize: Maximum number of entries. The least recently used entry is evicted beyond. Default 1024.
+        :type maxsize: int
+
+        :param ttl: Default seconds until an entry expires. None for no expiry. Default None.
+        :type ttl: int or float
+        """
+        super(MemoryCache, self).__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._count(hit=True)
+                    return value
+
+                del self._entries[key]
+
+        self._count(miss=True)
+        return None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+
+        if evicted:
+            self._count(evictions=evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Persistent cache in a SQLite database file, which survives restarts and can be shared by several processes
+    on the same host.
+
+    Responses are stored zlib-compressed. The database runs in WAL mode, so readers don't block each other or
+    a writer, and writers wait for each other up to ``timeout`` seconds. Each thread uses its own connection.
+    The hit/miss/eviction counters in :attr:`stats` are kept per instance, i.e. per process.
+
+    Lookups only read. The access times which :attr:`max_bytes` evicts by are collected in memory and written
+    with the next :meth:`set`, or every ``flush_size`` hits if the write lock is free at that moment, so the
+    eviction order is approximately least recently used across processes. Expired entries are dropped on
+    eviction or overwritten when they are cached again.
+
+    The async client runs the cache's queries in a worker thread, they don't block its event loop.
+
+    Example:
+
+    >>> from routingpy import Google
+    >>> from routingpy.cache import SQLiteCache
+    >>> cache = SQLiteCache("/var/cache/routingpy.sqlite", ttl=7 * 24 * 3600, max_bytes=2 * 1024**3)
+    >>> router = Google(api_key="...", cache=cache)
+    >>> cache.invalidate(base_url=router.client.base_url)  # drop all of Google's responses
+    """
+
+    _JSON = 0
+    _BYTES = 1
+
+    blocking = True
+
+    def __init__(self, path, ttl=None, max_bytes=None, compression_level=6, timeout=30, flush_size=1000):
+        """
+        :param path: Path of the database file, created if it doesn't exist.
+        :type path: str
+
+        :param ttl: Default seconds until an entry expires. None for no expiry. Default None.
+        :type ttl: int or float
+
+        :param max_bytes: Maximum total size of the compressed responses. The least recently used entries are
+            evicted beyond. None for no limit. Default None.
+        :type max_bytes: int
+
+        :param compression_level: zlib compression level from 0 (none) to 9 (smallest). Default 6.
+        :type compression_level: int
+
+        :param timeout: Seconds to wait for another process' write to finish before raising
+            :class:`sqlite3.OperationalError`. Default 30.
+        :type timeout: int or float
+
+        :param flush_size: Number of hits whose access times are collected before they are written without
+            waiting for the write lock. Default 1000.
+        :type flush_size: int
+        """
+        super(SQLiteCache, self).__init__()
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.timeout = timeout
+        self.flush_size = flush_size
+        self._local = threading.local()
+        # Access times of hits by key, not written yet
+        self._accessed = {}
+        self._accessed_lock = threading.Lock()
+
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, base_url TEXT NOT NULL, kind INTEGER NOT NULL, value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, expires REAL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_base_url ON responses (base_url)")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode, transactions are started explicitly in _transaction()
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn
+        # Take the write lock right away, so concurrent writers queue up instead of failing on lock upgrade
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _write_accessed(self, conn):
+        """Writes the collected access times within a transaction of ``conn``."""
+        with self._accessed_lock:
+            accessed, self._accessed = self._accessed, {}
+        conn.executemany(
+            "UPDATE responses SET accessed = MAX(accessed, ?) WHERE key = ?",
+            [(now, digest) for digest, now in accessed.items()],
+        )
+
+    def _try_write_accessed(self):
+        """Writes the collected access times if no other connection holds the write lock, else keeps them."""
+        conn = self._conn
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            with self._transaction() as conn:
+                self._write_accessed(conn)
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.execute("PRAGMA busy_timeout = {:d}".format(int(self.timeout * 1000)))
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha256(json.dumps(list(key)).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        digest = self._hash(key)
+        now = time.time()
+
+        row = self._conn.execute(
+            "SELECT kind, value, expires FROM responses WHERE key = ?", (digest,)
+        ).fetchone()
+        if row is not None:
+            kind, value, expires = row
+            if expires is None or expires > now:
+                with self._accessed_lock:
+                    self._accessed[digest] = now
+                    flush = len(self._accessed) >= self.flush_size
+                if flush:
+                    self._try_write_accessed()
+                self._count(hit=True)
+                value = zlib.decompress(value)
+                return json.loads(value.decode("utf-8")) if kind == self._JSON else value
+
+        self._count(miss=True)
+        return None
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+
+        if isinstance(value, bytes):
+            kind = self._BYTES
+        else:
+            kind, value = self._JSON, json.dumps(value, separators=(",", ":")).encode("utf-8")
+        value = zlib.compress(value, self.compression_level)
+
+        evicted = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, base_url, kind, value, size, expires, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._hash(key), key.base_url, kind, value, len(value), expires, now),
+            )
+            self._write_accessed(conn)
+            if self.max_bytes is not None:
+                evicted = self._evict(conn, now)
+
+        if evicted:
+            self._count(evictions=evicted)
+
+    def _evict(self, conn, now):
+        """Deletes expired entries, then the least recently used ones until the size limit is met."""
+        evicted = conn.execute("DELETE FROM responses WHERE expires <= ?", (now,)).rowcount
+
+        excess = (
+            conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0] - self.max_bytes
+        )
+        if excess > 0:
+            keys = []
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                keys.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+            evicted += len(keys)
+
+        return evicted
+
+    def invalidate(self, base_url=None):
+        """Removes the entries of one router, identified by its client's base URL, or all entries.
+
+        :param base_url: The ``base_url`` of the client whose responses to remove. None removes all.
+        :type base_url: str
+
+        :returns: The number of removed entries.
+        :rtype: int
+        """
+        with self._transaction() as conn:
+            if base_url is None:
+                return conn.execute("DELETE FROM responses").rowcount
+            return conn.execute("DELETE FROM responses WHERE base_url = ?", (base_url,)).rowcount
+
+    def clear(self):
+        self.invalidate()
+
+    def close(self):
+        """Writes the collected access times and closes the calling thread's database connection. It's reopened on
+        the next access."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            if self._accessed:
+                with self._transaction() as conn:
+                    self._write_accessed(conn)
+            conn.close()
+            self._local.conn = None
+
+    def __len__(self):
+        # Expired entries are only deleted on eviction
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM responses WHERE expires IS NULL OR expires > ?", (time.time(),)
+        ).fetchone()[0]
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Circuit breakers, which let requests to an unavailable provider fail fast instead of waiting for their retries
+to time out.
+
+A breaker counts consecutive failed attempts, i.e. timeouts, connection errors and HTTP 5xx. Beyond
+``failure_threshold`` it opens and every request raises :class:`routingpy.exceptions.CircuitOpen` right away.
+After ``recovery_timeout`` seconds it lets a trial request through (half-open), which closes it again on success.
+
+Example:
+
+>>> from routingpy import Valhalla
+>>> from routingpy.circuit import circuit_states
+>>> router = Valhalla("http://localhost:8002", circuit_breaker=True)
+>>> # ... the server goes down ...
+>>> print(router.client.circuit_breaker.state)
+open
+>>> print(circuit_states())
+{'http://localhost:8002': {'state': 'open', 'failures': 5, 'opened': 1, 'rejected': 120, 'retry_in': 21.3}}
+"""
+import threading
+import time
+
+from . import exceptions
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker with closed, open and half-open state. Shared by every client it's passed to.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=5,
+        recovery_timeout=30,
+        half_open_max_calls=1,
+        success_threshold=1,
+        on_state_change=None,
+    ):
+        """
+        :param failure_threshold: Number of consecutive failed attempts which open the circuit. Default 5.
+        :type failure_threshold: int
+
+        :param recovery_timeout: Seconds the circuit stays open before trial requests are let through. Default 30.
+        :type recovery_timeout: float
+
+        :param half_open_max_calls: Number of trial requests in flight at a time while half-open. Default 1.
+        :type half_open_max_calls: int
+
+        :param success_threshold: Number of successful trial requests which close the circuit again. Default 1.
+        :type success_threshold: int
+
+        :param on_state_change: Called with the breaker, the old and the new state on every transition, e.g. to
+            log or export it.
+        :type on_state_change: callable
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1 or success_threshold < 1:
+            raise ValueError(
+                "failure_threshold, half_open_max_calls and success_threshold must be at least 1."
+            )
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.on_state_change = on_state_change
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._trials = 0
+        self._changed = time.monotonic()
+        self.opened = 0
+        self.rejected = 0
+
+    def _transition(self, state):
+        # Called with the lock held, returns the change to report after releasing it
+        old_state = self._state
+        self._state = state
+        self._changed = time.monotonic()
+        self._successes = self._trials = 0
+        if state == OPEN:
+            self.opened += 1
+        elif state == CLOSED:
+            self._failures = 0
+
+        return old_state, state
+
+    def _notify(self, change):
+        if change is not None and self.on_state_change is not None:
+            self.on_state_change(self, *change)
+
+    def allow(self):
+        """Admits a request or raises if the circuit is open. Every admitted request has to be followed by
+        :meth:`record_success` or :meth:`record_failure`.
+
+        :raises routingpy.exceptions.CircuitOpen: when the circuit is open.
+        """
+        change = None
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._changed >= self.recovery_timeout:
+                change = self._transition(HALF_OPEN)
+
+            if self._state == HALF_OPEN:
+                # Trials which never reported back don't block the circuit forever
+                if (
+                    self._trials >= self.half_open_max_calls
+                    and now - self._changed >= self.recovery_timeout
+                ):
+                    self._trials = 0
+                    self._changed = now
+                if self._trials < self.half_open_max_calls:
+                    self._trials += 1
+                    rejected = None
+                else:
+                    rejected = 0.0
+            elif self._state == OPEN:
+                rejected = self.recovery_timeout - (now - self._changed)
+            else:
+                rejected = None
+
+            if rejected is not None:
+                self.rejected += 1
+
+        self._notify(change)
+        if rejected is not None:
+            raise exceptions.CircuitOpen(rejected)
+
+    def record_success(self):
+        """Records a request which reached the provider."""
+        change = None
+        with self._lock:
+            if self._state == HALF_OPEN:
+                # The trial is done, the next one may go
+                self._trials = max(0, self._trials - 1)
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    change = self._transition(CLOSED)
+            else:
+                self._failures = 0
+
+        self._notify(change)
+
+    def record_failure(self):
+        """Records a request which failed because of the provider, e.g. a timeout or HTTP 5xx."""
+        change = None
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= self.failure_threshold
+            ):
+                change = self._transition(OPEN)
+
+        self._notify(change)
+
+    def reset(self):
+        """Closes the circuit, e.g. after the provider was restarted."""
+        with self._lock:
+            change = self._transition(CLOSED) if self._state != CLOSED else None
+
+        self._notify(change)
+
+    @property
+    def state(self):
+        """The current state, "closed", "open" or "half-open". An open circuit past its ``recovery_timeout`` is
+        reported as "half-open", since it will admit the next request.
+
+        :rtype: str
+        """
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._changed >= self.recovery_timeout:
+                return HALF_OPEN
+            return self._state
+
+    @property
+    def stats(self):
+        """The state, the number of consecutive failures, how often the circuit opened, the number of rejected
+        requests and the seconds until an open circuit admits a trial request.
+
+        :rtype: dict
+        """
+        state = self.state
+        with self._lock:
+            retry_in = 0.0
+            if state == OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self._changed))
+
+            return {
+                "state": state,
+                "failures": self._failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retry_in": retry_in,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def set_circuit_breaker(base_url, breaker):
+    """Registers a circuit breaker for all clients of ``base_url`` in this process, including already created
+    ones.
+
+    :param base_url: The base URL of the provider, as the router's ``base_url``.
+    :type base_url: str
+
+    :param breaker: The breaker, or None to remove it.
+    :type breaker: CircuitBreaker
+
+    :returns: The previously registered breaker or None.
+    :rtype: CircuitBreaker
+    """
+    with _breakers_lock:
+        previous = _breakers.pop(base_url, None)
+        if breaker is not None:
+            _breakers[base_url] = breaker
+
+    return previous
+
+
+def get_circuit_breaker(base_url, create=False, **kwargs):
+    """Returns the circuit breaker registered for ``base_url``. If there is none and ``create`` is True, a
+    :class:`CircuitBreaker` with ``kwargs`` is registered first.
+
+    :param base_url: The base URL of the provider, as the router's ``base_url``.
+    :type base_url: str
+
+    :param create: Register a new breaker if there is none.
+    :type create: bool
+
+    :rtype: CircuitBreaker or None
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(base_url)
+        if breaker is None and create:
+            breaker = _breakers[base_url] = CircuitBreaker(**kwargs)
+
+    return breaker
+
+
+def circuit_states():
+    """Returns the :attr:`CircuitBreaker.stats` of every registered breaker by base URL, e.g. for a health
+    endpoint.
+
+    :rtype: dict
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+
+    return {base_url: breaker.stats for base_url, breaker in breakers}
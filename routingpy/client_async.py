@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Asynchronous client, which lets every router send its requests from an :mod:`asyncio` event loop.
+"""
+
+import asyncio
+import copy
+import json
+import tempfile
+import time
+import warnings
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from . import exceptions
+from .client_base import _BINARY_CONTENT_TYPES, DEFAULT, BaseClient, options
+from .coalesce import AsyncSingleFlight
+
+_STREAM_CHUNK_SIZE = 64 * 1024
+_STREAM_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+class AsyncClient(BaseClient):
+    """Asynchronous client class for requests handling, which can be passed to each router. Uses the aiohttp
+    package, which needs to be installed separately, e.g. ``pip install routingpy[async]``.
+
+    When a router is initialized with this client, all its request methods (e.g. ``directions``, ``matrix``,
+    ``isochrones``) return awaitables, so that many requests can be in flight from one event loop:
+
+    >>> import asyncio
+    >>> from routingpy import Valhalla
+    >>> from routingpy.client_async import AsyncClient
+    >>> async def main():
+    ...     router = Valhalla(client=AsyncClient)
+    ...     routes = await asyncio.gather(*[router.directions(locs, "auto") for locs in all_locations])
+    ...     await router.client.close()
+    >>> asyncio.run(main())
+    """
+
+    _single_flight_class = AsyncSingleFlight
+
+    def __init__(
+        self,
+        base_url,
+        user_agent=None,
+        timeout=DEFAULT,
+        retry_timeout=None,
+        retry_over_query_limit=None,
+        skip_api_error=None,
+        session=None,
+        pool_connections=None,
+        pool_maxsize=None,
+        pool_block=None,
+        keep_alive=None,
+        cache=None,
+        coalesce=None,
+        json_backend=None,
+        rate_limit=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        balancing=None,
+        **kwargs
+    ):
+        """
+        :param base_url: The base URL for the request. All routers must provide a default.
+            Should not have a trailing slash. Pass a list of base URLs or a :class:`routingpy.balancer.EndpointPool`
+            to balance the requests between several replicas, whose statistics are in ``endpoint_pool.stats``.
+        :type base_url: string or list of str or routingpy.balancer.EndpointPool
+
+        :param user_agent: User-Agent to send with the requests to routing API.
+            Overrides ``options.default_user_agent``.
+        :type user_agent: string
+
+        :param timeout: Combined connect and read timeout for HTTP requests, in
+            seconds. Specify "None" for no timeout.
+        :type timeout: int
+
+        :param retry_timeout: Timeout across multiple retriable requests, in
+            seconds.
+        :type retry_timeout: int
+
+        :param retry_over_query_limit: If True, client will not raise an exception
+            on HTTP 429, but instead jitter a sleeping timer to pause between
+            requests until HTTP 200 or retry_timeout is reached.
+        :type retry_over_query_limit: bool
+
+        :param skip_api_error: Continue with batch processing if a :class:`routingpy.exceptions.RouterApiError` is
+            encountered (e.g. no route found). If False, processing will discontinue and raise an error. Default False.
+        :type skip_api_error: bool
+
+        :param session: A session to send the requests with. Pass the same session to several routers to
+            share one connection pool between them. It's not closed by :meth:`close`. If specified, the pool
+            arguments are ignored. Default a new session with its own connection pool.
+        :type session: aiohttp.ClientSession
+
+        :param pool_connections: Number of different hosts to keep connections to. Together with
+            ``pool_maxsize`` it limits the total number of connections.
+            Default :attr:`routingpy.routers.options.default_pool_connections`.
+        :type pool_connections: int
+
+        :param pool_maxsize: Maximum number of simultaneous connections per host.
+            Default :attr:`routingpy.routers.options.default_pool_maxsize`.
+        :type pool_maxsize: int
+
+        :param pool_block: Only for compatibility with :class:`routingpy.client_default.Client`, aiohttp always
+            waits for a free connection.
+        :type pool_block: bool
+
+        :param keep_alive: Keep connections open and reuse them for subsequent requests.
+            Default :attr:`routingpy.routers.options.default_keep_alive`.
+        :type keep_alive: bool
+
+        :param cache: A cache for the parsed responses, e.g. :class:`routingpy.cache.MemoryCache`. Can be shared
+            between routers. Use :func:`routingpy.cache.bypass_cache` to skip it for individual requests.
+            Caches doing I/O, e.g. :class:`routingpy.cache.SQLiteCache`, are queried in a worker thread.
+            Default no caching.
+        :type cache: routingpy.cache.BaseCache
+
+        :param coalesce: If True, identical requests sent while one is in flight wait for its response instead
+            of sending their own. The number of collapsed requests is available in ``single_flight.stats``.
+            Pass a :class:`routingpy.coalesce.AsyncSingleFlight` to coalesce across several clients. Default False.
+        :type coalesce: bool or routingpy.coalesce.AsyncSingleFlight
+
+        :param rate_limit: Paces the requests to the provider's quota, also across retries. A
+            :class:`routingpy.ratelimit.RateLimiter`, which may be shared with other clients, or the maximum number
+            of requests per second of this client. Default the limiter registered for the base URL with
+            :func:`routingpy.ratelimit.set_rate_limit`, if any. The current wait is ``rate_limiter.wait_time``.
+        :type rate_limit: routingpy.ratelimit.RateLimiter or int or float
+
+        :param retry_policy: Which failed requests are retried, how often and with which backoff, e.g. to also
+            retry timeouts and dropped connections. Default :attr:`routingpy.routers.options.default_retry_policy`.
+        :type retry_policy: routingpy.retry.RetryPolicy
+
+        :param circuit_breaker: Lets requests fail fast with :class:`routingpy.exceptions.CircuitOpen` after repeated
+            failures, instead of retrying until ``retry_timeout``. A :class:`routingpy.circuit.CircuitBreaker`, or
+            True for the one shared by all clients of the same base URL. Default the breaker registered for the base
+            URL with :func:`routingpy.circuit.set_circuit_breaker`, if any. Its state is in ``circuit_breaker.stats``.
+        :type circuit_breaker: routingpy.circuit.CircuitBreaker or bool
+
+        :param balancing: The strategy to balance the requests between a list of base URLs: "round_robin",
+            "least_outstanding" or "latency". Default "round_robin".
+        :type balancing: str
+
+        :param kwargs: Additional arguments, such as headers or proxies. Anything else is passed to
+            :meth:`aiohttp.ClientSession.request`.
+        :type kwargs: dict
+        """
+        if aiohttp is None:  # pragma: no cover
+            raise ImportError(
+                "AsyncClient requires the aiohttp package, install it with 'pip install routingpy[async]'."
+            )
+
+        self._session = session
+        self._owns_session = session is None
+        self._pool_connections = pool_connections or options.default_pool_connections
+        self._pool_maxsize = pool_maxsize or options.default_pool_maxsize
+        self._keep_alive = keep_alive if keep_alive is not None else options.default_keep_alive
+        super(AsyncClient, self).__init__(
+            base_url,
+            user_agent=user_agent,
+            timeout=timeout,
+            retry_timeout=retry_timeout,
+            retry_over_query_limit=retry_over_query_limit,
+            skip_api_error=skip_api_error,
+            cache=cache,
+            coalesce=coalesce,
+            json_backend=json_backend,
+            rate_limit=rate_limit,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            balancing=balancing,
+            **kwargs
+        )
+
+        self.kwargs = kwargs or {}
+        try:
+            self.headers.update(self.kwargs["headers"])
+        except KeyError:
+            pass
+
+        self.kwargs["headers"] = self.headers
+        self.kwargs["timeout"] = self.timeout
+
+        self.proxies = self.kwargs.get("proxies") or options.default_proxies
+        if self.proxies:
+            self.kwargs["proxies"] = self.proxies
+
+    async def _request(
+        self,
+        url,
+        get_params={},
+        post_params=None,
+        first_request_time=None,
+        retry_counter=0,
+        dry_run=None,
+        stream=None,
+    ):
+        """Performs HTTP GET/POST with credentials, returning the body as
+        JSON.
+
+        :param url: URL path for the request. Should begin with a slash.
+        :type url: string
+
+        :param get_params: HTTP GET parameters.
+        :type get_params: dict or list of tuples
+
+        :param post_params: HTTP POST parameters. Only specified by calling method.
+        :type post_params: dict
+
+        :param first_request_time: The time of the first request (None if no
+            retries have occurred).
+        :type first_request_time: :class:`datetime.datetime`
+
+        :param retry_counter: The number of this retry, or zero for first attempt.
+        :type retry_counter: int
+
+        :param dry_run: If true, only prints URL and parameters. true or false.
+        :type dry_run: bool
+
+        :param stream: If true, a JSON body is returned as a binary file-like object to be parsed incrementally,
+            instead of being decoded. Streamed responses are neither cached nor coalesced.
+        :type stream: bool
+
+        :raises routingpy.exceptions.RouterApiError: when the API returns an error due to faulty configuration.
+        :raises routingpy.exceptions.RouterServerError: when the API returns a server error.
+        :raises routingpy.exceptions.RouterError: when anything else happened while requesting.
+        :raises routingpy.exceptions.JSONParseError: when the JSON response can't be parsed.
+        :raises routingpy.exceptions.Timeout: when the request timed out.
+        :raises routingpy.exceptions.TransportError: when something went wrong while trying to
+            execute a request.
+
+        :returns: raw JSON response, GeoTIFF image or the file-like JSON body if streamed
+        :rtype: dict or bytes or file-like
+        """
+
+        authed_url = self._generate_auth_url(url, get_params)
+
+        cache_key = self._cache_key(authed_url, post_params, dry_run or stream)
+        if cache_key is not None and retry_counter == 0:
+            cached = await self._call_cache(self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
+        final_requests_kwargs = copy.copy(self.kwargs)
+
+        # Determine GET/POST.
+        method = "GET"
+        if post_params is not None:
+            method = "POST"
+            if final_requests_kwargs["headers"]["Content-Type"] == "application/json":
+                final_requests_kwargs["json"] = post_params
+            else:
+                # Send as x-www-form-urlencoded key-value pair string (e.g. Mapbox API)
+                final_requests_kwargs["data"] = post_params
+
+        # Only print URL and parameters for dry_run
+        if dry_run:
+            print(
+                "url:\n{}\nParameters:\n{}".format(
+                    self.base_url + authed_url, json.dumps(final_requests_kwargs, indent=2)
+                )
+            )
+            return
+
+        if "json" in final_requests_kwargs:
+            # Encode with the client's JSON library, not the HTTP library's stdlib json
+            final_requests_kwargs["data"] = self.json_backend.dumps(final_requests_kwargs.pop("json"))
+
+        if stream:
+            final_requests_kwargs["stream"] = True
+
+        send_args = (method, authed_url, final_requests_kwargs, first_request_time, retry_counter)
+        if self.single_flight is not None and not stream:
+            body = await self.single_flight.do(
+                self._request_key(authed_url, post_params), self._send, *send_args
+            )
+        else:
+            body = await self._send(*send_args)
+
+        if cache_key is not None and body is not None:
+            await self._call_cache(self.cache.set, cache_key, body)
+
+        return body
+
+    async def _call_cache(self, method, *args):
+        """Calls a method of the cache, in the default executor if the cache blocks."""
+        if not self.cache.blocking:
+            return method(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+    async def _send(self, method, authed_url, requests_kwargs, first_request_time=None, retry_counter=0):
+        """Sends the request prepared by :meth:`_request` and retries it as the client's
+        :class:`routingpy.retry.RetryPolicy` says.
+
+        :param method: The HTTP verb, GET or POST.
+        :type method: string
+
+        :param authed_url: The path and query string as returned by :meth:`_generate_auth_url`.
+        :type authed_url: string
+
+        :param requests_kwargs: The client's request arguments in the format of the requests package.
+        :type requests_kwargs: dict
+
+        :param first_request_time: The time of the first request (None if no
+            retries have occurred).
+        :type first_request_time: :class:`datetime.datetime`
+
+        :param retry_counter: The number of this retry, or zero for first attempt.
+        :type retry_counter: int
+
+        :returns: raw JSON response, GeoTIFF image or the file-like JSON body if streamed, None for a skipped
+            API error
+        :rtype: dict or bytes or file-like or None
+        """
+        if not first_request_time:
+            first_request_time = datetime.now()
+
+        deadline = self._retry_deadline()
+        if self.retry_policy.attempt_timeout is not None:
+            requests_kwargs = dict(requests_kwargs, timeout=self.retry_policy.attempt_timeout)
+
+        retry_after = None
+        while True:
+            elapsed = datetime.now() - first_request_time
+            if elapsed > deadline:
+                raise exceptions.Timeout()
+
+            if retry_counter > 0:
+                delay = self.retry_policy.backoff(retry_counter)
+                # No point in waiting if the retry would be too late anyway
+                if (
+                    retry_after is not None
+                    and elapsed + timedelta(seconds=max(retry_after, delay)) > deadline
+                ):
+                    raise exceptions.Timeout()
+
+                # The rate limiter waits for the rest of a longer Retry-After, the backoff is the minimum also
+                # with "Retry-After: 0"
+                await asyncio.sleep(delay)
+
+            circuit_breaker = self.circuit_breaker
+            if circuit_breaker is not None:
+                circuit_breaker.allow()
+
+            rate_limiter = self.rate_limiter
+            if rate_limiter is not None:
+                await rate_limiter.acquire_async()
+
+            retry_counter += 1
+            retry_after = status_code = error = None
+            endpoint = self.endpoint_pool.acquire() if self.endpoint_pool is not None else None
+            started = time.monotonic()
+            try:
+                full_url = (endpoint.url if endpoint is not None else self.base_url) + authed_url
+                response = await self.session.request(
+                    method,
+                    URL(full_url, encoded=True),
+                    **self._aiohttp_kwargs(full_url, requests_kwargs)
+                )
+                if not requests_kwargs.get("stream"):
+                    # Reading the whole body releases the connection, the body stays cached on the response
+                    await response.read()
+                self._req = response.request_info
+                status_code = response.status
+
+            except asyncio.TimeoutError as e:
+                error = exceptions.Timeout()
+                error.__cause__ = e
+            except aiohttp.ClientConnectionError as e:
+                error = exceptions.TransportError(str(e))
+                error.__cause__ = e
+            finally:
+                self._record_attempt(circuit_breaker, endpoint, started, status_code, error)
+
+            if error is not None:
+                if not self._retries_exception(error, retry_counter):
+                    raise error
+
+                self._warn_retry("Request failed with {!r}".format(error), retry_counter)
+                continue
+
+            retry_after = self._update_rate_limit(response.headers, response.status)
+
+            if self._retries_status(response.status, retry_counter):
+                # Release the connection of an unread streamed response
+                response.release()
+                self._warn_retry(self._status_reason(response.status), retry_counter)
+                continue
+
+            try:
+                return await self._get_body(response, stream=requests_kwargs.get("stream"))
+
+            except (exceptions.RouterError, exceptions.JSONParseError) as e:
+                if isinstance(e, exceptions.RouterApiError) and self.skip_api_error:
+                    warnings.warn(
+                        "Router {} returned an API error with "
+                        "the following message:\n{}".format(
+                            self.__class__.__name__, await response.text()
+                        )
+                    )
+                    return
+
+                if not self._retries_exception(e, retry_counter):
+                    raise
+
+                self._warn_retry("Request failed with {!r}".format(e), retry_counter)
+
+    def _parse(self, parser, response, *args, **kwargs):
+        """Defers the router's parsing function until the response coroutine was awaited.
+
+        :returns: A coroutine resolving to the parsed routingpy object.
+        """
+
+        async def _await_and_parse():
+            return parser(await response, *args, **kwargs)
+
+        return _await_and_parse()
+
+    @staticmethod
+    def _aiohttp_kwargs(url, requests_kwargs):
+        """Translates the requests-style keyword arguments to the ones :mod:`aiohttp` understands."""
+        aiohttp_kwargs = copy.copy(requests_kwargs)
+
+        timeout = aiohttp_kwargs.pop("timeout", None)
+        aiohttp_kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+
+        aiohttp_kwargs.pop("stream", None)
+
+        proxies = aiohttp_kwargs.pop("proxies", None)
+        if proxies:
+            proxy = proxies.get(urlparse(url).scheme)
+            if proxy:
+                aiohttp_kwargs["proxy"] = proxy
+
+        return aiohttp_kwargs
+
+    @property
+    def session(self):
+        """The :class:`aiohttp.ClientSession` used for all requests. Created on first access, which has to
+        happen inside a running event loop."""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._pool_connections * self._pool_maxsize,
+                    limit_per_host=self._pool_maxsize,
+                    force_close=not self._keep_alive,
+                )
+            )
+        return self._session
+
+    async def close(self):
+        """Closes the underlying :class:`aiohttp.ClientSession`, unless it was passed in by the user. Call it once
+        all requests are done."""
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def req(self):
+        """Holds the :class:`aiohttp.RequestInfo` for the last request."""
+        return self._req
+
+    async def _get_body(self, response, stream=False):
+        status_code = response.status
+        content_type = response.content_type
+
+        if status_code == 200:
+            if content_type in _BINARY_CONTENT_TYPES:
+                return await response.read()
+
+            elif stream:
+                # The parsers are synchronous, so the body is buffered first, on disk beyond a few MB
+                body = tempfile.SpooledTemporaryFile(max_size=_STREAM_SPOOL_SIZE)
+                async for chunk in response.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                    body.write(chunk)
+                body.seek(0)
+                return body
+
+            else:
+                try:
+                    return self.json_backend.loads(await response.read())
+
+                except ValueError:
+                    raise exceptions.JSONParseError(
+                        "Can't decode JSON response:{}".format(await response.text())
+                    )
+
+        if status_code == 429:
+            raise exceptions.OverQueryLimit(status_code, await response.text())
+
+        if 400 <= status_code < 500:
+            raise exceptions.RouterApiError(status_code, await response.text())
+
+        if 500 <= status_code:
+            raise exceptions.RouterServerError(status_code, await response.text())
+
+        if status_code != 200:
+            raise exceptions.RouterError(status_code, await response.text())
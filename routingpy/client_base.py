@@ -24,14 +24,27 @@ try:
 except (ModuleNotFoundError, ImportError):
     __version__ = "None"
 
+import json
+import time
+import warnings
 from abc import ABCMeta, abstractmethod
 from datetime import timedelta
 from urllib.parse import urlencode
 
 import requests
 
+from .balancer import EndpointPool
+from .cache import CacheKey, is_bypassed
+from .circuit import CircuitBreaker, get_circuit_breaker
+from .coalesce import SingleFlight
+from .json_backend import get_json_backend
+from .ratelimit import RateLimiter, get_rate_limiter, parse_rate_limit_headers
+from .retry import DEFAULT_RETRY_POLICY
+from .utils import get_ordinal
+
 _DEFAULT_USER_AGENT = "routingpy/v{}".format(__version__)
-_RETRIABLE_STATUSES = set([503])
+# Responses of these types are passed on as bytes instead of being decoded as JSON
+_BINARY_CONTENT_TYPES = set(["image/tiff", "application/x-flatbuffers", "application/x-protobuf"])
 
 
 class options(object):
@@ -74,6 +87,33 @@ class options(object):
 
         self.default_proxies:
             Proxies passed to the requests library. Dictionary.
+
+        self.default_pool_connections:
+            Number of connection pools to cache, i.e. the number of different hosts to keep connections
+            to. Integer.
+
+        self.default_pool_maxsize:
+            Maximum number of connections to keep open per host. Set this at least to the number of
+            threads requesting concurrently from the same host. Integer.
+
+        self.default_pool_block:
+            If True, a request waits for a free connection when all connections to a host are in use.
+            If False, an additional connection is opened, but it will not be kept alive afterwards. Boolean.
+
+        self.default_keep_alive:
+            If True, connections are kept open and reused for subsequent requests to the same host. Boolean.
+
+        self.default_json_backend:
+            Name of the JSON library to decode responses and encode request bodies with, one of
+            :data:`routingpy.json_backend.BACKENDS`. None picks the fastest installed one. String.
+
+        self.default_geometry_backend:
+            Container for the geometries of parsed responses, "list" for lists of coordinates or "array" for
+            the compact :class:`routingpy.geometry.Geometry`. None is "list". String.
+
+        self.default_retry_policy:
+            Which failed requests are retried and how, a :class:`routingpy.retry.RetryPolicy`. None retries
+            HTTP 429 and 503 with exponential backoff until ``default_retry_timeout``.
     """
 
     default_timeout = 60
@@ -82,6 +122,13 @@ class options(object):
     default_skip_api_error = False
     default_user_agent = _DEFAULT_USER_AGENT
     default_proxies = None
+    default_pool_connections = 10
+    default_pool_maxsize = 10
+    default_pool_block = False
+    default_keep_alive = True
+    default_json_backend = None
+    default_geometry_backend = None
+    default_retry_policy = None
 
 
 # To avoid trouble when respecting timeout for individual routers (i.e. can't be None, since that's no timeout)
@@ -91,6 +138,8 @@ DEFAULT = type("object", (object,), {"__repr__": lambda self: "DEFAULT"})()
 class BaseClient(metaclass=ABCMeta):
     """Abstract base class every client inherits from. Authentication is handled in each subclass."""
 
+    _single_flight_class = SingleFlight
+
     def __init__(
         self,
         base_url,
@@ -99,12 +148,20 @@ class BaseClient(metaclass=ABCMeta):
         retry_timeout=None,
         retry_over_query_limit=None,
         skip_api_error=None,
+        cache=None,
+        coalesce=None,
+        json_backend=None,
+        rate_limit=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        balancing=None,
         **kwargs
     ):
         """
         :param base_url: The base URL for the request. All routers must provide a default.
-            Should not have a trailing slash.
-        :type base_url: string
+            Should not have a trailing slash. Pass a list of base URLs or a :class:`routingpy.balancer.EndpointPool`
+            to balance the requests between several replicas.
+        :type base_url: string or list of str or routingpy.balancer.EndpointPool
 
         :param user_agent: User-Agent to send with the requests to routing API.
             Overrides ``options.default_user_agent``.
@@ -127,9 +184,49 @@ class BaseClient(metaclass=ABCMeta):
             encountered (e.g. no route found). If False, processing will discontinue and raise an error. Default False.
         :type skip_api_error: bool
 
+        :param cache: A cache for the parsed responses, e.g. :class:`routingpy.cache.MemoryCache`. Can be shared
+            between routers. Default no caching.
+        :type cache: routingpy.cache.BaseCache
+
+        :param coalesce: If True, identical requests sent while one is in flight wait for its response instead
+            of sending their own. Pass a :class:`routingpy.coalesce.SingleFlight` to coalesce across several
+            clients. Default False.
+        :type coalesce: bool or routingpy.coalesce.SingleFlight
+
+        :param json_backend: Name of the JSON library to decode responses and encode request bodies with, e.g.
+            "orjson". Default :attr:`options.default_json_backend`.
+        :type json_backend: str
+
+        :param rate_limit: Paces the requests to the provider's quota. A :class:`routingpy.ratelimit.RateLimiter`,
+            which may be shared with other clients, or the maximum number of requests per second of this client.
+            Default the limiter registered for the base URL with :func:`routingpy.ratelimit.set_rate_limit`, if any.
+        :type rate_limit: routingpy.ratelimit.RateLimiter or int or float
+
+        :param retry_policy: Which failed requests are retried and how. Default
+            :attr:`options.default_retry_policy`.
+        :type retry_policy: routingpy.retry.RetryPolicy
+
+        :param circuit_breaker: Lets requests fail fast while the provider is down. A
+            :class:`routingpy.circuit.CircuitBreaker`, or True for the one shared by all clients of the same base URL.
+            Default the breaker registered for the base URL with :func:`routingpy.circuit.set_circuit_breaker`, if any.
+        :type circuit_breaker: routingpy.circuit.CircuitBreaker or bool
+
+        :param balancing: The strategy to balance the requests between a list of base URLs, one of
+            :data:`routingpy.balancer.STRATEGIES`. Default "round_robin".
+        :type balancing: str
+
         :param **kwargs: Additional keyword arguments.
         :type **kwargs: dict
         """
+        if isinstance(base_url, (list, tuple)):
+            base_url = EndpointPool(base_url, strategy=balancing or "round_robin")
+        if isinstance(base_url, EndpointPool):
+            self.endpoint_pool = base_url
+            # Identifies the provider for caching, rate limiting etc., the replicas serve the same responses
+            base_url = base_url.urls[0]
+        else:
+            self.endpoint_pool = None
+
         self.base_url = base_url
 
         self.retry_over_query_limit = (
@@ -148,10 +245,163 @@ class BaseClient(metaclass=ABCMeta):
 
         self.timeout = timeout if timeout != DEFAULT else options.default_timeout
 
+        self.cache = cache
+
+        if coalesce is True:
+            coalesce = self._single_flight_class()
+        self.single_flight = coalesce or None
+
+        self.json_backend = get_json_backend(json_backend or options.default_json_backend)
+
+        if rate_limit is not None and not isinstance(rate_limit, RateLimiter):
+            rate_limit = RateLimiter(per_second=rate_limit)
+        self._rate_limiter = rate_limit
+        # Tracks the quota reported in response headers if there's no other limiter, see _update_rate_limit
+        self._quota_limiter = None
+
+        self.retry_policy = retry_policy or options.default_retry_policy or DEFAULT_RETRY_POLICY
+
+        if circuit_breaker is True:
+            circuit_breaker = get_circuit_breaker(base_url, create=True)
+        elif not isinstance(circuit_breaker, CircuitBreaker):
+            circuit_breaker = None
+        self._circuit_breaker = circuit_breaker
+
         self.kwargs = kwargs
 
         self._req = None
 
+    @property
+    def rate_limiter(self):
+        """The :class:`routingpy.ratelimit.RateLimiter` pacing this client's requests, or None."""
+        if self._rate_limiter is not None:
+            return self._rate_limiter
+
+        return get_rate_limiter(self.base_url) or self._quota_limiter
+
+    @property
+    def circuit_breaker(self):
+        """The :class:`routingpy.circuit.CircuitBreaker` guarding this client's requests, or None."""
+        if self._circuit_breaker is not None:
+            return self._circuit_breaker
+
+        return get_circuit_breaker(self.base_url)
+
+    def _record_attempt(self, circuit_breaker, endpoint, started, status_code=None, error=None):
+        """Reports an attempt's outcome to the circuit breaker and the endpoint pool. It failed if it raised
+        ``error`` or the server responded with HTTP 5xx. Attempts interrupted otherwise, e.g. cancelled, only
+        release the endpoint.
+
+        :param circuit_breaker: The client's circuit breaker, or None.
+        :type circuit_breaker: routingpy.circuit.CircuitBreaker
+
+        :param endpoint: The replica the attempt was sent to, or None without endpoint pool.
+        :type endpoint: routingpy.balancer.Endpoint
+
+        :param started: The :func:`time.monotonic` time the attempt was sent.
+        :type started: float
+
+        :param status_code: The HTTP status of the response, None if there was none.
+        :type status_code: int
+
+        :param error: The exception the attempt raised, if any.
+        :type error: Exception
+        """
+        failed = None
+        if error is not None:
+            failed = True
+        elif status_code is not None:
+            failed = status_code >= 500
+
+        if circuit_breaker is not None and failed is not None:
+            if failed:
+                circuit_breaker.record_failure()
+            else:
+                circuit_breaker.record_success()
+
+        if endpoint is not None:
+            self.endpoint_pool.release(endpoint, time.monotonic() - started, failed)
+
+    def _retry_deadline(self):
+        """Returns the time after the first attempt, after which requests aren't retried anymore.
+
+        :rtype: :class:`datetime.timedelta`
+        """
+        if self.retry_policy.deadline is None:
+            return self.retry_timeout
+
+        return timedelta(seconds=self.retry_policy.deadline)
+
+    def _retries_status(self, status_code, attempts):
+        """Whether a response with ``status_code`` is retried after ``attempts`` attempts.
+
+        :rtype: bool
+        """
+        if status_code == 429 and not self.retry_over_query_limit:
+            return False
+
+        return self.retry_policy.retries_status(status_code) and self.retry_policy.can_retry(attempts)
+
+    def _retries_exception(self, error, attempts):
+        """Whether the request is retried after ``error`` was raised in the ``attempts``-th attempt.
+
+        :rtype: bool
+        """
+        return self.retry_policy.retries_exception(error) and self.retry_policy.can_retry(attempts)
+
+    @staticmethod
+    def _warn_retry(reason, tried):
+        warnings.warn(
+            "{}.\nRetrying for the {}{} time.".format(reason, tried, get_ordinal(tried)), UserWarning
+        )
+
+    @staticmethod
+    def _status_reason(status_code):
+        if status_code == 429:
+            return "Rate limit exceeded"
+        if status_code == 503:
+            return "Server down"
+        return "Server responded with HTTP {}".format(status_code)
+
+    def _update_rate_limit(self, headers, status_code):
+        """Feeds the quota reported in a response's headers into the client's rate limiter. Without one, the
+        quota is kept in a limiter of this client only, nothing is registered for the base URL.
+
+        :param headers: The response headers.
+        :type headers: dict-like
+
+        :param status_code: The HTTP status of the response.
+        :type status_code: int
+
+        :returns: The seconds to wait before retrying the request, if the provider said so, else None.
+        :rtype: float or None
+        """
+        quota = parse_rate_limit_headers(headers)
+
+        retry_after = quota.retry_after
+        if (
+            retry_after is None
+            and self.retry_policy.retries_status(status_code)
+            and quota.reset is not None
+            and not quota.remaining
+        ):
+            # Mapbox only reports when the window resets
+            retry_after = quota.reset
+
+        if retry_after is None and (quota.remaining is None or quota.reset is None):
+            return None
+
+        rate_limiter = self.rate_limiter
+        if rate_limiter is None:
+            # Concurrent responses may each create one, which only loses the quota of the first one
+            rate_limiter = self._quota_limiter = RateLimiter()
+        if retry_after is not None:
+            rate_limiter.update_quota(0, retry_after)
+        else:
+            rate_limiter.update_quota(quota.remaining, quota.reset)
+
+        return retry_after
+
     @abstractmethod
     def _request(
         self,
@@ -161,6 +411,7 @@ class BaseClient(metaclass=ABCMeta):
         first_request_time=None,
         retry_counter=0,
         dry_run=None,
+        stream=None,
     ):
         """Performs HTTP GET/POST with credentials, returning the body as
         JSON.
@@ -184,6 +435,10 @@ class BaseClient(metaclass=ABCMeta):
         :param dry_run: If true, only prints URL and parameters. true or false.
         :type dry_run: bool
 
+        :param stream: If true, a JSON body is returned as a binary file-like object to be parsed incrementally,
+            instead of being decoded. Streamed responses are neither cached nor coalesced.
+        :type stream: bool
+
         :raises routingpy.exceptions.RouterApiError: when the API returns an error due to faulty configuration.
         :raises routingpy.exceptions.RouterServerError: when the API returns a server error.
         :raises routingpy.exceptions.RouterError: when anything else happened while requesting.
@@ -192,11 +447,67 @@ class BaseClient(metaclass=ABCMeta):
         :raises routingpy.exceptions.TransportError: when something went wrong while trying to
             execute a request.
 
-        :returns: raw JSON response.
-        :rtype: dict
+        :returns: raw JSON response, or a file-like object if streamed.
+        :rtype: dict or file-like
         """
         pass
 
+    def _parse(self, parser, response, *args, **kwargs):
+        """Hands the result of :meth:`_request` to a router's parsing function.
+
+        Synchronous clients simply call ``parser``. Clients whose ``_request`` returns an awaitable
+        override this method to defer parsing until the response was awaited.
+
+        :param parser: The router's parsing function, e.g. ``parse_direction_json``.
+        :type parser: callable
+
+        :param response: The return value of :meth:`_request`.
+        :type response: dict or bytes or None
+
+        :returns: The parsed routingpy object, e.g. a :class:`routingpy.direction.Direction`.
+        """
+        return parser(response, *args, **kwargs)
+
+    def _cache_key(self, authed_url, post_params=None, dry_run=None):
+        """Returns the key to look up the request in the client's cache or None if the cache is not used for it.
+
+        :param authed_url: The path and query string as returned by :meth:`_generate_auth_url`.
+        :type authed_url: string
+
+        :param post_params: HTTP POST parameters, which are canonicalized to be independent of the key order.
+        :type post_params: dict
+
+        :param dry_run: Dry runs are never cached.
+        :type dry_run: bool
+
+        :rtype: :class:`routingpy.cache.CacheKey` or None
+        """
+        if self.cache is None or dry_run or is_bypassed():
+            return None
+
+        return self._request_key(authed_url, post_params)
+
+    def _request_key(self, authed_url, post_params=None):
+        """Returns the key identifying a request, which is independent of the POST parameters' order.
+
+        :param authed_url: The path and query string as returned by :meth:`_generate_auth_url`.
+        :type authed_url: string
+
+        :param post_params: HTTP POST parameters.
+        :type post_params: dict
+
+        :rtype: :class:`routingpy.cache.CacheKey`
+        """
+        if post_params is None:
+            return CacheKey("GET", self.base_url, authed_url, None)
+
+        return CacheKey(
+            "POST",
+            self.base_url,
+            authed_url,
+            json.dumps(post_params, sort_keys=True, separators=(",", ":"), default=str),
+        )
+
     @staticmethod
     def _generate_auth_url(path, params):
         """Returns the path and query string portion of the request URL, first
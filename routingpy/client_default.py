@@ -17,16 +17,14 @@
 
 import copy
 import json
-import random
 import time
 import warnings
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import requests
 
 from . import exceptions
-from .client_base import _RETRIABLE_STATUSES, DEFAULT, BaseClient, options
-from .utils import get_ordinal
+from .client_base import _BINARY_CONTENT_TYPES, DEFAULT, BaseClient, options
 
 
 class Client(BaseClient):
@@ -40,12 +38,25 @@ class Client(BaseClient):
         retry_timeout=None,
         retry_over_query_limit=None,
         skip_api_error=None,
+        session=None,
+        pool_connections=None,
+        pool_maxsize=None,
+        pool_block=None,
+        keep_alive=None,
+        cache=None,
+        coalesce=None,
+        json_backend=None,
+        rate_limit=None,
+        retry_policy=None,
+        circuit_breaker=None,
+        balancing=None,
         **kwargs
     ):
         """
         :param base_url: The base URL for the request. All routers must provide a default.
-            Should not have a trailing slash.
-        :type base_url: string
+            Should not have a trailing slash. Pass a list of base URLs or a :class:`routingpy.balancer.EndpointPool`
+            to balance the requests between several replicas, whose statistics are in ``endpoint_pool.stats``.
+        :type base_url: string or list of str or routingpy.balancer.EndpointPool
 
         :param user_agent: User-Agent to send with the requests to routing API.
             Overrides ``options.default_user_agent``.
@@ -68,11 +79,62 @@ class Client(BaseClient):
             encountered (e.g. no route found). If False, processing will discontinue and raise an error. Default False.
         :type skip_api_error: bool
 
+        :param session: A session to send the requests with. Pass the same session to several routers to
+            share one connection pool between them, e.g. one created with :meth:`create_session`.
+            If specified, the pool arguments are ignored. Default a new session with its own connection pool.
+        :type session: requests.Session
+
+        :param pool_connections: Number of connection pools to cache, i.e. the number of different hosts to
+            keep connections to. Default :attr:`routingpy.routers.options.default_pool_connections`.
+        :type pool_connections: int
+
+        :param pool_maxsize: Maximum number of connections to keep open per host. Set this at least to the
+            number of threads requesting concurrently. Default :attr:`routingpy.routers.options.default_pool_maxsize`.
+        :type pool_maxsize: int
+
+        :param pool_block: Wait for a free connection when all connections to a host are in use, instead of
+            opening one which is discarded afterwards. Default :attr:`routingpy.routers.options.default_pool_block`.
+        :type pool_block: bool
+
+        :param keep_alive: Keep connections open and reuse them for subsequent requests. If False, the server
+            is asked to close the connection after each request. Default :attr:`routingpy.routers.options.default_keep_alive`.
+        :type keep_alive: bool
+
+        :param cache: A cache for the parsed responses, e.g. :class:`routingpy.cache.MemoryCache`. Can be shared
+            between routers. Use :func:`routingpy.cache.bypass_cache` to skip it for individual requests.
+            Default no caching.
+        :type cache: routingpy.cache.BaseCache
+
+        :param coalesce: If True, identical requests sent while one is in flight wait for its response instead
+            of sending their own. The number of collapsed requests is available in ``single_flight.stats``.
+            Pass a :class:`routingpy.coalesce.SingleFlight` to coalesce across several clients. Default False.
+        :type coalesce: bool or routingpy.coalesce.SingleFlight
+
+        :param rate_limit: Paces the requests to the provider's quota, also across retries. A
+            :class:`routingpy.ratelimit.RateLimiter`, which may be shared with other clients, or the maximum number
+            of requests per second of this client. Default the limiter registered for the base URL with
+            :func:`routingpy.ratelimit.set_rate_limit`, if any. The current wait is ``rate_limiter.wait_time``.
+        :type rate_limit: routingpy.ratelimit.RateLimiter or int or float
+
+        :param retry_policy: Which failed requests are retried, how often and with which backoff, e.g. to also
+            retry timeouts and dropped connections. Default :attr:`routingpy.routers.options.default_retry_policy`.
+        :type retry_policy: routingpy.retry.RetryPolicy
+
+        :param circuit_breaker: Lets requests fail fast with :class:`routingpy.exceptions.CircuitOpen` after repeated
+            failures, instead of retrying until ``retry_timeout``. A :class:`routingpy.circuit.CircuitBreaker`, or
+            True for the one shared by all clients of the same base URL. Default the breaker registered for the base
+            URL with :func:`routingpy.circuit.set_circuit_breaker`, if any. Its state is in ``circuit_breaker.stats``.
+        :type circuit_breaker: routingpy.circuit.CircuitBreaker or bool
+
+        :param balancing: The strategy to balance the requests between a list of base URLs: "round_robin",
+            "least_outstanding" or "latency". Default "round_robin".
+        :type balancing: str
+
         :param kwargs: Additional arguments, such as headers or proxies.
         :type kwargs: dict
         """
 
-        self._session = requests.Session()
+        self._session = session or self.create_session(pool_connections, pool_maxsize, pool_block)
         super(Client, self).__init__(
             base_url,
             user_agent=user_agent,
@@ -80,6 +142,13 @@ class Client(BaseClient):
             retry_timeout=retry_timeout,
             retry_over_query_limit=retry_over_query_limit,
             skip_api_error=skip_api_error,
+            cache=cache,
+            coalesce=coalesce,
+            json_backend=json_backend,
+            rate_limit=rate_limit,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+            balancing=balancing,
             **kwargs
         )
 
@@ -89,6 +158,10 @@ class Client(BaseClient):
         except KeyError:
             pass
 
+        keep_alive = keep_alive if keep_alive is not None else options.default_keep_alive
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+
         self.kwargs["headers"] = self.headers
         self.kwargs["timeout"] = self.timeout
 
@@ -104,6 +177,7 @@ class Client(BaseClient):
         first_request_time=None,
         retry_counter=0,
         dry_run=None,
+        stream=None,
     ):
         """Performs HTTP GET/POST with credentials, returning the body as
         JSON.
@@ -127,6 +201,10 @@ class Client(BaseClient):
         :param dry_run: If true, only prints URL and parameters. true or false.
         :type dry_run: bool
 
+        :param stream: If true, a JSON body is returned as a binary file-like object to be parsed incrementally,
+            instead of being decoded. Streamed responses are neither cached nor coalesced.
+        :type stream: bool
+
         :raises routingpy.exceptions.RouterApiError: when the API returns an error due to faulty configuration.
         :raises routingpy.exceptions.RouterServerError: when the API returns a server error.
         :raises routingpy.exceptions.RouterError: when anything else happened while requesting.
@@ -135,28 +213,18 @@ class Client(BaseClient):
         :raises routingpy.exceptions.TransportError: when something went wrong while trying to
             execute a request.
 
-        :returns: raw JSON response or GeoTIFF image
-        :rtype: dict or bytes
+        :returns: raw JSON response, GeoTIFF image or the file-like JSON body if streamed
+        :rtype: dict or bytes or file-like
         """
 
-        if not first_request_time:
-            first_request_time = datetime.now()
-
-        elapsed = datetime.now() - first_request_time
-        if elapsed > self.retry_timeout:
-            raise exceptions.Timeout()
-
-        if retry_counter > 0:
-            # 0.5 * (1.5 ^ i) is an increased sleep time of 1.5x per iteration,
-            # starting at 0.5s when retry_counter=1. The first retry will occur
-            # at 1, so subtract that first.
-            delay_seconds = 1.5 ** (retry_counter - 1)
-
-            # Jitter this value by 50% and pause.
-            time.sleep(delay_seconds * (random.random() + 0.5))
-
         authed_url = self._generate_auth_url(url, get_params)
 
+        cache_key = self._cache_key(authed_url, post_params, dry_run or stream)
+        if cache_key is not None and retry_counter == 0:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         final_requests_kwargs = copy.copy(self.kwargs)
 
         # Determine GET/POST.
@@ -178,66 +246,208 @@ class Client(BaseClient):
             )
             return
 
-        try:
-            response = requests_method(self.base_url + authed_url, **final_requests_kwargs)
-            self._req = response.request
-
-        except requests.exceptions.Timeout:
-            raise exceptions.Timeout()
+        if "json" in final_requests_kwargs:
+            # Encode with the client's JSON library, not the HTTP library's stdlib json
+            final_requests_kwargs["data"] = self.json_backend.dumps(final_requests_kwargs.pop("json"))
 
-        tried = retry_counter + 1
+        if stream:
+            final_requests_kwargs["stream"] = True
 
-        if response.status_code in _RETRIABLE_STATUSES:
-            # Retry request.
-            warnings.warn(
-                "Server down.\nRetrying for the {}{} time.".format(tried, get_ordinal(tried)),
-                UserWarning,
+        send_args = (
+            requests_method,
+            authed_url,
+            final_requests_kwargs,
+            first_request_time,
+            retry_counter,
+        )
+        if self.single_flight is not None and not stream:
+            body = self.single_flight.do(
+                self._request_key(authed_url, post_params), self._send, *send_args
             )
-            return self._request(url, get_params, post_params, first_request_time, retry_counter + 1)
+        else:
+            body = self._send(*send_args)
 
-        try:
-            return self._get_body(response)
+        if cache_key is not None and body is not None:
+            self.cache.set(cache_key, body)
 
-        except exceptions.RouterApiError:
-            if self.skip_api_error:
-                warnings.warn(
-                    "Router {} returned an API error with "
-                    "the following message:\n{}".format(self.__class__.__name__, response.text)
-                )
-                return
+        return body
 
-            raise
+    def _send(
+        self, requests_method, authed_url, requests_kwargs, first_request_time=None, retry_counter=0
+    ):
+        """Sends the request prepared by :meth:`_request` and retries it as the client's
+        :class:`routingpy.retry.RetryPolicy` says.
 
-        except exceptions.RetriableRequest as e:
-            if isinstance(e, exceptions.OverQueryLimit) and not self.retry_over_query_limit:
-                raise
+        :param requests_method: The session's method for the HTTP verb, e.g. ``self._session.get``.
+        :type requests_method: callable
 
-            warnings.warn(
-                "Rate limit exceeded.\nRetrying for the {}{} time.".format(tried, get_ordinal(tried)),
-                UserWarning,
-            )
-            # Retry request.
-            return self._request(url, get_params, post_params, first_request_time, retry_counter + 1)
+        :param authed_url: The path and query string as returned by :meth:`_generate_auth_url`.
+        :type authed_url: string
+
+        :param requests_kwargs: Keyword arguments for ``requests_method``.
+        :type requests_kwargs: dict
+
+        :param first_request_time: The time of the first request (None if no
+            retries have occurred).
+        :type first_request_time: :class:`datetime.datetime`
+
+        :param retry_counter: The number of this retry, or zero for first attempt.
+        :type retry_counter: int
+
+        :returns: raw JSON response, GeoTIFF image or the file-like JSON body if streamed, None for a skipped
+            API error
+        :rtype: dict or bytes or file-like or None
+        """
+        if not first_request_time:
+            first_request_time = datetime.now()
+
+        deadline = self._retry_deadline()
+        if self.retry_policy.attempt_timeout is not None:
+            requests_kwargs = dict(requests_kwargs, timeout=self.retry_policy.attempt_timeout)
+
+        retry_after = None
+        while True:
+            elapsed = datetime.now() - first_request_time
+            if elapsed > deadline:
+                raise exceptions.Timeout()
+
+            if retry_counter > 0:
+                delay = self.retry_policy.backoff(retry_counter)
+                # No point in waiting if the retry would be too late anyway
+                if (
+                    retry_after is not None
+                    and elapsed + timedelta(seconds=max(retry_after, delay)) > deadline
+                ):
+                    raise exceptions.Timeout()
+
+                # The rate limiter waits for the rest of a longer Retry-After, the backoff is the minimum also
+                # with "Retry-After: 0"
+                time.sleep(delay)
+
+            circuit_breaker = self.circuit_breaker
+            if circuit_breaker is not None:
+                circuit_breaker.allow()
+
+            rate_limiter = self.rate_limiter
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+
+            retry_counter += 1
+            retry_after = status_code = error = None
+            endpoint = self.endpoint_pool.acquire() if self.endpoint_pool is not None else None
+            started = time.monotonic()
+            try:
+                base_url = endpoint.url if endpoint is not None else self.base_url
+                response = requests_method(base_url + authed_url, **requests_kwargs)
+                self._req = response.request
+                status_code = response.status_code
+
+            except requests.exceptions.Timeout as e:
+                error = exceptions.Timeout()
+                error.__cause__ = e
+            except requests.exceptions.ConnectionError as e:
+                error = exceptions.TransportError(str(e))
+                error.__cause__ = e
+            finally:
+                self._record_attempt(circuit_breaker, endpoint, started, status_code, error)
+
+            if error is not None:
+                if not self._retries_exception(error, retry_counter):
+                    raise error
+
+                self._warn_retry("Request failed with {!r}".format(error), retry_counter)
+                continue
+
+            retry_after = self._update_rate_limit(response.headers, response.status_code)
+
+            if self._retries_status(response.status_code, retry_counter):
+                # Release the connection of an unread streamed response
+                response.close()
+                self._warn_retry(self._status_reason(response.status_code), retry_counter)
+                continue
+
+            try:
+                return self._get_body(response, stream=requests_kwargs.get("stream"))
+
+            except (exceptions.RouterError, exceptions.JSONParseError) as e:
+                if isinstance(e, exceptions.RouterApiError) and self.skip_api_error:
+                    warnings.warn(
+                        "Router {} returned an API error with "
+                        "the following message:\n{}".format(self.__class__.__name__, response.text)
+                    )
+                    return
+
+                if not self._retries_exception(e, retry_counter):
+                    raise
+
+                self._warn_retry("Request failed with {!r}".format(e), retry_counter)
 
     @property
     def req(self):
         """Holds the :class:`requests.PreparedRequest` property for the last request."""
         return self._req
 
+    @property
+    def session(self):
+        """The :class:`requests.Session` holding the connection pool, which can be passed on to other routers."""
+        return self._session
+
     @staticmethod
-    def _get_body(response):
+    def create_session(pool_connections=None, pool_maxsize=None, pool_block=None):
+        """
+        Creates a :class:`requests.Session` with a configured connection pool, which can be shared by several routers:
+
+        >>> from routingpy import OSRM, Valhalla
+        >>> from routingpy.client_default import Client
+        >>> session = Client.create_session(pool_maxsize=50)
+        >>> osrm = OSRM("http://localhost:5000", session=session)
+        >>> valhalla = Valhalla("http://localhost:8002", session=session)
+
+        :param pool_connections: Number of connection pools to cache, i.e. the number of different hosts to
+            keep connections to. Default :attr:`routingpy.routers.options.default_pool_connections`.
+        :type pool_connections: int
+
+        :param pool_maxsize: Maximum number of connections to keep open per host.
+            Default :attr:`routingpy.routers.options.default_pool_maxsize`.
+        :type pool_maxsize: int
+
+        :param pool_block: Wait for a free connection when all connections to a host are in use.
+            Default :attr:`routingpy.routers.options.default_pool_block`.
+        :type pool_block: bool
+
+        :rtype: requests.Session
+        """
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections or options.default_pool_connections,
+            pool_maxsize=pool_maxsize or options.default_pool_maxsize,
+            pool_block=pool_block if pool_block is not None else options.default_pool_block,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+    def _get_body(self, response, stream=False):
         status_code = response.status_code
         content_type = response.headers["content-type"]
 
         if status_code == 200:
-            if content_type == "image/tiff":
+            # Strip parameters like OSRM's "application/x-flatbuffers;schema=..."
+            if content_type.split(";")[0].strip() in _BINARY_CONTENT_TYPES:
                 return response.content
 
+            elif stream:
+                # Undo gzip etc. while reading, the connection is released once everything was read
+                response.raw.decode_content = True
+                return response.raw
+
             else:
                 try:
-                    return response.json()
+                    return self.json_backend.loads(response.content)
 
-                except json.decoder.JSONDecodeError:
+                except ValueError:
                     raise exceptions.JSONParseError(
                         "Can't decode JSON response:{}".format(response.text)
                     )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Coalescing of identical concurrent requests ("single flight"): while a request is in flight, identical
+requests wait for its response instead of sending their own.
+
+Example:
+
+>>> from routingpy import Valhalla
+>>> router = Valhalla("http://localhost:8002", coalesce=True)
+>>> # ... the same matrix requested from many threads at once ...
+>>> print(router.client.single_flight.stats)
+{'calls': 1, 'coalesced': 49, 'in_flight': 0}
+"""
+import asyncio
+import threading
+
+
+class _BaseSingleFlight(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @property
+    def stats(self):
+        """The number of upstream calls, the number of requests which were collapsed into another one's call
+        and the number of calls currently in flight.
+
+        :rtype: dict
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+class _Call(object):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_BaseSingleFlight):
+    """
+    Thread-safe request coalescing for :class:`routingpy.client_default.Client`. Can be shared by several
+    clients, requests are only collapsed if they go to the same base URL.
+
+    All waiting callers receive the very same response object, or the same exception, as the caller which
+    sent the request.
+    """
+
+    def do(self, key, func, *args, **kwargs):
+        """Calls ``func`` unless a call with the same ``key`` is in flight, whose result is returned then.
+
+        :param key: Identifies the request, e.g. a :class:`routingpy.cache.CacheKey`.
+        :type key: hashable
+
+        :param func: The function sending the request.
+        :type func: callable
+
+        :returns: The return value of ``func``.
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+        return call.result
+
+
+class _AsyncCall(object):
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight(_BaseSingleFlight):
+    """
+    Request coalescing for :class:`routingpy.client_async.AsyncClient`, for requests from the same event loop.
+    """
+
+    async def do(self, key, func, *args, **kwargs):
+        """Awaits ``func`` unless a call with the same ``key`` is in flight, whose result is returned then.
+
+        The call runs as task of its own: a cancelled caller only stops waiting for it, the others still receive
+        its result. Only once all callers are cancelled, the call is cancelled too.
+
+        :param key: Identifies the request, e.g. a :class:`routingpy.cache.CacheKey`.
+        :type key: hashable
+
+        :param func: The coroutine function sending the request.
+        :type func: callable
+
+        :returns: The return value of ``func``.
+        """
+        call = self._in_flight.get(key)
+        if call is None:
+            call = self._in_flight[key] = _AsyncCall(asyncio.ensure_future(func(*args, **kwargs)))
+            call.task.add_done_callback(lambda task: self._done(key, call))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+
+    def _done(self, key, call):
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+        if not call.task.cancelled():
+            # Mark as retrieved, there may be nobody left waiting
+            call.task.exception()
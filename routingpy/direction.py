@@ -19,6 +19,9 @@
 """
 from typing import List, Optional
 
+from .geometry import convert_geometry
+from .utils import EncodedPolyline
+
 
 class Directions(object):
     """
@@ -69,8 +72,9 @@ class Direction(object):
         """
         Initialize a :class:`Direction` object to hold the properties of a directions request.
 
-        :param geometry: The geometry list in [[lon1, lat1], [lon2, lat2]] order.
-        :type geometry: list of list
+        :param geometry: The geometry list in [[lon1, lat1], [lon2, lat2]] order, or the encoded geometry which is
+            decoded on first access of :attr:`geometry`.
+        :type geometry: list of list or :class:`routingpy.utils.EncodedPolyline`
 
         :param duration: The duration of the direction in seconds.
         :type duration: int or float
@@ -82,7 +86,10 @@ class Direction(object):
             response.
         :type raw: dict
         """
-        self._geometry = geometry
+        # Encoded geometries are converted on first access
+        self._geometry = (
+            geometry if isinstance(geometry, EncodedPolyline) else convert_geometry(geometry)
+        )
         self._duration = duration
         self._distance = distance
         self._raw = raw
@@ -92,8 +99,12 @@ class Direction(object):
         """
         The geometry of the route as [[lon1, lat1], [lon2, lat2], ...] list.
 
-        :rtype: list or None
+        :rtype: list or :class:`routingpy.geometry.Geometry` or None
         """
+        # Most callers only need duration and distance, so decode on demand
+        if isinstance(self._geometry, EncodedPolyline):
+            self._geometry = convert_geometry(self._geometry)
+
         return self._geometry
 
     @property
@@ -125,3 +136,96 @@ class Direction(object):
 
     def __repr__(self):  # pragma: no cover
         return "Direction({}, {}, {})".format(self.geometry, self.duration, self.distance)
+
+
+class ChunkedDirection(Direction):
+    """
+    Contains a route merged from several requests, each covering a section of the locations. Access via properties
+    ``geometry``, ``duration``, ``distance``, ``legs`` and ``chunks``.
+    """
+
+    def __init__(self, chunks=None, route_legs=None):
+        """
+        Initialize a :class:`ChunkedDirection` from the sections' routes.
+
+        :param chunks: The routes of consecutive sections, each starting where the previous one ended.
+        :type chunks: list of :class:`Direction`
+
+        :param route_legs: Returns the legs of a section's raw response, or None if the router has no legs.
+        :type route_legs: callable
+        """
+        self._chunks = chunks or []
+        durations = [chunk.duration for chunk in self._chunks]
+        distances = [chunk.distance for chunk in self._chunks]
+        super(ChunkedDirection, self).__init__(
+            duration=None if None in durations else sum(durations),
+            distance=None if None in distances else sum(distances),
+            raw=[chunk.raw for chunk in self._chunks],
+        )
+        self._route_legs = route_legs
+        self._merged = False
+
+    @property
+    def geometry(self) -> Optional[List[List[float]]]:
+        """
+        The geometry of the complete route as [[lon1, lat1], [lon2, lat2], ...] list. None if a section has no
+        geometry.
+
+        :rtype: list or :class:`routingpy.geometry.Geometry` or None
+        """
+        # Decoding and concatenating is deferred like for a single route
+        if not self._merged:
+            geometries = [chunk.geometry for chunk in self._chunks]
+            if None not in geometries:
+                merged = []
+                for geometry in geometries:
+                    # The sections meet at the shared location
+                    skip = bool(merged) and len(geometry) > 0 and list(geometry[0]) == list(merged[-1])
+                    merged.extend(geometry[1:] if skip else geometry)
+                self._geometry = convert_geometry(merged)
+            self._merged = True
+
+        return self._geometry
+
+    @property
+    def legs(self) -> Optional[list]:
+        """
+        The raw legs of all sections in order of visit, i.e. one per pair of consecutive locations. None if the router's
+        responses have no legs.
+
+        :rtype: list or None
+        """
+        if self._route_legs is None:
+            return None
+
+        legs = []
+        for chunk in self._chunks:
+            chunk_legs = self._route_legs(chunk.raw) if chunk.raw is not None else None
+            if chunk_legs is None:
+                return None
+            legs.extend(chunk_legs)
+
+        return legs
+
+    @property
+    def chunks(self) -> List[Direction]:
+        """
+        The routes of the sections the route was merged from.
+
+        :rtype: list of :class:`Direction`
+        """
+        return self._chunks
+
+    @property
+    def raw(self) -> List[Optional[dict]]:
+        """
+        Returns the sections' raw, unparsed responses in order of visit.
+
+        :rtype: list
+        """
+        return self._raw
+
+    def __repr__(self):  # pragma: no cover
+        return "ChunkedDirection({}, {}, {}, chunks={})".format(
+            self.geometry, self.duration, self.distance, len(self._chunks)
+        )
@@ -51,6 +51,22 @@ class Timeout(Exception):  # pragma: no cover
     pass
 
 
+class TransportError(Exception):  # pragma: no cover
+    """Something went wrong while trying to execute the request, e.g. the connection was refused or dropped."""
+
+    pass
+
+
+class CircuitOpen(Exception):  # pragma: no cover
+    """The provider's circuit breaker is open after repeated failures, the request was not sent."""
+
+    def __init__(self, retry_in=None):
+        self.retry_in = retry_in
+
+    def __str__(self):
+        return "Circuit open, next trial request in {:.1f} seconds".format(self.retry_in or 0)
+
+
 class JSONParseError(Exception):  # pragma: no cover
     """The Json response can't be parsed.."""
 
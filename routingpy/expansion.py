@@ -19,6 +19,8 @@
 """
 from typing import List, Optional, Tuple, Union
 
+from .geometry import convert_geometry
+
 
 class Edge:
     """
@@ -29,7 +31,7 @@ class Edge:
     def __init__(
         self, geometry=None, distances=None, durations=None, costs=None, edge_ids=None, statuses=None
     ):
-        self._geometry = geometry
+        self._geometry = convert_geometry(geometry)
         self._distance = distances
         self._duration = durations
         self._cost = costs
@@ -41,7 +43,7 @@ class Edge:
         """
         The geometry of the edge as [[lon1, lat1], [lon2, lat2]] list.
 
-        :rtype: list or None
+        :rtype: list or :class:`routingpy.geometry.Geometry` or None
         """
         return self._geometry
 
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+:class:`Geometry` holds coordinates compactly in one contiguous float64 buffer, 16 or 24 bytes per coordinate
+instead of a Python list with a tuple of floats per coordinate.
+
+Set :attr:`routingpy.routers.options.default_geometry_backend` to "array" to get the geometries of all parsed
+responses as :class:`Geometry`:
+
+>>> from routingpy import OSRM
+>>> from routingpy.routers import options
+>>> options.default_geometry_backend = "array"
+>>> route = OSRM().directions([[13.39, 52.51], [13.42, 52.5]])
+>>> import numpy as np
+>>> np.asarray(route.geometry).dtype
+dtype('float64')
+"""
+from array import array
+from itertools import chain
+
+from . import utils
+from .client_base import options
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: The supported containers for geometries: lists of coordinates or :class:`Geometry`.
+GEOMETRY_BACKENDS = ("list", "array")
+
+
+class Geometry(object):
+    """
+    A sequence of 2- or 3-dimensional coordinates backed by a contiguous float64 buffer of shape (N, 2) or (N, 3).
+
+    It behaves like the list of coordinates it replaces: ``len()``, indexing and iteration return coordinates
+    as tuples, and it compares equal to a list of the same coordinates. Slices share the buffer.
+
+    :func:`numpy.asarray` returns a view of the buffer without copying. It also supports the buffer protocol,
+    i.e. ``memoryview(geometry)``, on Python 3.12+; on older versions use :attr:`buffer`.
+    """
+
+    __slots__ = ("_data", "_dims")
+
+    def __init__(self, coordinates=(), dims=None):
+        """
+        :param coordinates: The coordinates as sequence of [lon, lat] or [lon, lat, z] or as array of shape (N, 2)
+            or (N, 3). Arrays of float64 aren't copied.
+        :type coordinates: list of list or numpy.ndarray or Geometry
+
+        :param dims: The number of components per coordinate, only needed for empty geometries. Default 2.
+        :type dims: int
+
+        :raises ValueError: if the coordinates don't all have the same number of components, 2 or 3.
+        """
+        if isinstance(coordinates, Geometry):
+            data, dims = coordinates._data, coordinates._dims
+        elif np is not None and isinstance(coordinates, np.ndarray):
+            coordinates = np.ascontiguousarray(coordinates, dtype=np.float64)
+            if coordinates.ndim != 2:
+                raise ValueError(
+                    "Coordinate arrays must have 2 dimensions, not {}.".format(coordinates.ndim)
+                )
+            data, dims = memoryview(coordinates.reshape(-1)), coordinates.shape[1]
+        else:
+            if not isinstance(coordinates, (list, tuple)):
+                coordinates = list(coordinates)
+            dims = len(coordinates[0]) if coordinates else dims or 2
+            data = array("d", chain.from_iterable(coordinates))
+            if len(data) != len(coordinates) * dims:
+                raise ValueError("All coordinates must have {} components.".format(dims))
+            data = memoryview(data)
+
+        if dims not in (2, 3):
+            raise ValueError("Coordinates must have 2 or 3 components, not {}.".format(dims))
+
+        self._data = data
+        self._dims = dims
+
+    @classmethod
+    def _from_buffer(cls, data, dims):
+        geometry = cls.__new__(cls)
+        geometry._data = data
+        geometry._dims = dims
+        return geometry
+
+    @classmethod
+    def from_polyline(cls, polyline, precision=5, is3d=False, order="lnglat"):
+        """
+        Decodes encoded polylines straight into a :class:`Geometry`, with numpy if installed.
+
+        :param polyline: One or more encoded polylines, whose coordinates are concatenated.
+        :type polyline: str or list of str or :class:`routingpy.utils.EncodedPolyline`
+
+        :param precision: The precision the polylines were encoded with, 5 or 6. Default 5.
+        :type precision: int
+
+        :param is3d: Specifies if the polylines contain a Z component. Default False.
+        :type is3d: bool
+
+        :param order: Specifies the order of the coordinates. Options: latlng, lnglat. Defaults to 'lnglat'.
+        :type order: str
+
+        :rtype: :class:`Geometry`
+        """
+        if not isinstance(polyline, utils.EncodedPolyline):
+            polyline = utils.EncodedPolyline(polyline, precision, is3d, order)
+
+        dims = 3 if polyline.is3d else 2
+        utils._check_order(polyline.order)
+        if np is None:  # pragma: no cover
+            return cls(polyline.decode(), dims)
+
+        parts = []
+        for expression in polyline.polylines:
+            columns = None
+            if len(expression) >= utils.VECTORIZE_MIN_LENGTH:
+                columns = utils._decode_columns(
+                    expression, polyline.precision, polyline.is3d, polyline.order
+                )
+            if columns is not None:
+                parts.append(np.column_stack(columns))
+            elif expression:
+                decoded = utils._decode(expression, polyline.precision, polyline.is3d, polyline.order)
+                parts.append(np.array(decoded, dtype=np.float64))
+
+        if not parts:
+            return cls((), dims)
+
+        return cls(np.concatenate(parts) if len(parts) > 1 else parts[0])
+
+    @property
+    def dims(self) -> int:
+        """
+        The number of components per coordinate, 2 or 3.
+
+        :rtype: int
+        """
+        return self._dims
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The size of the coordinate buffer in bytes.
+
+        :rtype: int
+        """
+        return self._data.nbytes
+
+    @property
+    def buffer(self) -> memoryview:
+        """
+        A memoryview of the coordinates with shape (N, dims), without copying. Flat for empty geometries.
+
+        :rtype: memoryview
+        """
+        if not len(self._data):
+            return self._data
+
+        return self._data.cast("B").cast("d", (len(self), self._dims))
+
+    def __buffer__(self, flags):
+        return self.buffer
+
+    def __array__(self, dtype=None, copy=None):
+        coordinates = np.frombuffer(self._data, dtype=np.float64).reshape(-1, self._dims)
+        if dtype is not None:
+            coordinates = coordinates.astype(dtype, copy=False)
+
+        return coordinates
+
+    def tolist(self):
+        """
+        The coordinates as list of lists.
+
+        :rtype: list of list
+        """
+        return [list(coordinate) for coordinate in self]
+
+    def __len__(self):
+        return len(self._data) // self._dims
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                return self._from_buffer(self._data[start * self._dims : stop * self._dims], self._dims)
+            return Geometry([self[i] for i in range(start, stop, step)], self._dims)
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("Geometry index out of range")
+
+        return tuple(self._data[index * self._dims : (index + 1) * self._dims])
+
+    def __iter__(self):
+        values = iter(self._data.tolist())
+        return zip(*[values] * self._dims)
+
+    def __eq__(self, other):
+        if isinstance(other, Geometry):
+            return self._dims == other._dims and self._data == other._data
+        try:
+            return len(self) == len(other) and all(
+                coordinate == tuple(other_coordinate)
+                for coordinate, other_coordinate in zip(self, other)
+            )
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return _from_bytes, (self._data.tobytes(), self._dims)
+
+    def __repr__(self):  # pragma: no cover
+        return "Geometry({})".format(self.tolist())
+
+
+def _from_bytes(data, dims):
+    values = array("d")
+    values.frombytes(data)
+    return Geometry._from_buffer(memoryview(values), dims)
+
+
+def convert_geometry(geometry, backend=None):
+    """
+    Converts a parsed geometry to the configured container.
+
+    :param geometry: A list of coordinates, nested lists of them, e.g. polygon rings, or an encoded polyline.
+    :type geometry: list or :class:`routingpy.utils.EncodedPolyline` or :class:`Geometry`
+
+    :param backend: One of :data:`GEOMETRY_BACKENDS`. Default
+        :attr:`routingpy.routers.options.default_geometry_backend`, or "list" if that's None.
+    :type backend: str
+
+    :raises ValueError: if the backend is unknown.
+
+    :returns: For "list" the geometry as is, for "array" :class:`Geometry` or nested lists of them.
+    """
+    backend = backend or options.default_geometry_backend or "list"
+    if backend not in GEOMETRY_BACKENDS:
+        raise ValueError(
+            "Unknown geometry backend '{}', must be one of {}.".format(
+                backend, ", ".join(GEOMETRY_BACKENDS)
+            )
+        )
+
+    if isinstance(geometry, utils.EncodedPolyline):
+        return Geometry.from_polyline(geometry) if backend == "array" else geometry.decode()
+
+    if backend == "list" or geometry is None or isinstance(geometry, Geometry):
+        return geometry
+
+    return _to_geometry(geometry)
+
+
+def _to_geometry(coordinates):
+    if not coordinates:
+        return Geometry()
+
+    first = coordinates[0]
+    # A single point
+    if isinstance(first, (int, float)):
+        return coordinates
+    # A list of points
+    if isinstance(first[0], (int, float)):
+        return Geometry(coordinates)
+    # Nested lists of points, e.g. polygon rings
+    return [_to_geometry(child) for child in coordinates]
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Caching of OSRM's waypoint hints. A hint sent along with a coordinate lets the server skip the nearest-edge
+lookup for it, so repeatedly routing from and to the same places gets cheaper.
+
+Example:
+
+>>> from routingpy import OSRM
+>>> from routingpy.hints import HintCache
+>>> router = OSRM("http://localhost:5000", hint_cache=HintCache())
+>>> route = router.directions(locations=[[8.5, 47.3], [8.6, 47.4]])
+>>> route = router.directions(locations=[[8.5, 47.3], [8.6, 47.4]])  # sends the hints of the first request
+>>> print(router.hint_cache.stats)
+{'hits': 2, 'misses': 2, 'invalidations': 0, 'size': 2}
+"""
+import threading
+from collections import OrderedDict
+
+
+class HintCache(object):
+    """
+    Thread-safe LRU cache of OSRM hints, keyed by profile and coordinate rounded to ``precision`` decimals.
+
+    Hints are only valid for the dataset they were generated from. When a response reports another non-empty
+    ``data_version`` than before for a profile, all hints of that profile are dropped.
+    """
+
+    def __init__(self, maxsize=100000, precision=5):
+        """
+        :param maxsize: Maximum number of hints. The least recently used one is evicted beyond. Default 100000.
+        :type maxsize: int
+
+        :param precision: Number of decimals coordinates are rounded to. OSRM rejects hints for coordinates which
+            moved by more than about a meter, i.e. more than 5 decimals. Default 5.
+        :type precision: int
+        """
+        self.maxsize = maxsize
+        self.precision = precision
+        self._hints = OrderedDict()
+        self._data_versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, profile, location):
+        return (
+            profile,
+            round(float(location[0]), self.precision),
+            round(float(location[1]), self.precision),
+        )
+
+    def get(self, profile, locations):
+        """Returns the known hints for the locations.
+
+        :param profile: The profile the hints were generated with.
+        :type profile: str
+
+        :param locations: The coordinates in [lon, lat] order.
+        :type locations: list of list
+
+        :returns: One hint per location, None where none is known.
+        :rtype: list of str
+        """
+        keys = [self._key(profile, location) for location in locations]
+        hints = []
+        with self._lock:
+            for key in keys:
+                hint = self._hints.get(key)
+                if hint is not None:
+                    self._hints.move_to_end(key)
+                hints.append(hint)
+
+            found = len(hints) - hints.count(None)
+            self.hits += found
+            self.misses += len(hints) - found
+
+        return hints
+
+    def update(self, profile, locations, response, sources=None, destinations=None):
+        """Stores the hints of an OSRM route or table response.
+
+        :param profile: The profile the request was made with.
+        :type profile: str
+
+        :param locations: The request's coordinates in [lon, lat] order.
+        :type locations: list of list
+
+        :param response: The parsed JSON response.
+        :type response: dict
+
+        :param sources: For table responses, the indices of the locations used as sources. Default all.
+        :type sources: list of int
+
+        :param destinations: For table responses, the indices of the locations used as destinations. Default all.
+        :type destinations: list of int
+        """
+        # Route responses list all locations as waypoints, table responses the sources and destinations
+        snapped = []
+        if "waypoints" in response:
+            snapped.append((range(len(locations)), response["waypoints"]))
+        for name, indices in (("sources", sources), ("destinations", destinations)):
+            if name in response:
+                snapped.append((indices or range(len(locations)), response[name]))
+
+        with self._lock:
+            # Responses without a data_version, e.g. from servers not configured to report one, keep the hints
+            data_version = response.get("data_version")
+            if data_version:
+                if self._data_versions.get(profile, data_version) != data_version:
+                    stale = [key for key in self._hints if key[0] == profile]
+                    for key in stale:
+                        del self._hints[key]
+                    self.invalidations += 1
+                self._data_versions[profile] = data_version
+
+            for indices, waypoints in snapped:
+                for idx, waypoint in zip(indices, waypoints):
+                    hint = waypoint.get("hint") if waypoint else None
+                    if hint:
+                        key = self._key(profile, locations[idx])
+                        self._hints[key] = hint
+                        self._hints.move_to_end(key)
+
+            while len(self._hints) > self.maxsize:
+                self._hints.popitem(last=False)
+
+    def clear(self):
+        """Removes all hints."""
+        with self._lock:
+            self._hints.clear()
+            self._data_versions.clear()
+
+    def __len__(self):
+        return len(self._hints)
+
+    @property
+    def stats(self):
+        """The number of locations sent with and without a hint, the number of times the hints of a profile were
+        dropped for a new ``data_version`` and the current number of hints.
+
+        :rtype: dict
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self),
+        }
@@ -19,6 +19,8 @@
 """
 from typing import List, Optional, Tuple, Union
 
+from .geometry import convert_geometry
+
 
 class Isochrones(object):
     """
@@ -58,7 +60,7 @@ class Isochrone(object):
     """
 
     def __init__(self, geometry=None, interval=None, center=None, interval_type=None):
-        self._geometry = geometry
+        self._geometry = convert_geometry(geometry)
         self._interval = int(interval)
         self._center = center
         self._interval_type = interval_type
@@ -68,7 +70,7 @@ class Isochrone(object):
         """
         The geometry of the isochrone as [[lon1, lat1], [lon2, lat2], ...] list.
 
-        :rtype: list or None
+        :rtype: list or :class:`routingpy.geometry.Geometry` or None
         """
         return self._geometry
 
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+JSON libraries the clients can decode responses and encode request bodies with. By default the fastest
+installed one is used, e.g. after ``pip install routingpy[speedups]``:
+
+>>> from routingpy.json_backend import get_json_backend
+>>> get_json_backend().name
+'orjson'
+
+A specific library can be chosen per client with ``json_backend`` or for all clients with
+:attr:`routingpy.routers.options.default_json_backend`.
+"""
+import json
+from collections import namedtuple
+
+JSONBackend = namedtuple("JSONBackend", ["name", "loads", "dumps"])
+JSONBackend.__doc__ = """A JSON library. ``loads`` takes bytes or str and raises a :class:`ValueError` for
+invalid JSON, ``dumps`` returns UTF-8 encoded bytes."""
+
+#: The supported libraries, fastest first.
+BACKENDS = ("orjson", "ujson", "simdjson", "json")
+
+
+def _load_orjson():
+    import orjson
+
+    def dumps(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            # E.g. float subclasses or integers beyond 64 bit
+            return _load_json().dumps(obj)
+
+    return JSONBackend("orjson", orjson.loads, dumps)
+
+
+def _load_ujson():
+    import ujson
+
+    def dumps(obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode("utf-8")
+
+    return JSONBackend("ujson", ujson.loads, dumps)
+
+
+def _load_simdjson():
+    import simdjson
+
+    # simdjson only speeds up parsing
+    return JSONBackend("simdjson", simdjson.loads, _load_json().dumps)
+
+
+def _load_json():
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    return JSONBackend("json", json.loads, dumps)
+
+
+_LOADERS = {
+    "orjson": _load_orjson,
+    "ujson": _load_ujson,
+    "simdjson": _load_simdjson,
+    "json": _load_json,
+}
+_loaded = {}
+
+
+def get_json_backend(name=None):
+    """
+    Returns a JSON library by name or the fastest installed one.
+
+    :param name: One of :data:`BACKENDS`. None picks the first installed one in that order.
+    :type name: str
+
+    :raises ValueError: if the name is unknown.
+    :raises ImportError: if the requested library isn't installed.
+
+    :rtype: :class:`JSONBackend`
+    """
+    if name is None:
+        for candidate in BACKENDS:
+            try:
+                return get_json_backend(candidate)
+            except ImportError:
+                continue
+
+    if name not in _LOADERS:
+        raise ValueError(
+            "Unknown JSON backend '{}', must be one of {}.".format(name, ", ".join(BACKENDS))
+        )
+
+    if name not in _loaded:
+        _loaded[name] = _LOADERS[name]()
+
+    return _loaded[name]
@@ -17,15 +17,73 @@
 """
 :class:`Matrix` returns matrix results.
 """
+import copy
+from collections import namedtuple
 from typing import List, Optional
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: The dtype of array-backed matrices, 4 bytes per cell.
+DEFAULT_DTYPE = "float32"
+
+ARRAY_BACKENDS = ("list", "numpy")
+
+
+def to_array(values, dtype=DEFAULT_DTYPE):
+    """
+    Converts a matrix to a contiguous 2-dimensional :class:`numpy.ndarray`, with NaN for missing values.
+
+    :param values: The matrix as list of rows, which may also be arrays, or as array.
+    :type values: list or numpy.ndarray
+
+    :param dtype: The array's floating point type. Default "float32".
+    :type dtype: str or numpy.dtype
+
+    :rtype: numpy.ndarray or None
+    """
+    if values is None:
+        return None
+
+    if np is None:  # pragma: no cover
+        raise ImportError(
+            "Array-backed matrices require numpy, install it with 'pip install routingpy[numpy]'."
+        )
+
+    # None becomes NaN for floating point types, arrays of the right type are kept as they are
+    return np.ascontiguousarray(np.asarray(values, dtype=dtype))
+
+
+def _empty_like(values, n_rows, n_cols):
+    """Returns an empty matrix of the given size with the same backend as ``values``."""
+    if isinstance(values, list):
+        return [[None] * n_cols for _ in range(n_rows)]
+
+    return np.full((n_rows, n_cols), np.nan, dtype=values.dtype)
+
 
 class Matrix(object):
     """
     Contains a parsed matrix response. Access via properties ``geometry`` and ``raw``.
     """
 
-    def __init__(self, durations=None, distances=None, raw=None):
+    def __init__(self, durations=None, distances=None, raw=None, array_backend=None):
+        """
+        :param array_backend: "numpy" to store the matrices as :class:`numpy.ndarray` of :data:`DEFAULT_DTYPE`.
+            Default nested lists.
+        :type array_backend: str
+        """
+        if array_backend not in (None,) + ARRAY_BACKENDS:
+            raise ValueError(
+                "Unknown array backend '{}', must be one of {}.".format(
+                    array_backend, ", ".join(ARRAY_BACKENDS)
+                )
+            )
+        if array_backend == "numpy":
+            durations, distances = to_array(durations), to_array(distances)
+
         self._durations = durations
         self._distances = distances
         self._raw = raw
@@ -51,7 +109,9 @@ class Matrix(object):
                 ...
             ]
 
-        :rtype: list or None
+        An array of shape (sources, destinations) for array-backed matrices, with NaN for missing values.
+
+        :rtype: list or numpy.ndarray or None
         """
         return self._durations
 
@@ -76,7 +136,9 @@ class Matrix(object):
                 ...
             ]
 
-        :rtype: list or None
+        An array of shape (sources, destinations) for array-backed matrices, with NaN for missing values.
+
+        :rtype: list or numpy.ndarray or None
         """
         return self._distances
 
@@ -89,5 +151,75 @@ class Matrix(object):
         """
         return self._raw
 
+    def as_numpy(self, dtype=DEFAULT_DTYPE):
+        """
+        Returns the matrix with durations and distances as contiguous :class:`numpy.ndarray`, with NaN for missing
+        values. Requires numpy.
+
+        >>> matrix = router.matrix(locations, profile="auto").as_numpy()
+        >>> matrix.durations.nbytes  # 3000 x 3000 x 4 bytes = 36 MB
+
+        :param dtype: The arrays' floating point type, e.g. "float64" for full precision. Default "float32".
+        :type dtype: str or numpy.dtype
+
+        :rtype: :class:`Matrix`
+        """
+        matrix = copy.copy(self)
+        matrix._durations = to_array(self._durations, dtype)
+        matrix._distances = to_array(self._distances, dtype)
+        return matrix
+
     def __repr__(self):  # pragma: no cover
         return "Matrix({}, {})".format(self.durations, self.distances)
+
+
+MatrixTile = namedtuple("MatrixTile", ["sources", "destinations", "matrix", "error"])
+MatrixTile.__doc__ = """One request of a :class:`TiledMatrix`: the indices of its ``sources`` and ``destinations`` in the
+original locations, the resulting :class:`Matrix` and the exception it failed with, if any."""
+
+
+class TiledMatrix(Matrix):
+    """
+    Contains a matrix stitched together from several requests. Access via properties ``durations``, ``distances``,
+    ``tiles`` and ``failed_tiles``. The cells of failed tiles are None.
+    """
+
+    def __init__(self, durations=None, distances=None, tiles=None):
+        super(TiledMatrix, self).__init__(
+            durations=durations,
+            distances=distances,
+            raw=[tile.matrix.raw if tile.matrix is not None else None for tile in tiles or []],
+        )
+        self._tiles = tiles or []
+
+    @property
+    def tiles(self) -> List[MatrixTile]:
+        """
+        All requests the matrix was assembled from.
+
+        :rtype: list of :class:`MatrixTile`
+        """
+        return self._tiles
+
+    @property
+    def failed_tiles(self) -> List[MatrixTile]:
+        """
+        The requests which raised an exception, e.g. to retry them.
+
+        :rtype: list of :class:`MatrixTile`
+        """
+        return [tile for tile in self._tiles if tile.error is not None]
+
+    @property
+    def raw(self) -> List[Optional[dict]]:
+        """
+        Returns the tiles' raw, unparsed responses in the order of ``tiles``.
+
+        :rtype: list
+        """
+        return self._raw
+
+    def __repr__(self):  # pragma: no cover
+        return "TiledMatrix({}, {}, failed_tiles={})".format(
+            self.durations, self.distances, len(self.failed_tiles)
+        )
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Reader for OSRM's FlatBuffers responses, which are requested with the ``.flatbuffers`` suffix. Values are read
+straight from the response buffer when accessed, nothing is decoded upfront.
+
+The accessors follow OSRM's schema in ``include/engine/api/flatbuffers/*.fbs``:
+
+>>> result = Result(body)
+>>> result.routes[0].duration
+1234.5
+>>> result.table.durations(array_backend="numpy").shape
+(3, 3)
+"""
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: The content type OSRM answers FlatBuffers requests with, without its ``schema`` parameter.
+CONTENT_TYPE = "application/x-flatbuffers"
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+_F32 = struct.Struct("<f")
+_BOOL = struct.Struct("<?")
+_POSITION = struct.Struct("<ff")
+
+#: OSRM's JSON output has durations and distances with one decimal. Their float32 values here are rounded to
+#: the same, so e.g. 1.1 isn't read as 1.100000023841858.
+_DECIMALS = 1
+
+
+class _Table(object):
+    """A FlatBuffers table at ``pos`` in ``buf``, whose fields are addressed by their index in the schema."""
+
+    __slots__ = ("_buf", "_pos", "_vtable", "_vtable_size")
+
+    def __init__(self, buf, pos):
+        self._buf = buf
+        self._pos = pos
+        self._vtable = pos - _I32.unpack_from(buf, pos)[0]
+        self._vtable_size = _U16.unpack_from(buf, self._vtable)[0]
+
+    def _field(self, index):
+        """Returns the field's position in the buffer, or None if the field isn't set."""
+        entry = 4 + 2 * index
+        if entry >= self._vtable_size:
+            return None
+
+        offset = _U16.unpack_from(self._buf, self._vtable + entry)[0]
+        return self._pos + offset if offset else None
+
+    def _scalar(self, index, fmt, default=None):
+        pos = self._field(index)
+        return default if pos is None else fmt.unpack_from(self._buf, pos)[0]
+
+    def _indirect(self, index):
+        """Follows the offset stored in a string, vector or table field."""
+        pos = self._field(index)
+        return None if pos is None else pos + _U32.unpack_from(self._buf, pos)[0]
+
+    def _string(self, index):
+        pos = self._indirect(index)
+        if pos is None:
+            return None
+
+        length = _U32.unpack_from(self._buf, pos)[0]
+        return bytes(self._buf[pos + 4 : pos + 4 + length]).decode("utf-8")
+
+    def _vector(self, index):
+        """Returns the position of a vector's first element and its length."""
+        pos = self._indirect(index)
+        if pos is None:
+            return None, 0
+
+        return pos + 4, _U32.unpack_from(self._buf, pos)[0]
+
+    def _tables(self, index, table_type):
+        start, length = self._vector(index)
+        tables = []
+        for idx in range(length):
+            pos = start + 4 * idx
+            tables.append(table_type(self._buf, pos + _U32.unpack_from(self._buf, pos)[0]))
+        return tables
+
+    def _floats(self, index):
+        """Returns a float vector as read-only :class:`numpy.ndarray` on the buffer if numpy is installed, else as
+        :class:`array.array`."""
+        start, length = self._vector(index)
+        if start is None:
+            return None
+
+        if np is not None:
+            return np.frombuffer(self._buf, dtype="<f4", count=length, offset=start)
+
+        values = array("f")
+        values.frombytes(bytes(self._buf[start : start + 4 * length]))
+        return values
+
+
+class Waypoint(_Table):
+    """A snapped location."""
+
+    @property
+    def hint(self):
+        """:rtype: str or None"""
+        return self._string(0)
+
+    @property
+    def distance(self):
+        """The distance from the input location to the snapped one in meters.
+
+        :rtype: float
+        """
+        return self._scalar(1, _F32, 0.0)
+
+    @property
+    def name(self):
+        """:rtype: str or None"""
+        return self._string(2)
+
+    @property
+    def location(self):
+        """The snapped location in [lon, lat] order.
+
+        :rtype: list of float or None
+        """
+        pos = self._field(3)
+        return None if pos is None else list(_POSITION.unpack_from(self._buf, pos))
+
+
+class Route(_Table):
+    """A route, with its geometry either as ``polyline`` or as ``coordinates`` depending on the request's
+    ``geometries``."""
+
+    @property
+    def distance(self):
+        """:rtype: float"""
+        return round(self._scalar(0, _F32, 0.0), _DECIMALS)
+
+    @property
+    def duration(self):
+        """:rtype: float"""
+        return round(self._scalar(1, _F32, 0.0), _DECIMALS)
+
+    @property
+    def polyline(self):
+        """:rtype: str or None"""
+        return self._string(5)
+
+    @property
+    def coordinates(self):
+        """:rtype: list of list or None"""
+        start, length = self._vector(6)
+        if start is None:
+            return None
+
+        return [list(coords) for coords in _POSITION.iter_unpack(self._buf[start : start + 8 * length])]
+
+
+class Table(_Table):
+    """
+    The result of a table request. Its sources are the result's ``waypoints``.
+
+    OSRM writes unreachable cells as 0 instead of null like in JSON. Zeros between a source and a destination
+    which snapped to different locations are therefore returned as None, or NaN in arrays.
+    """
+
+    def __init__(self, buf, pos, sources=None):
+        """
+        :param sources: The result's waypoints, to tell unreachable cells from coincident locations.
+        :type sources: list of :class:`Waypoint`
+        """
+        super(Table, self).__init__(buf, pos)
+        self.sources = sources
+
+    @property
+    def rows(self):
+        """:rtype: int"""
+        return self._scalar(1, _U16, 0)
+
+    @property
+    def cols(self):
+        """:rtype: int"""
+        return self._scalar(2, _U16, 0)
+
+    def durations(self, array_backend=None):
+        """The durations in seconds, see :meth:`distances`."""
+        return self._matrix(0, array_backend)
+
+    def distances(self, array_backend=None):
+        """
+        The distances in meters.
+
+        :param array_backend: "numpy" for a float32 array of shape (rows, cols), else nested lists. The values
+            are rounded to one decimal like in OSRM's JSON responses.
+        :type array_backend: str
+
+        :rtype: list or numpy.ndarray or None
+        """
+        return self._matrix(3, array_backend)
+
+    @property
+    def destinations(self):
+        """:rtype: list of :class:`Waypoint`"""
+        return self._tables(4, Waypoint)
+
+    def _matrix(self, index, array_backend):
+        values = self._floats(index)
+        if values is None:
+            return None
+
+        rows, cols = self.rows, self.cols
+        unreachable = self._unreachable(values, rows, cols)
+        if array_backend == "numpy" and np is not None:
+            # Rounding copies the values off the read-only response buffer
+            matrix = values.reshape(rows, cols).round(_DECIMALS)
+            matrix.flat[unreachable] = np.nan
+            return matrix
+
+        values = [round(value, _DECIMALS) for value in values.tolist()]
+        for idx in unreachable:
+            values[idx] = None
+        return [values[row * cols : (row + 1) * cols] for row in range(rows)]
+
+    def _unreachable(self, values, rows, cols):
+        """Returns the flat indices of the zeros between locations which snapped to different places."""
+        if np is not None:
+            zeros = np.flatnonzero(values == 0).tolist()
+        else:
+            zeros = [idx for idx, value in enumerate(values) if value == 0]
+        if not zeros:
+            return []
+
+        sources = [waypoint.location for waypoint in self.sources or ()]
+        destinations = [waypoint.location for waypoint in self.destinations or ()]
+        if (len(sources), len(destinations)) != (rows, cols) or None in sources or None in destinations:
+            return []
+
+        return [idx for idx in zeros if sources[idx // cols] != destinations[idx % cols]]
+
+
+class Result(_Table):
+    """The root of an OSRM FlatBuffers response."""
+
+    def __init__(self, body):
+        """
+        :param body: The response body.
+        :type body: bytes or bytearray or memoryview
+        """
+        super(Result, self).__init__(body, _U32.unpack_from(body, 0)[0])
+
+    @property
+    def error(self):
+        """:rtype: bool"""
+        return self._scalar(0, _BOOL, False)
+
+    @property
+    def data_version(self):
+        """:rtype: str or None"""
+        return self._string(2)
+
+    @property
+    def waypoints(self):
+        """The route's waypoints or the table's sources.
+
+        :rtype: list of :class:`Waypoint`
+        """
+        return self._tables(3, Waypoint)
+
+    @property
+    def routes(self):
+        """:rtype: list of :class:`Route`"""
+        return self._tables(4, Route)
+
+    @property
+    def table(self):
+        """:rtype: :class:`Table` or None"""
+        pos = self._indirect(5)
+        return None if pos is None else Table(self._buf, pos, self.waypoints)
@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Client-side rate limiting with token buckets, to pace requests to a provider's quota instead of running into
+HTTP 429 responses.
+
+A limiter is shared by every client using it, across threads. Limiters registered for a base URL apply to all
+clients of that base URL in the process:
+
+>>> from routingpy import Google
+>>> from routingpy.ratelimit import RateLimiter, set_rate_limit
+>>> set_rate_limit("https://maps.googleapis.com/maps/api", RateLimiter(per_second=50, per_minute=3000))
+>>> router = Google(api_key)  # paced by the limiter above, as is every other Google router
+>>> print(router.client.rate_limiter.wait_time)
+0.0
+
+Alternatively pass ``rate_limit=`` to a router, either a :class:`RateLimiter` to share with other routers or
+the number of requests per second of this router only.
+
+Independently of configured limits, the clients honor the quota providers report in their response headers
+(see :func:`parse_rate_limit_headers`): retries wait for ``Retry-After`` if it's longer than the retry policy's
+backoff, and once the remaining quota of the current window is used up, later requests wait for the window's
+reset. The quota is kept in the client's limiter, or in one of the client only if it has none.
+"""
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from email.utils import parsedate_to_datetime
+
+#: Quota reported in a response's headers. ``retry_after`` and ``reset`` are in seconds from now, any of them
+#: may be None.
+RateLimitHeaders = namedtuple("RateLimitHeaders", ["retry_after", "remaining", "reset"])
+
+# ORS and GraphHopper send X-RateLimit-*, Mapbox X-Rate-Limit-*, others the IETF draft's RateLimit-*
+_HEADER_PREFIXES = ("X-RateLimit-", "X-Rate-Limit-", "RateLimit-")
+
+# Reset headers beyond this are UNIX timestamps (ORS, Mapbox) instead of seconds from now (GraphHopper)
+_EPOCH_THRESHOLD = 1e9
+
+
+def _header_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limit_headers(headers):
+    """Reads the quota reported in a response's headers: ``Retry-After`` in seconds or as HTTP date, and
+    ``X-RateLimit-Remaining``/``X-RateLimit-Reset`` and their variants of the different providers, whose reset is
+    either a UNIX timestamp or in seconds from now.
+
+    :param headers: The response headers, with case-insensitive lookup.
+    :type headers: requests.structures.CaseInsensitiveDict or multidict.CIMultiDictProxy
+
+    :rtype: RateLimitHeaders
+    """
+    retry_after = headers.get("Retry-After")
+    if retry_after is not None:
+        seconds = _header_number(retry_after)
+        if seconds is None:
+            try:
+                seconds = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+        retry_after = None if seconds is None else max(0.0, seconds)
+
+    remaining = reset = None
+    for prefix in _HEADER_PREFIXES:
+        remaining = _header_number(headers.get(prefix + "Remaining"))
+        reset = _header_number(headers.get(prefix + "Reset"))
+        if remaining is not None or reset is not None:
+            break
+
+    if remaining is not None:
+        remaining = max(0, int(remaining))
+    if reset is not None:
+        reset = max(0.0, reset - time.time() if reset > _EPOCH_THRESHOLD else reset)
+
+    return RateLimitHeaders(retry_after, remaining, reset)
+
+
+class TokenBucket(object):
+    """
+    A bucket holding up to ``burst`` tokens, which is refilled with ``rate`` tokens per ``period`` seconds.
+    Every request takes a token.
+
+    Tokens are handed out in advance: if the bucket is empty, the request is told how long to wait until its
+    token is refilled, so that concurrent requests queue up at exactly the bucket's rate.
+    """
+
+    def __init__(self, rate, period=1.0, burst=None):
+        """
+        :param rate: Number of requests per ``period``.
+        :type rate: int or float
+
+        :param period: Length of the period in seconds. Default 1.
+        :type period: int or float
+
+        :param burst: Number of requests which may be sent at once after a pause. Default ``rate``.
+        :type burst: int or float
+        """
+        if rate <= 0 or period <= 0:
+            raise ValueError("rate and period must be positive.")
+
+        self.rate = rate
+        self.period = period
+        self.burst = burst if burst is not None else rate
+        self._interval = float(period) / rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) / self._interval)
+        self._updated = now
+
+    def reserve(self):
+        """Takes a token and returns how long to wait before sending the request.
+
+        :returns: The wait time in seconds.
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return max(0.0, -self._tokens * self._interval)
+
+    @property
+    def wait_time(self):
+        """The time in seconds a request would have to wait if it was sent now.
+
+        :rtype: float
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1 - self._tokens) * self._interval)
+
+
+class RateLimiter(object):
+    """
+    Thread-safe rate limiter combining a per-second and a per-minute :class:`TokenBucket`, like the quotas of
+    most providers, with the quota the provider reports in its response headers.
+    """
+
+    def __init__(self, per_second=None, per_minute=None, burst=None, buckets=None):
+        """
+        :param per_second: Maximum number of requests per second.
+        :type per_second: int or float
+
+        :param per_minute: Maximum number of requests per minute.
+        :type per_minute: int or float
+
+        :param burst: Number of requests which may be sent at once within the per-second limit.
+            Default ``per_second``.
+        :type burst: int or float
+
+        :param buckets: Additional buckets for other quotas, e.g. ``TokenBucket(100000, period=86400)``.
+        :type buckets: list of TokenBucket
+
+        Without any limits, requests are only paced by the quota passed to :meth:`update_quota`.
+        """
+        self.buckets = list(buckets or [])
+        if per_second is not None:
+            self.buckets.append(TokenBucket(per_second, 1, burst))
+        if per_minute is not None:
+            self.buckets.append(TokenBucket(per_minute, 60))
+
+        self._lock = threading.Lock()
+        self._quota_remaining = None
+        self._quota_reset = None
+        self.requests = 0
+        self.delayed = 0
+        self.waited = 0.0
+
+    def reserve(self):
+        """Takes a token from every bucket and returns how long to wait before sending the request.
+
+        :returns: The wait time in seconds.
+        :rtype: float
+        """
+        delay = max([bucket.reserve() for bucket in self.buckets] or [0.0])
+        with self._lock:
+            delay = max(delay, self._reserve_quota(time.monotonic()))
+            self.requests += 1
+            if delay > 0:
+                self.delayed += 1
+                self.waited += delay
+
+        return delay
+
+    def _reserve_quota(self, now):
+        if self._quota_reset is None:
+            return 0.0
+
+        if now >= self._quota_reset:
+            self._quota_remaining = self._quota_reset = None
+            return 0.0
+
+        if self._quota_remaining > 0:
+            self._quota_remaining -= 1
+            return 0.0
+
+        return self._quota_reset - now
+
+    def update_quota(self, remaining, reset):
+        """Sets the quota the provider reported: ``remaining`` requests may be sent until the window resets in
+        ``reset`` seconds. Requests beyond wait for the reset.
+
+        Responses may arrive out of order, so within the same window the lowest remaining quota wins.
+
+        :param remaining: Number of requests left in the current window, 0 to pause until the reset.
+        :type remaining: int
+
+        :param reset: Seconds until the window resets.
+        :type reset: float
+        """
+        now = time.monotonic()
+        reset_at = now + reset
+        with self._lock:
+            if self._quota_reset is None or now >= self._quota_reset or reset_at > self._quota_reset + 1:
+                self._quota_remaining = remaining
+                self._quota_reset = reset_at
+            else:
+                self._quota_remaining = min(self._quota_remaining, remaining)
+                if remaining == 0:
+                    self._quota_reset = max(self._quota_reset, reset_at)
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Waits until a request may be sent, without blocking the event loop."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    @property
+    def wait_time(self):
+        """The time in seconds a request would have to wait if it was sent now.
+
+        :rtype: float
+        """
+        wait_time = max([bucket.wait_time for bucket in self.buckets] or [0.0])
+        with self._lock:
+            now = time.monotonic()
+            if self._quota_remaining == 0 and now < self._quota_reset:
+                wait_time = max(wait_time, self._quota_reset - now)
+
+        return wait_time
+
+    @property
+    def stats(self):
+        """The number of paced requests, the number of those which had to wait, the total time waited, the
+        current wait time in seconds and the remaining quota reported by the provider (None if unknown).
+
+        :rtype: dict
+        """
+        return {
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "waited": self.waited,
+            "wait_time": self.wait_time,
+            "remaining": self._quota_remaining,
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def set_rate_limit(base_url, limiter):
+    """Registers a rate limiter for all clients of ``base_url`` in this process, including already created ones.
+
+    :param base_url: The base URL of the provider, as the router's ``base_url``.
+    :type base_url: str
+
+    :param limiter: The limiter, or None to remove the limit.
+    :type limiter: RateLimiter
+
+    :returns: The previously registered limiter or None.
+    :rtype: RateLimiter
+    """
+    with _limiters_lock:
+        previous = _limiters.pop(base_url, None)
+        if limiter is not None:
+            _limiters[base_url] = limiter
+
+    return previous
+
+
+def get_rate_limiter(base_url, per_second=None, create=False, **kwargs):
+    """Returns the rate limiter registered for ``base_url``. If there is none and limits are given or ``create``
+    is True, a :class:`RateLimiter` with them is registered first.
+
+    :param base_url: The base URL of the provider, as the router's ``base_url``.
+    :type base_url: str
+
+    :param create: Register a limiter without limits of its own if there is none, e.g. to track the quota
+        reported by the provider.
+    :type create: bool
+
+    :param per_second: Maximum number of requests per second of a new limiter.
+    :type per_second: int or float
+
+    :param kwargs: Other arguments of a new :class:`RateLimiter`.
+
+    :rtype: RateLimiter or None
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(base_url)
+        if limiter is None and (create or per_second is not None or kwargs):
+            limiter = _limiters[base_url] = RateLimiter(per_second, **kwargs)
+
+    return limiter
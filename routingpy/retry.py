@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Retry policies, which decide which failed requests the clients retry, how often and how long they wait in
+between.
+
+Example for a batch worker which retries server errors and dropped connections for up to 10 minutes:
+
+>>> from routingpy import OSRM, exceptions
+>>> from routingpy.retry import RetryPolicy
+>>> policy = RetryPolicy(
+...     statuses=(429, 502, 503, 504),
+...     exceptions=(exceptions.Timeout, exceptions.TransportError),
+...     attempt_timeout=30,
+...     deadline=600,
+...     max_backoff=60,
+... )
+>>> router = OSRM("http://localhost:5000", retry_policy=policy)
+"""
+import random
+
+
+class RetryPolicy(object):
+    """
+    Describes which requests are retried and the backoff between the attempts. Policies are immutable in use
+    and can be shared by several routers.
+
+    The default policy retries HTTP 429 and 503 with an exponential backoff of 1, 1.5, 2.25, ... seconds,
+    jittered by 50%, until the client's ``retry_timeout`` is reached. HTTP 429 is only retried if the client's
+    ``retry_over_query_limit`` is True.
+    """
+
+    def __init__(
+        self,
+        statuses=(429, 503),
+        exceptions=(),
+        max_attempts=None,
+        backoff_factor=1.0,
+        backoff_base=1.5,
+        max_backoff=None,
+        jitter=0.5,
+        attempt_timeout=None,
+        deadline=None,
+    ):
+        """
+        :param statuses: HTTP status codes to retry. Default 429 and 503.
+        :type statuses: iterable of int
+
+        :param exceptions: Exceptions to retry, e.g. :class:`routingpy.exceptions.Timeout` for timed out
+            attempts, :class:`routingpy.exceptions.TransportError` for failed connections or
+            :class:`routingpy.exceptions.RouterServerError` for any HTTP 5xx. Default none.
+        :type exceptions: tuple of type
+
+        :param max_attempts: Maximum number of attempts including the first one. Once reached, the last error is
+            raised. Default unlimited, only bounded by ``deadline``.
+        :type max_attempts: int
+
+        :param backoff_factor: Wait before the first retry in seconds. Default 1.
+        :type backoff_factor: float
+
+        :param backoff_base: Factor the wait grows by with every further retry. Default 1.5.
+        :type backoff_base: float
+
+        :param max_backoff: Upper bound of the wait in seconds before jitter. Default unbounded.
+        :type max_backoff: float
+
+        :param jitter: Relative random deviation of the wait, e.g. 0.5 for +/- 50%. Default 0.5.
+        :type jitter: float
+
+        :param attempt_timeout: Combined connect and read timeout of each attempt in seconds. Default the client's
+            ``timeout``.
+        :type attempt_timeout: float
+
+        :param deadline: Time in seconds after the first attempt, after which no further attempt is made and
+            :class:`routingpy.exceptions.Timeout` is raised. Default the client's ``retry_timeout``.
+        :type deadline: float
+        """
+        if max_attempts is not None and max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+
+        self.statuses = frozenset(statuses)
+        self.exceptions = tuple(exceptions)
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+
+    def can_retry(self, attempts):
+        """Whether another attempt is allowed after ``attempts`` attempts.
+
+        :type attempts: int
+
+        :rtype: bool
+        """
+        return self.max_attempts is None or attempts < self.max_attempts
+
+    def retries_status(self, status_code):
+        """Whether responses with ``status_code`` are retried.
+
+        :type status_code: int
+
+        :rtype: bool
+        """
+        return status_code in self.statuses
+
+    def retries_exception(self, error):
+        """Whether the request is retried after ``error`` was raised.
+
+        :type error: Exception
+
+        :rtype: bool
+        """
+        return isinstance(error, self.exceptions)
+
+    def backoff(self, retry):
+        """Returns the time to wait before the ``retry``-th retry in seconds.
+
+        :param retry: The number of the retry, starting at 1.
+        :type retry: int
+
+        :rtype: float
+        """
+        delay = self.backoff_factor * self.backoff_base ** (retry - 1)
+        if self.max_backoff is not None:
+            delay = min(delay, self.max_backoff)
+
+        return delay * (1 + self.jitter * (2 * random.random() - 1))
+
+    def __repr__(self):
+        return "RetryPolicy(statuses={}, exceptions={}, max_attempts={}, deadline={})".format(
+            sorted(self.statuses),
+            [e.__name__ for e in self.exceptions],
+            self.max_attempts,
+            self.deadline,
+        )
+
+
+#: The policy of clients without ``retry_policy``.
+DEFAULT_RETRY_POLICY = RetryPolicy()
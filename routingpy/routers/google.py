@@ -19,6 +19,7 @@ from operator import itemgetter
 from typing import List, Optional, Tuple, Union
 
 from .. import convert, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -65,10 +66,14 @@ STATUS_CODES = {
 }
 
 
-class Google:
+class Google(BatchMixin):
     """Performs requests to the Google API services."""
 
     _base_url = "https://maps.googleapis.com/maps/api"
+    # 100 elements per request
+    _MATRIX_TILE_SIZE = (10, 10)
+    # Origin, destination and 25 waypoints
+    _DIRECTIONS_MAX_LOCATIONS = 27
 
     def __init__(
         self,
@@ -129,6 +134,10 @@ class Google:
             **client_kwargs
         )
 
+    @staticmethod
+    def _route_legs(raw):
+        return raw["routes"][0]["legs"]
+
     class WayPoint(object):
         """
         TODO: make the WayPoint class and its parameters appear in Sphinx. True for Valhalla as well.
@@ -192,6 +201,7 @@ class Google:
         transit_mode: Optional[Union[List[str], Tuple[str]]] = None,
         transit_routing_preference: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
     ):
         """Get directions between an origin point and a destination point.
 
@@ -253,6 +263,10 @@ class Google:
         :param dry_run: Print URL and parameters without sending the request.
         :type dry_run: bool
 
+        :param metrics_only: Only parse duration and distance. Google always returns the geometry, but it's not
+            decoded and the direction's ``geometry`` is None. Default False.
+        :type metrics_only: bool
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
         """
@@ -319,12 +333,15 @@ class Google:
         if transit_routing_preference:
             params["transit_routing_preference"] = transit_routing_preference
 
-        return self.parse_direction_json(
-            self.client._request("/directions/json", get_params=params, dry_run=dry_run), alternatives
+        return self.client._parse(
+            self.parse_direction_json,
+            self.client._request("/directions/json", get_params=params, dry_run=dry_run),
+            alternatives,
+            metrics_only,
         )
 
     @staticmethod
-    def parse_direction_json(response, alternatives):
+    def parse_direction_json(response, alternatives, metrics_only=None):
         if response is None:  # pragma: no cover
             if alternatives:
                 return Directions()
@@ -348,30 +365,38 @@ class Google:
         if alternatives:
             routes = []
             for route in response["routes"]:
-                geometry = []
+                polylines = []
                 duration, distance = 0, 0
                 for leg in route["legs"]:
                     duration += leg["duration"]["value"]
                     distance += leg["distance"]["value"]
                     for step in leg["steps"]:
-                        geometry.extend(utils.decode_polyline5(step["polyline"]["points"]))
+                        polylines.append(step["polyline"]["points"])
 
                 routes.append(
                     Direction(
-                        geometry=geometry, duration=int(duration), distance=int(distance), raw=route
+                        geometry=None if metrics_only else utils.EncodedPolyline(polylines),
+                        duration=int(duration),
+                        distance=int(distance),
+                        raw=route,
                     )
                 )
             return Directions(routes, response)
         else:
-            geometry = []
+            polylines = []
             duration, distance = 0, 0
             for leg in response["routes"][0]["legs"]:
                 duration += leg["duration"]["value"]
                 distance += leg["distance"]["value"]
                 for step in leg["steps"]:
-                    geometry.extend(utils.decode_polyline5(step["polyline"]["points"]))
+                    polylines.append(step["polyline"]["points"])
 
-            return Direction(geometry=geometry, duration=duration, distance=distance, raw=response)
+            return Direction(
+                geometry=None if metrics_only else utils.EncodedPolyline(polylines),
+                duration=duration,
+                distance=distance,
+                raw=response,
+            )
 
     def isochrones(self):  # pragma: no cover
         raise NotImplementedError
@@ -392,6 +417,7 @@ class Google:
         transit_mode: Optional[Union[List[str], Tuple[str]]] = None,
         transit_routing_preference: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        array_backend: Optional[str] = None,
     ):
         """Gets travel distance and time for a matrix of origins and destinations.
 
@@ -450,6 +476,11 @@ class Google:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
         """
@@ -506,12 +537,14 @@ class Google:
         if transit_routing_preference:
             params["transit_routing_preference"] = transit_routing_preference
 
-        return self.parse_matrix_json(
-            self.client._request("/distancematrix/json", get_params=params, dry_run=dry_run)
+        return self.client._parse(
+            self.parse_matrix_json,
+            self.client._request("/distancematrix/json", get_params=params, dry_run=dry_run),
+            array_backend,
         )
 
     @staticmethod
-    def parse_matrix_json(response):
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
 
@@ -532,4 +565,4 @@ class Google:
             durations.append(row_durations)
             distances.append(row_distances)
 
-        return Matrix(durations, distances, response)
+        return Matrix(durations, distances, response, array_backend)
@@ -17,7 +17,8 @@
 
 from typing import List, Optional, Tuple, Union  # noqa: F401
 
-from .. import convert, utils
+from .. import convert, streaming, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -25,10 +26,12 @@ from ..isochrone import Isochrone, Isochrones
 from ..matrix import Matrix
 
 
-class Graphhopper:
+class Graphhopper(BatchMixin):
     """Performs requests to the Graphhopper API services."""
 
     _DEFAULT_BASE_URL = "https://graphhopper.com/api/1"
+    # Depends on the plan, the free one allows 5 x 5
+    _MATRIX_TILE_SIZE = (5, 5)
 
     def __init__(
         self,
@@ -125,6 +128,7 @@ class Graphhopper:
         dry_run: Optional[bool] = None,
         snap_preventions: Optional[List[str]] = None,
         curbsides: Optional[List[str]] = None,
+        metrics_only: Optional[bool] = None,
         **direction_kwargs
     ):
         """Get directions between an origin point and a destination point.
@@ -250,6 +254,10 @@ class Graphhopper:
             or all points. Only supported for motor vehicles and OpenStreetMap.
         :type curbsides: list of str
 
+        :param metrics_only: Only request duration and distance, without points and instructions. The direction's
+            ``geometry`` is None then. Default False.
+        :type metrics_only: bool
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
 
@@ -270,6 +278,9 @@ class Graphhopper:
            Removed `weighting`, `block_area`, `avoid`, `turn_costs` parameters
         """
 
+        if metrics_only:
+            instructions, calc_points = False, False
+
         params = {"profile": profile}
 
         if locations is not None:
@@ -355,29 +366,34 @@ class Graphhopper:
 
         params.update(direction_kwargs)
 
-        return self.parse_directions_json(
+        return self.client._parse(
+            self.parse_directions_json,
             self.client._request("/route", get_params=get_params, post_params=params, dry_run=dry_run),
             algorithm,
             elevation,
             points_encoded,
+            metrics_only,
         )
 
     @staticmethod
-    def parse_directions_json(response, algorithm, elevation, points_encoded):
+    def parse_directions_json(response, algorithm, elevation, points_encoded, metrics_only=None):
         if response is None:  # pragma: no cover
             if algorithm == "alternative_route":
                 return Directions()
             else:
                 return Direction()
 
+        def _parse_geometry(route):
+            if metrics_only:
+                return None
+            if points_encoded:
+                return utils.EncodedPolyline(route["points"], 5, elevation)
+            return route["points"]["coordinates"]
+
         if algorithm == "alternative_route":
             routes = []
             for route in response["paths"]:
-                geometry = (
-                    utils.decode_polyline5(route["points"], elevation)
-                    if points_encoded
-                    else route["points"]["coordinates"]
-                )
+                geometry = _parse_geometry(route)
                 routes.append(
                     Direction(
                         geometry=geometry,
@@ -388,11 +404,7 @@ class Graphhopper:
                 )
             return Directions(routes, response)
         else:
-            geometry = (
-                utils.decode_polyline5(response["paths"][0]["points"], elevation)
-                if points_encoded
-                else response["paths"][0]["points"]["coordinates"]
-            )
+            geometry = _parse_geometry(response["paths"][0])
             return Direction(
                 geometry=geometry,
                 duration=int(response["paths"][0]["time"] / 1000),
@@ -484,7 +496,8 @@ class Graphhopper:
 
         params.extend(isochrones_kwargs.items())
 
-        return self.parse_isochrone_json(
+        return self.client._parse(
+            self.parse_isochrone_json,
             self.client._request("/isochrone", get_params=params, dry_run=dry_run),
             type,
             intervals[0],
@@ -525,6 +538,8 @@ class Graphhopper:
         out_array: Optional[List[str]] = ["times", "distances"],
         debug=None,
         dry_run: Optional[bool] = None,
+        stream: Optional[bool] = None,
+        array_backend: Optional[str] = None,
         **matrix_kwargs
     ):
         """Gets travel distance and time for a matrix of origins and destinations.
@@ -563,6 +578,16 @@ class Graphhopper:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param stream: Parse the response incrementally while it's downloaded, so that the memory footprint
+            stays close to the size of the resulting matrices. Useful for very large matrices, requires the
+            ijson package. The matrix' ``raw`` attribute is None then. Default False.
+        :type stream: bool
+
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
         """
@@ -616,15 +641,32 @@ class Graphhopper:
 
         params.extend(matrix_kwargs.items())
 
-        return self.parse_matrix_json(
-            self.client._request("/matrix", get_params=params, dry_run=dry_run),
+        return self.client._parse(
+            self.parse_matrix_stream if stream else self.parse_matrix_json,
+            self.client._request("/matrix", get_params=params, dry_run=dry_run, stream=stream),
+            array_backend,
         )
 
     @staticmethod
-    def parse_matrix_json(response):
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
         durations = response.get("times")
         distances = response.get("distances")
 
-        return Matrix(durations=durations, distances=distances, raw=response)
+        return Matrix(
+            durations=durations, distances=distances, raw=response, array_backend=array_backend
+        )
+
+    @staticmethod
+    def parse_matrix_stream(body, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        with streaming.closing_body(body):
+            members = streaming.parse_members(body, ("times", "distances"))
+        return Matrix(
+            durations=members.get("times"),
+            distances=members.get("distances"),
+            array_backend=array_backend,
+        )
@@ -19,6 +19,7 @@ from operator import itemgetter
 from typing import List, Optional, Tuple, Union
 
 from .. import convert
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -27,9 +28,11 @@ from ..matrix import Matrix
 from ..utils import logger
 
 
-class HereMaps:
+class HereMaps(BatchMixin):
     """Performs requests to the HERE Maps API services."""
 
+    _MATRIX_TILE_SIZE = (100, 100)
+
     def __init__(
         self,
         app_id: Optional[str] = None,
@@ -288,6 +291,7 @@ class HereMaps:
         custom_consumption_details: Optional[str] = None,
         speed_profile: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
         **directions_kwargs
     ):
         """Get directions between an origin point and a destination point.
@@ -585,10 +589,18 @@ class HereMaps:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param metrics_only: Only request the route summary in overview representation, without shape and
+            maneuvers. The direction's ``geometry`` is None then. Default False.
+        :type metrics_only: bool
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
         """
 
+        if metrics_only:
+            representation, route_attributes = ["overview"], ["summary"]
+            leg_attributes, maneuver_attributes = None, None
+
         self.client.base_url = (
             "https://route.api.here.com/routing/7.2"
             if self.api_key is None
@@ -772,17 +784,19 @@ class HereMaps:
 
         params.update(directions_kwargs)
 
-        return self.parse_direction_json(
+        return self.client._parse(
+            self.parse_direction_json,
             self.client._request(
                 convert.delimit_list(["/calculateroute", format], "."),
                 get_params=params,
                 dry_run=dry_run,
             ),
             alternatives=alternatives,
+            metrics_only=metrics_only,
         )
 
     @staticmethod
-    def parse_direction_json(response, alternatives):
+    def parse_direction_json(response, alternatives, metrics_only=None):
         if response is None:  # pragma: no cover
             if alternatives:
                 return Directions()
@@ -794,7 +808,9 @@ class HereMaps:
             for route in response["response"]["route"]:
                 routes.append(
                     Direction(
-                        geometry=[
+                        geometry=None
+                        if metrics_only
+                        else [
                             list(reversed(list((map(float, coordinates.split(","))))))
                             for coordinates in route["shape"]
                         ],
@@ -807,10 +823,14 @@ class HereMaps:
             return Directions(directions=routes, raw=response)
 
         else:
-            geometry = [
-                list(reversed(list(map(float, coordinates.split(",")))))
-                for coordinates in response["response"]["route"][0].get("shape")
-            ]
+            geometry = (
+                None
+                if metrics_only
+                else [
+                    list(reversed(list(map(float, coordinates.split(",")))))
+                    for coordinates in response["response"]["route"][0].get("shape")
+                ]
+            )
             duration = int(response["response"]["route"][0]["summary"].get("baseTime"))
             distance = int(response["response"]["route"][0]["summary"].get("distance"))
 
@@ -1075,7 +1095,8 @@ class HereMaps:
 
         params.update(isochrones_kwargs)
 
-        return self.parse_isochrone_json(
+        return self.client._parse(
+            self.parse_isochrone_json,
             self.client._request(
                 convert.delimit_list(["/calculateisoline", format], "."),
                 get_params=params,
@@ -1140,6 +1161,7 @@ class HereMaps:
         tunnel_category: Optional[List[str]] = None,
         speed_profile: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        array_backend: Optional[str] = None,
         **matrix_kwargs
     ):
         """Gets travel distance and time for a matrix of origins and destinations.
@@ -1268,6 +1290,11 @@ class HereMaps:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
         :returns: raw JSON response
         :rtype: dict
         """
@@ -1372,16 +1399,18 @@ class HereMaps:
 
         params.update(matrix_kwargs)
 
-        return self.parse_matrix_json(
+        return self.client._parse(
+            self.parse_matrix_json,
             self.client._request(
                 convert.delimit_list(["/calculatematrix", format], "."),
                 get_params=params,
                 dry_run=dry_run,
-            )
+            ),
+            array_backend,
         )
 
     @staticmethod
-    def parse_matrix_json(response):
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
 
@@ -1421,7 +1450,9 @@ class HereMaps:
         durations.append(index_durations)
         distances.append(index_distances)
 
-        return Matrix(durations=durations, distances=distances, raw=response)
+        return Matrix(
+            durations=durations, distances=distances, raw=response, array_backend=array_backend
+        )
 
     def _build_locations(self, coordinates, matrix=False):
         """Build the locations object for all methods"""
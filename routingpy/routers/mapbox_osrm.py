@@ -20,6 +20,7 @@ Core client functionality, common across all API requests.
 from typing import List, Optional, Tuple, Union
 
 from .. import convert, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -27,10 +28,20 @@ from ..isochrone import Isochrone, Isochrones
 from ..matrix import Matrix
 
 
-class MapboxOSRM:
+class MapboxOSRM(BatchMixin):
     """Performs requests to the OSRM API services."""
 
     _base_url = "https://api.mapbox.com"
+    # 25 coordinates per request, i.e. sources plus destinations
+    _MATRIX_TILE_SIZE = (12, 12)
+    _DIRECTIONS_MAX_LOCATIONS = 25
+    _DIRECTIONS_LOCATION_PARAMS = (
+        "radiuses",
+        "bearings",
+        "approaches",
+        "waypoint_names",
+        "waypoint_targets",
+    )
 
     def __init__(
         self,
@@ -93,6 +104,10 @@ class MapboxOSRM:
             **client_kwargs
         )
 
+    @staticmethod
+    def _route_legs(raw):
+        return raw["routes"][0]["legs"]
+
     def directions(  # noqa: C901
         self,
         locations: List[List[float]],
@@ -115,6 +130,7 @@ class MapboxOSRM:
         waypoint_names: Optional[List[str]] = None,
         waypoint_targets: Optional[List[List[float]]] = None,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
     ):
         """Get directions between an origin point and a destination point.
 
@@ -218,10 +234,17 @@ class MapboxOSRM:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param metrics_only: Only request duration and distance, without geometry, steps and instructions. The
+            direction's ``geometry`` is None then. Default False.
+        :type metrics_only: bool
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
         """
 
+        if metrics_only:
+            steps, overview, banner_instructions, voice_instructions = False, False, None, None
+
         coords = convert.delimit_list(
             [convert.delimit_list([convert.format_float(f) for f in pair]) for pair in locations], ";"
         )
@@ -289,7 +312,8 @@ class MapboxOSRM:
 
         get_params = {"access_token": self.api_key} if self.api_key else {}
 
-        return self.parse_direction_json(
+        return self.client._parse(
+            self.parse_direction_json,
             self.client._request(
                 "/directions/v5/mapbox/" + profile,
                 get_params=get_params,
@@ -298,10 +322,11 @@ class MapboxOSRM:
             ),
             alternatives,
             geometries,
+            metrics_only,
         )
 
     @staticmethod
-    def parse_direction_json(response, alternatives, geometry_format):
+    def parse_direction_json(response, alternatives, geometry_format, metrics_only=None):
         if response is None:  # pragma: no cover
             if alternatives:
                 return Directions()
@@ -309,10 +334,12 @@ class MapboxOSRM:
                 return Direction()
 
         def _parse_geometry(route_geometry):
-            if geometry_format in (None, "polyline"):
-                geometry = utils.decode_polyline5(route_geometry, is3d=False)
+            if metrics_only:
+                geometry = None
+            elif geometry_format in (None, "polyline"):
+                geometry = utils.EncodedPolyline(route_geometry, 5)
             elif geometry_format == "polyline6":
-                geometry = utils.decode_polyline6(route_geometry, is3d=False)
+                geometry = utils.EncodedPolyline(route_geometry, 6)
             elif geometry_format == "geojson":
                 geometry = route_geometry["coordinates"]
             else:
@@ -326,7 +353,7 @@ class MapboxOSRM:
             for route in response["routes"]:
                 routes.append(
                     Direction(
-                        geometry=_parse_geometry(route["geometry"]),
+                        geometry=_parse_geometry(route.get("geometry")),
                         duration=int(route["duration"]),
                         distance=int(route["distance"]),
                         raw=route,
@@ -335,7 +362,7 @@ class MapboxOSRM:
             return Directions(routes, response)
         else:
             return Direction(
-                geometry=_parse_geometry(response["routes"][0]["geometry"]),
+                geometry=_parse_geometry(response["routes"][0].get("geometry")),
                 duration=int(response["routes"][0]["duration"]),
                 distance=int(response["routes"][0]["distance"]),
                 raw=response,
@@ -410,7 +437,8 @@ class MapboxOSRM:
 
         profile = profile.replace("mapbox/", "")
 
-        return self.parse_isochrone_json(
+        return self.client._parse(
+            self.parse_isochrone_json,
             self.client._request(
                 "/isochrone/v1/mapbox/" + profile + "/" + locations_string,
                 get_params=params,
@@ -445,6 +473,7 @@ class MapboxOSRM:
         annotations: Optional[List[str]] = None,
         fallback_speed: Optional[int] = None,
         dry_run: Optional[bool] = None,
+        array_backend: Optional[str] = None,
     ):
         """
         Gets travel distance and time for a matrix of origins and destinations.
@@ -480,6 +509,11 @@ class MapboxOSRM:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
         """
@@ -502,19 +536,24 @@ class MapboxOSRM:
         if fallback_speed:
             params["fallback_speed"] = str(fallback_speed)
 
-        return self.parse_matrix_json(
+        return self.client._parse(
+            self.parse_matrix_json,
             self.client._request(
                 "/directions-matrix/v1/mapbox/" + profile + "/" + coords,
                 get_params=params,
                 dry_run=dry_run,
-            )
+            ),
+            array_backend,
         )
 
     @staticmethod
-    def parse_matrix_json(response):
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
 
         return Matrix(
-            durations=response.get("durations"), distances=response.get("distances"), raw=response
+            durations=response.get("durations"),
+            distances=response.get("distances"),
+            raw=response,
+            array_backend=array_backend,
         )
@@ -16,7 +16,8 @@
 #
 from typing import List, Optional
 
-from .. import utils
+from .. import streaming, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -24,10 +25,12 @@ from ..isochrone import Isochrone, Isochrones
 from ..matrix import Matrix
 
 
-class ORS:
+class ORS(BatchMixin):
     """Performs requests to the ORS API services."""
 
     _DEFAULT_BASE_URL = "https://api.openrouteservice.org"
+    # 3500 routes per request on the public API
+    _MATRIX_TILE_SIZE = (59, 59)
 
     def __init__(
         self,
@@ -123,6 +126,7 @@ class ORS:
         suppress_warnings: Optional[bool] = None,
         options: Optional[dict] = None,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
     ):
         """Get directions between an origin point and a destination point.
 
@@ -230,11 +234,19 @@ class ORS:
         :param dry_run: Print URL and parameters without sending the request.
         :type dry_run: bool
 
+        :param metrics_only: Only request duration and distance, without geometry and instructions. The response
+            format is "json" then and the direction's ``geometry`` is None. Default False.
+        :type metrics_only: bool
+
         :returns: A route from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction`
 
         """
 
+        if metrics_only:
+            # GeoJSON can't omit the geometry
+            format, geometry, instructions, maneuvers = "json", False, False, None
+
         params = {"coordinates": locations}
 
         if preference:
@@ -307,7 +319,8 @@ class ORS:
                     )
             params["options"] = options
 
-        return self.parse_direction_json(
+        return self.client._parse(
+            self.parse_direction_json,
             self.client._request(
                 "/v2/directions/" + profile + "/" + format,
                 get_params={},
@@ -317,10 +330,11 @@ class ORS:
             format,
             units,
             alternative_routes,
+            metrics_only,
         )
 
     @staticmethod
-    def parse_direction_json(response, format, units, alternative_routes):
+    def parse_direction_json(response, format, units, alternative_routes, metrics_only=None):
         if response is None:  # pragma: no cover
             return Direction()
 
@@ -354,9 +368,13 @@ class ORS:
             if alternative_routes:
                 routes = []
                 for route in response["routes"]:
-                    geometry = [
-                        list(reversed(coord)) for coord in utils.decode_polyline5(route["geometry"])
-                    ]
+                    geometry = (
+                        None
+                        if metrics_only
+                        else [
+                            list(reversed(coord)) for coord in utils.decode_polyline5(route["geometry"])
+                        ]
+                    )
                     routes.append(
                         Direction(
                             geometry=geometry,
@@ -367,7 +385,9 @@ class ORS:
                     )
                 return Directions(routes, response)
             else:
-                geometry = utils.decode_polyline5(response["routes"][0]["geometry"])
+                geometry = (
+                    None if metrics_only else utils.EncodedPolyline(response["routes"][0]["geometry"])
+                )
                 duration = int(response["routes"][0]["summary"]["duration"])
                 distance = int(response["routes"][0]["summary"]["distance"] * units_factor)
 
@@ -456,7 +476,8 @@ class ORS:
         if intersections:
             params["intersections"] = intersections
 
-        return self.parse_isochrone_json(
+        return self.client._parse(
+            self.parse_isochrone_json,
             self.client._request(
                 "/v2/isochrones/" + profile + "/geojson",
                 get_params={},
@@ -494,6 +515,8 @@ class ORS:
         resolve_locations: Optional[bool] = None,
         units: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        stream: Optional[bool] = None,
+        array_backend: Optional[str] = None,
     ):
         """Gets travel distance and time for a matrix of origins and destinations.
 
@@ -531,6 +554,16 @@ class ORS:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param stream: Parse the response incrementally while it's downloaded, so that the memory footprint
+            stays close to the size of the resulting matrices. Useful for very large matrices, requires the
+            ijson package. The matrix' ``raw`` attribute is None then. Default False.
+        :type stream: bool
+
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
         """
@@ -552,16 +585,37 @@ class ORS:
         if units:
             params["units"] = units
 
-        return self.parse_matrix_json(
+        return self.client._parse(
+            self.parse_matrix_stream if stream else self.parse_matrix_json,
             self.client._request(
-                "/v2/matrix/" + profile + "/json", get_params={}, post_params=params, dry_run=dry_run
-            )
+                "/v2/matrix/" + profile + "/json",
+                get_params={},
+                post_params=params,
+                dry_run=dry_run,
+                stream=stream,
+            ),
+            array_backend,
         )
 
     @staticmethod
-    def parse_matrix_json(response):
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
         durations = response.get("durations")
         distances = response.get("distances")
-        return Matrix(durations=durations, distances=distances, raw=response)
+        return Matrix(
+            durations=durations, distances=distances, raw=response, array_backend=array_backend
+        )
+
+    @staticmethod
+    def parse_matrix_stream(body, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        with streaming.closing_body(body):
+            members = streaming.parse_members(body, ("durations", "distances"))
+        return Matrix(
+            durations=members.get("durations"),
+            distances=members.get("distances"),
+            array_backend=array_backend,
+        )
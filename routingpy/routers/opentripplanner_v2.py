@@ -18,6 +18,7 @@ import datetime
 from typing import List, Optional  # noqa: F401
 
 from .. import convert, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
@@ -25,10 +26,11 @@ from ..isochrone import Isochrone, Isochrones
 from ..raster import Raster
 
 
-class OpenTripPlannerV2:
+class OpenTripPlannerV2(BatchMixin):
     """Performs requests over OpenTripPlannerV2 GraphQL API."""
 
     _DEFAULT_BASE_URL = "http://localhost:8080"
+    _UNSUPPORTED_METHODS = ("matrix",)
 
     def __init__(
         self,
@@ -100,6 +102,7 @@ class OpenTripPlannerV2:
         arrive_by: Optional[bool] = False,
         num_itineraries: Optional[int] = 3,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
     ):
         """
         Get directions between an origin point and a destination point.
@@ -128,6 +131,10 @@ class OpenTripPlannerV2:
         :param dry_run: Print URL and parameters without sending the request.
         :type dry_run: bool
 
+        :param metrics_only: Only query duration and distance, without the legs' geometries. The direction's
+            ``geometry`` is None then. Default False.
+        :type metrics_only: bool
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
         """
@@ -153,9 +160,7 @@ class OpenTripPlannerV2:
                             duration
                             distance
                             mode
-                            legGeometry {{
-                                points
-                            }}
+                            {"" if metrics_only else "legGeometry { points }"}
                         }}
                     }}
                 }}
@@ -165,15 +170,17 @@ class OpenTripPlannerV2:
         response = self.client._request(
             "/otp/routers/default/index/graphql", post_params=params, dry_run=dry_run
         )
-        return self._parse_directions_response(response, num_itineraries)
+        return self.client._parse(
+            self._parse_directions_response, response, num_itineraries, metrics_only
+        )
 
-    def _parse_directions_response(self, response, num_itineraries):
+    def _parse_directions_response(self, response, num_itineraries, metrics_only=None):
         if response is None:  # pragma: no cover
             return Directions() if num_itineraries > 1 else Direction()
 
         routes = []
         for itinerary in response["data"]["plan"]["itineraries"]:
-            geometry, distance = self._parse_legs(itinerary["legs"])
+            geometry, distance = self._parse_legs(itinerary["legs"], metrics_only)
             routes.append(
                 Direction(
                     geometry=geometry,
@@ -192,12 +199,13 @@ class OpenTripPlannerV2:
         else:
             return Direction()
 
-    def _parse_legs(self, legs):
+    def _parse_legs(self, legs, metrics_only=None):
         distance = 0
-        geometry = []
+        geometry = None if metrics_only else []
         for leg in legs:
-            points = utils.decode_polyline5(leg["legGeometry"]["points"])
-            geometry.extend(list(reversed(points)))
+            if not metrics_only:
+                points = utils.decode_polyline5(leg["legGeometry"]["points"])
+                geometry.extend(list(reversed(points)))
             distance += int(leg["distance"])
 
         return geometry, distance
@@ -249,7 +257,7 @@ class OpenTripPlannerV2:
             get_params=params,
             dry_run=dry_run,
         )
-        return self._parse_isochrones_response(response)
+        return self.client._parse(self._parse_isochrones_response, response)
 
     def _parse_isochrones_response(self, response):
         if response is None:  # pragma: no cover
@@ -312,7 +320,7 @@ class OpenTripPlannerV2:
             get_params=params,
             dry_run=dry_run,
         )
-        return self._parse_rasters_response(response, cutoff)
+        return self.client._parse(self._parse_rasters_response, response, cutoff)
 
     def _parse_rasters_response(self, response, max_travel_time):
         if response is None:  # pragma: no cover
@@ -16,36 +16,44 @@
 #
 
 from typing import List, Optional, Union  # noqa: F401
+from urllib.parse import quote
 
-from .. import convert, utils
+from .. import convert, osrm_flatbuffers, streaming, utils
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction, Directions
+from ..hints import HintCache
 from ..matrix import Matrix
 
 
-class OSRM:
+class OSRM(BatchMixin):
     """Performs requests to the OSRM API services."""
 
     _DEFAULT_BASE_URL = "https://routing.openstreetmap.de/routed-bike"
+    # osrm-routed's default --max-table-size of 100 locations
+    _MATRIX_TILE_SIZE = (50, 50)
+    _MATRIX_LOCATION_PARAMS = ("radiuses", "bearings")
 
     def __init__(
         self,
-        base_url: Optional[str] = _DEFAULT_BASE_URL,
+        base_url: Optional[Union[str, List[str]]] = _DEFAULT_BASE_URL,
         user_agent: Optional[str] = None,
         timeout: Optional[int] = DEFAULT,
         retry_timeout: Optional[int] = None,
         retry_over_query_limit: Optional[bool] = False,
         skip_api_error: Optional[bool] = None,
         client=Client,
+        hint_cache: Optional[HintCache] = None,
         **client_kwargs,
     ):
         """
         Initializes an OSRM client.
 
         :param base_url: The base URL for the request. Defaults to the FOSSGIS OSRM
-            instance for "bike". Should not have a trailing slash.
-        :type base_url: str
+            instance for "bike". Should not have a trailing slash. Pass a list of base URLs to balance the
+            requests between several replicas, see ``balancing`` in :class:`routingpy.client_default.Client`.
+        :type base_url: str or list of str
 
         :param user_agent: User Agent to be used when requesting.
             Default :attr:`routingpy.routers.options.default_user_agent`.
@@ -73,10 +81,17 @@ class OSRM:
         :param client: A client class for request handling. Needs to be derived from :class:`routingpy.client_base.BaseClient`
         :type client: abc.ABCMeta
 
+        :param hint_cache: Stores the hints OSRM returns for every snapped location and sends them along with later
+            requests for the same locations and profile, which saves the server the nearest-edge lookup. Can be shared
+            between routers of the same OSRM instance.
+        :type hint_cache: routingpy.hints.HintCache
+
         :param client_kwargs: Additional arguments passed to the client, such as headers or proxies.
         :type client_kwargs: dict
         """
 
+        self.hint_cache = hint_cache
+
         self.client = client(
             base_url,
             user_agent,
@@ -100,6 +115,10 @@ class OSRM:
         geometries: Optional[str] = None,
         overview: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        encode_locations: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
+        hints: Optional[List[Optional[str]]] = None,
+        format: Optional[str] = None,
         **direction_kwargs,
     ):
         """
@@ -164,12 +183,30 @@ class OSRM:
         :param dry_run: Print URL and parameters without sending the request.
         :param dry_run: bool
 
+        :param encode_locations: Send the locations as polyline with a precision of 6 instead of a list of
+            coordinates, which shortens the URL several-fold for many locations. Default False.
+        :type encode_locations: bool
+
+        :param metrics_only: Only request duration and distance, without geometry and steps. The direction's
+            ``geometry`` is None then. Default False.
+        :type metrics_only: bool
+
+        :param hints: Hints from previous responses to skip snapping the locations, one per location with None for
+            unknown ones. Default the hints of the router's ``hint_cache``.
+        :type hints: list of str
+
+        :param format: "flatbuffers" to receive the response as FlatBuffers, which the server encodes faster than JSON
+            and which is read without decoding it as a whole. The direction's ``raw`` is the response body then.
+            Default "json".
+        :type format: str
+
         :returns: One or multiple route(s) from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction` or :class:`routingpy.direction.Directions`
         """
-        coords = convert.delimit_list(
-            [convert.delimit_list([convert.format_float(f) for f in pair]) for pair in locations], ";"
-        )
+        coords = self._build_coordinates(locations, encode_locations) + self._get_suffix(format)
+
+        if metrics_only:
+            steps, overview = False, False
 
         params = self.get_direction_params(
             locations,
@@ -182,13 +219,22 @@ class OSRM:
             annotations,
             geometries,
             overview,
+            self._get_hints(profile, locations, hints),
             **direction_kwargs,
         )
 
-        return self.parse_direction_json(
+        return self.client._parse(
+            self._capture_hints(
+                self.parse_direction_flatbuffers
+                if format == "flatbuffers"
+                else self.parse_direction_json,
+                profile,
+                locations,
+            ),
             self.client._request(f"/route/v1/{profile}/{coords}", get_params=params, dry_run=dry_run),
             alternatives,
             geometries,
+            metrics_only,
         )
 
     @staticmethod
@@ -203,6 +249,7 @@ class OSRM:
         annotations=None,
         geometries=None,
         overview=None,
+        hints=None,
         **directions_kwargs,
     ):
         """
@@ -240,12 +287,15 @@ class OSRM:
         if overview is not None:
             params["overview"] = convert.convert_bool(overview)
 
+        if hints:
+            params["hints"] = convert.delimit_list([hint or "" for hint in hints], ";")
+
         params.update(directions_kwargs)
 
         return params
 
     @staticmethod
-    def parse_direction_json(response, alternatives, geometry_format):
+    def parse_direction_json(response, alternatives, geometry_format, metrics_only=None):
         if response is None:  # pragma: no cover
             if alternatives:
                 return Directions()
@@ -253,10 +303,12 @@ class OSRM:
                 return Direction()
 
         def _parse_geometry(route_geometry):
-            if geometry_format in (None, "polyline"):
-                geometry = utils.decode_polyline5(route_geometry, is3d=False)
+            if metrics_only:
+                geometry = None
+            elif geometry_format in (None, "polyline"):
+                geometry = utils.EncodedPolyline(route_geometry, 5)
             elif geometry_format == "polyline6":
-                geometry = utils.decode_polyline6(route_geometry, is3d=False)
+                geometry = utils.EncodedPolyline(route_geometry, 6)
             elif geometry_format == "geojson":
                 geometry = route_geometry["coordinates"]
             else:
@@ -270,7 +322,7 @@ class OSRM:
             for route in response["routes"]:
                 routes.append(
                     Direction(
-                        geometry=_parse_geometry(route["geometry"]),
+                        geometry=_parse_geometry(route.get("geometry")),
                         duration=int(route["duration"]),
                         distance=int(route["distance"]),
                         raw=route,
@@ -279,12 +331,56 @@ class OSRM:
             return Directions(routes, response)
         else:
             return Direction(
-                geometry=_parse_geometry(response["routes"][0]["geometry"]),
+                geometry=_parse_geometry(response["routes"][0].get("geometry")),
                 duration=int(response["routes"][0]["duration"]),
                 distance=int(response["routes"][0]["distance"]),
                 raw=response,
             )
 
+    @staticmethod
+    def parse_direction_flatbuffers(body, alternatives, geometry_format, metrics_only=None):
+        if body is None:  # pragma: no cover
+            if alternatives:
+                return Directions()
+            else:
+                return Direction()
+
+        def _parse_geometry(route):
+            if metrics_only:
+                geometry = None
+            elif geometry_format in (None, "polyline"):
+                geometry = utils.EncodedPolyline(route.polyline, 5)
+            elif geometry_format == "polyline6":
+                geometry = utils.EncodedPolyline(route.polyline, 6)
+            elif geometry_format == "geojson":
+                geometry = route.coordinates
+            else:
+                raise ValueError(
+                    "OSRM: parameter geometries needs one of ['polyline', 'polyline6', 'geojson"
+                )
+            return geometry
+
+        routes = osrm_flatbuffers.Result(body).routes
+        if alternatives:
+            return Directions(
+                [
+                    Direction(
+                        geometry=_parse_geometry(route),
+                        duration=int(route.duration),
+                        distance=int(route.distance),
+                    )
+                    for route in routes
+                ],
+                body,
+            )
+        else:
+            return Direction(
+                geometry=_parse_geometry(routes[0]),
+                duration=int(routes[0].duration),
+                distance=int(routes[0].distance),
+                raw=body,
+            )
+
     def isochrones(self):  # pragma: no cover
         raise NotImplementedError
 
@@ -298,6 +394,11 @@ class OSRM:
         destinations: Optional[List[int]] = None,
         dry_run: Optional[bool] = None,
         annotations: Optional[List[str]] = ("duration", "distance"),
+        stream: Optional[bool] = None,
+        array_backend: Optional[str] = None,
+        encode_locations: Optional[bool] = None,
+        hints: Optional[List[Optional[str]]] = None,
+        format: Optional[str] = None,
         **matrix_kwargs,
     ):
         """
@@ -350,6 +451,31 @@ class OSRM:
             One or more of ["duration", "distance"].
         :type annotations: List[str]
 
+        :param stream: Parse the response incrementally while it's downloaded, so that the memory footprint
+            stays close to the size of the resulting matrices. Useful for very large matrices, requires the
+            ijson package. The matrix' ``raw`` attribute is None then. Default False.
+        :type stream: bool
+
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+        :type array_backend: str
+
+        :param encode_locations: Send the locations as polyline with a precision of 6 instead of a list of
+            coordinates, which shortens the URL several-fold for many locations. Default False.
+        :type encode_locations: bool
+
+        :param hints: Hints from previous responses to skip snapping the locations, one per location with None for
+            unknown ones. Default the hints of the router's ``hint_cache``. Streamed responses don't update the
+            ``hint_cache``.
+        :type hints: list of str
+
+        :param format: "flatbuffers" to receive the response as FlatBuffers, whose durations and distances are read
+            straight from the response body. With ``array_backend="numpy"`` the arrays are read-only views on the
+            body, without any copy. The matrix' ``raw`` is the response body then. Can't be combined with ``stream``.
+            Default "json".
+        :type format: str
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
 
@@ -357,16 +483,37 @@ class OSRM:
            Add annotations parameter to get both distance and duration
         """
 
-        coords = convert.delimit_list(
-            [convert.delimit_list([convert.format_float(f) for f in pair]) for pair in locations], ";"
-        )
+        if stream and format == "flatbuffers":
+            raise ValueError("FlatBuffers responses can't be streamed.")
+
+        coords = self._build_coordinates(locations, encode_locations) + self._get_suffix(format)
 
         params = self.get_matrix_params(
-            locations, profile, radiuses, bearings, sources, destinations, annotations, **matrix_kwargs
+            locations,
+            profile,
+            radiuses,
+            bearings,
+            sources,
+            destinations,
+            annotations,
+            self._get_hints(profile, locations, hints),
+            **matrix_kwargs,
         )
 
-        return self.parse_matrix_json(
-            self.client._request(f"/table/v1/{profile}/{coords}", get_params=params, dry_run=dry_run)
+        return self.client._parse(
+            self.parse_matrix_stream
+            if stream
+            else self._capture_hints(
+                self.parse_matrix_flatbuffers if format == "flatbuffers" else self.parse_matrix_json,
+                profile,
+                locations,
+                sources,
+                destinations,
+            ),
+            self.client._request(
+                f"/table/v1/{profile}/{coords}", get_params=params, dry_run=dry_run, stream=stream
+            ),
+            array_backend,
         )
 
     @staticmethod
@@ -378,6 +525,7 @@ class OSRM:
         sources=None,
         destinations=None,
         annotations=("duration", "distance"),
+        hints=None,
         **matrix_kwargs,
     ):
         """
@@ -406,15 +554,105 @@ class OSRM:
         if annotations:
             params["annotations"] = convert.delimit_list(annotations)
 
+        if hints:
+            params["hints"] = convert.delimit_list([hint or "" for hint in hints], ";")
+
         params.update(matrix_kwargs)
 
         return params
 
+    def _get_hints(self, profile, locations, hints=None):
+        """Returns the hints to send, from the hint cache unless given explicitly. None if no hint is known."""
+        if hints is None and self.hint_cache is not None:
+            hints = self.hint_cache.get(profile, locations)
+
+        return hints if hints and any(hints) else None
+
+    def _capture_hints(self, parser, profile, locations, sources=None, destinations=None):
+        """Wraps a parsing function to store the response's hints in the hint cache first."""
+        if self.hint_cache is None:
+            return parser
+
+        def parse(response, *args):
+            if isinstance(response, bytes):
+                self.hint_cache.update(
+                    profile, locations, self._flatbuffers_hints(response), sources, destinations
+                )
+            elif response is not None:
+                self.hint_cache.update(profile, locations, response, sources, destinations)
+            return parser(response, *args)
+
+        return parse
+
     @staticmethod
-    def parse_matrix_json(response):
+    def _flatbuffers_hints(body):
+        """Returns the hints of a FlatBuffers response in the structure of the JSON response."""
+        result = osrm_flatbuffers.Result(body)
+        waypoints = [{"hint": waypoint.hint} for waypoint in result.waypoints]
+        if result.table is None:
+            return {"waypoints": waypoints, "data_version": result.data_version}
+
+        return {
+            "sources": waypoints,
+            "destinations": [{"hint": waypoint.hint} for waypoint in result.table.destinations],
+            "data_version": result.data_version,
+        }
+
+    @staticmethod
+    def _get_suffix(format=None):
+        """Returns the suffix of the URL path selecting the response format."""
+        if format in (None, "json"):
+            return ""
+        elif format == "flatbuffers":
+            return ".flatbuffers"
+
+        raise ValueError("OSRM: parameter format needs one of ['json', 'flatbuffers']")
+
+    @staticmethod
+    def _build_coordinates(locations, encode_locations=None):
+        """Builds the coordinates of the URL path, either as list or as encoded polyline."""
+        if encode_locations:
+            # The polyline may contain URL delimiters like '?'
+            return "polyline6({})".format(quote(utils.encode_polyline6(locations), safe=""))
+
+        return convert.delimit_list(
+            [convert.delimit_list([convert.format_float(f) for f in pair]) for pair in locations], ";"
+        )
+
+    @staticmethod
+    def parse_matrix_json(response, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
 
         return Matrix(
-            durations=response.get("durations"), distances=response.get("distances"), raw=response
+            durations=response.get("durations"),
+            distances=response.get("distances"),
+            raw=response,
+            array_backend=array_backend,
+        )
+
+    @staticmethod
+    def parse_matrix_stream(body, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        with streaming.closing_body(body):
+            members = streaming.parse_members(body, ("durations", "distances"))
+        return Matrix(
+            durations=members.get("durations"),
+            distances=members.get("distances"),
+            array_backend=array_backend,
+        )
+
+    @staticmethod
+    def parse_matrix_flatbuffers(body, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        table = osrm_flatbuffers.Result(body).table
+        return Matrix(
+            durations=table.durations(array_backend),
+            distances=table.distances(array_backend),
+            raw=body,
+            array_backend=array_backend,
         )
@@ -18,24 +18,31 @@
 from operator import itemgetter
 from typing import List, Optional, Sequence, Union  # noqa: F401
 
-from .. import utils
+from .. import streaming, utils, valhalla_protobuf
+from ..batch import BatchMixin
 from ..client_base import DEFAULT
 from ..client_default import Client
 from ..direction import Direction
 from ..expansion import Edge, Expansions
 from ..isochrone import Isochrone, Isochrones
-from ..matrix import Matrix
+from ..matrix import Matrix, to_array
 from ..valhalla_attributes import MatchedResults
 
 
-class Valhalla:
+class Valhalla(BatchMixin):
     """Performs requests to a Valhalla instance."""
 
     _DEFAULT_BASE_URL = "https://valhalla1.openstreetmap.de"
+    # Valhalla's default max_matrix_location_pairs of 2500
+    _MATRIX_TILE_SIZE = (50, 50)
+    # Valhalla's JSON output converts meters with these factors
+    _UNITS_PER_METER = {"km": 0.001, "mi": 0.000621371}
+    # Pairs without a route have Valhalla's maximum cost, far beyond any real travel time
+    _UNREACHABLE_TIME = 16777215.0
 
     def __init__(
         self,
-        base_url: str = _DEFAULT_BASE_URL,
+        base_url: Union[str, List[str]] = _DEFAULT_BASE_URL,
         user_agent: Optional[str] = None,
         timeout: Optional[Union[int, None]] = DEFAULT,
         retry_timeout: Optional[int] = None,
@@ -48,7 +55,8 @@ class Valhalla:
         Initializes a Valhalla client.
 
         :param base_url: The base URL for the request. Defaults to the public OSM
-            server. Should not have a trailing slash.
+            server. Should not have a trailing slash. Pass a list of base URLs to balance the requests
+            between several replicas, see ``balancing`` in :class:`routingpy.client_default.Client`.
 
         :param user_agent: User Agent to be used when requesting.
             Default :attr:`routingpy.routers.options.default_user_agent`.
@@ -124,6 +132,8 @@ class Valhalla:
         date_time: Optional[dict] = None,
         id: Optional[Union[str, int, float]] = None,
         dry_run: Optional[bool] = None,
+        metrics_only: Optional[bool] = None,
+        format: Optional[str] = None,
         **kwargs
     ):
         """Get directions between an origin point and a destination point.
@@ -178,12 +188,21 @@ class Valhalla:
 
         :param dry_run: Print URL and parameters without sending the request.
 
+        :param metrics_only: Only request duration and distance, without maneuvers, and don't decode the shape.
+            The direction's ``geometry`` is None then. Default False.
+
+        :param format: "pbf" to receive the response as protobuf, which is smaller and faster to decode than JSON.
+            The resulting direction is the same, except that its ``raw`` is the response body. Default "json".
+
         :param kwargs: any additional keyword arguments which will override parameters.
 
         :returns: A route from provided coordinates and restrictions.
         :rtype: :class:`routingpy.direction.Direction`
         """
 
+        if metrics_only:
+            instructions, directions_type = False, "none"
+
         params = self.get_direction_params(
             locations,
             profile,
@@ -199,10 +218,14 @@ class Valhalla:
             id,
             **kwargs
         )
+        if self._check_format(format):
+            params["format"] = format
 
-        return self.parse_direction_json(
+        return self.client._parse(
+            self.parse_direction_pbf if format == "pbf" else self.parse_direction_json,
             self.client._request("/route", post_params=params, dry_run=dry_run),
             units,
+            metrics_only,
         )
 
     @staticmethod
@@ -265,19 +288,45 @@ class Valhalla:
         return params
 
     @staticmethod
-    def parse_direction_json(response, units):
+    def parse_direction_json(response, units, metrics_only=None):
         if response is None:  # pragma: no cover
             return Direction()
 
-        geometry, duration, distance = [], 0, 0
+        shapes, duration, distance = [], 0, 0
         for leg in response["trip"]["legs"]:
-            geometry.extend(utils.decode_polyline6(leg["shape"]))
+            shapes.append(leg["shape"])
             duration += leg["summary"]["time"]
 
             factor = 0.621371 if units == "mi" else 1
             distance += int(leg["summary"]["length"] * 1000 * factor)
 
-        return Direction(geometry=geometry, duration=int(duration), distance=int(distance), raw=response)
+        return Direction(
+            geometry=None if metrics_only else utils.EncodedPolyline(shapes, 6),
+            duration=int(duration),
+            distance=int(distance),
+            raw=response,
+        )
+
+    @staticmethod
+    def parse_direction_pbf(body, units, metrics_only=None):
+        if body is None:  # pragma: no cover
+            return Direction()
+
+        shapes, duration, distance = [], 0, 0
+        for leg in valhalla_protobuf.Api(body).directions.routes[0].legs:
+            shapes.append(leg.shape)
+            # Rounded to the 3 decimals of the JSON output for the same results
+            duration += round(leg.summary.time, 3)
+
+            factor = 0.621371 if units == "mi" else 1
+            distance += int(round(leg.summary.length, 3) * 1000 * factor)
+
+        return Direction(
+            geometry=None if metrics_only else utils.EncodedPolyline(shapes, 6),
+            duration=int(duration),
+            distance=int(distance),
+            raw=body,
+        )
 
     def isochrones(  # noqa: C901
         self,
@@ -386,7 +435,8 @@ class Valhalla:
             **kwargs
         )
 
-        return self.parse_isochrone_json(
+        return self.client._parse(
+            self.parse_isochrone_json,
             self.client._request("/isochrone", post_params=params, dry_run=dry_run),
             intervals,
             locations,
@@ -508,6 +558,10 @@ class Valhalla:
         date_time: Optional[dict] = None,
         id: Optional[str] = None,
         dry_run: Optional[bool] = None,
+        stream: Optional[bool] = None,
+        array_backend: Optional[str] = None,
+        format: Optional[str] = None,
+        verbose: Optional[bool] = None,
         **kwargs
     ):
         """
@@ -556,6 +610,22 @@ class Valhalla:
 
         :param dry_run: Print URL and parameters without sending the request.
 
+        :param stream: Parse the response incrementally while it's downloaded, so that the memory footprint
+            stays close to the size of the resulting matrices. Useful for very large matrices, requires the
+            ijson package. The matrix' ``raw`` attribute is None then. Default False.
+
+        :param array_backend: "numpy" to get durations and distances as float32 :class:`numpy.ndarray` with NaN
+            for missing values, which takes a fraction of the memory of nested lists. Requires numpy. Default nested
+            lists.
+
+        :param format: "pbf" to receive the response as protobuf, which is a fraction of the size of the JSON's
+            per-cell objects and faster to decode. The resulting matrix is the same, except that its ``raw`` is the
+            response body. Can't be combined with ``stream``. Default "json".
+
+        :param verbose: False to request the concise output of flat ``durations`` and ``distances`` arrays instead of
+            one object per cell, which is a fraction of the size and faster to parse. Servers without support for it
+            answer with the verbose output, which is parsed as well. Default the server's default, i.e. verbose.
+
         :returns: A matrix from the specified sources and destinations.
         :rtype: :class:`routingpy.matrix.Matrix`
         """
@@ -572,12 +642,26 @@ class Valhalla:
             units,
             date_time,
             id,
+            verbose,
             **kwargs
         )
+        if self._check_format(format):
+            if stream:
+                raise ValueError("Protobuf responses can't be streamed.")
+            params["format"] = format
+
+        if stream:
+            parser = self.parse_matrix_stream
+        else:
+            parser = self.parse_matrix_pbf if format == "pbf" else self.parse_matrix_json
 
-        return self.parse_matrix_json(
-            self.client._request("/sources_to_targets", post_params=params, dry_run=dry_run),
+        return self.client._parse(
+            parser,
+            self.client._request(
+                "/sources_to_targets", post_params=params, dry_run=dry_run, stream=stream
+            ),
             units,
+            array_backend,
         )
 
     @staticmethod
@@ -593,6 +677,7 @@ class Valhalla:
         units=None,
         date_time=None,
         id=None,
+        verbose=None,
         **kwargs
     ):
         """
@@ -643,28 +728,146 @@ class Valhalla:
         if id:
             params["id"] = id
 
+        if verbose is not None:
+            params["verbose"] = verbose
+
         return params
 
     @staticmethod
-    def parse_matrix_json(response, units):
+    def parse_matrix_json(response, units, array_backend=None):
         if response is None:  # pragma: no cover
             return Matrix()
 
+        sources_to_targets = response["sources_to_targets"]
+        if isinstance(sources_to_targets, dict):
+            # The concise output of verbose=false
+            durations, distances = Valhalla._parse_concise_matrix(
+                sources_to_targets.get("durations") or [],
+                sources_to_targets.get("distances") or [],
+                units,
+                array_backend,
+            )
+        else:
+            durations, distances = Valhalla._parse_matrix_rows(sources_to_targets, units, array_backend)
+
+        return Matrix(
+            durations=durations, distances=distances, raw=response, array_backend=array_backend
+        )
+
+    @staticmethod
+    def parse_matrix_stream(body, units, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        # Either format may come back, concise rows are collected while verbose ones are converted
+        concise = {"durations": [], "distances": []}
+
+        def verbose_rows():
+            for prefix, row in streaming.iter_prefixed_items(
+                body,
+                (
+                    "sources_to_targets.item",
+                    "sources_to_targets.durations.item",
+                    "sources_to_targets.distances.item",
+                ),
+            ):
+                if prefix == "sources_to_targets.item":
+                    yield row
+                else:
+                    concise[prefix.split(".")[1]].append(row)
+
+        # Only one row of per-cell objects is held in memory at a time
+        with streaming.closing_body(body):
+            durations, distances = Valhalla._parse_matrix_rows(verbose_rows(), units, array_backend)
+        if not durations:
+            durations, distances = Valhalla._parse_concise_matrix(
+                concise["durations"], concise["distances"], units, array_backend
+            )
+
+        return Matrix(durations=durations, distances=distances, array_backend=array_backend)
+
+    @staticmethod
+    def _parse_matrix_rows(rows, units, array_backend=None):
         factor = 0.621371 if units == "mi" else 1
-        durations = [
-            [destination["time"] for destination in origin] for origin in response["sources_to_targets"]
-        ]
+        # Convert each row right away, so that no nested lists of the whole matrix are built
+        convert_row = to_array if array_backend == "numpy" else list
+
+        durations = []
+        distances = []
+        for origin in rows:
+            durations.append(convert_row([destination["time"] for destination in origin]))
+            distances.append(
+                convert_row(
+                    [
+                        int(destination["distance"] * 1000 * factor)
+                        if destination["distance"] is not None
+                        else None
+                        for destination in origin
+                    ]
+                )
+            )
+
+        return durations, distances
+
+    @staticmethod
+    def _parse_concise_matrix(duration_rows, distance_rows, units, array_backend=None):
+        factor = 0.621371 if units == "mi" else 1
+        convert_row = to_array if array_backend == "numpy" else list
+
+        durations = [convert_row(row) for row in duration_rows]
         distances = [
-            [
-                int(destination["distance"] * 1000 * factor)
-                if destination["distance"] is not None
-                else None
-                for destination in origin
-            ]
-            for origin in response["sources_to_targets"]
+            convert_row(
+                [int(distance * 1000 * factor) if distance is not None else None for distance in row]
+            )
+            for row in distance_rows
         ]
 
-        return Matrix(durations=durations, distances=distances, raw=response)
+        return durations, distances
+
+    @staticmethod
+    def parse_matrix_pbf(body, units, array_backend=None):
+        if body is None:  # pragma: no cover
+            return Matrix()
+
+        matrix = valhalla_protobuf.Api(body).matrix
+        n_rows = matrix.from_indices[-1] + 1 if matrix.from_indices else 0
+        n_cols = len(matrix.times) // n_rows if n_rows else 0
+
+        # Same values as from the JSON output, which has integer seconds and distances with 3 decimals
+        scale = Valhalla._UNITS_PER_METER.get(units, Valhalla._UNITS_PER_METER["km"])
+        factor = 0.621371 if units == "mi" else 1
+        convert_row = to_array if array_backend == "numpy" else list
+
+        durations = []
+        distances = []
+        for row in range(n_rows):
+            cells = range(row * n_cols, (row + 1) * n_cols)
+            reachable = [matrix.times[idx] < Valhalla._UNREACHABLE_TIME for idx in cells]
+            durations.append(
+                convert_row(
+                    [int(matrix.times[idx]) if found else None for idx, found in zip(cells, reachable)]
+                )
+            )
+            distances.append(
+                convert_row(
+                    [
+                        int(round(matrix.distances[idx] * scale, 3) * 1000 * factor) if found else None
+                        for idx, found in zip(cells, reachable)
+                    ]
+                )
+            )
+
+        return Matrix(durations=durations, distances=distances, raw=body, array_backend=array_backend)
+
+    @staticmethod
+    def _check_format(format=None):
+        """Returns True if a response format other than the default has to be requested."""
+        if format in (None, "json"):
+            return False
+        elif format == "pbf":
+            return True
+
+        raise ValueError("Valhalla: parameter format needs one of ['json', 'pbf']")
 
     def expansion(
         self,
@@ -727,7 +930,8 @@ class Valhalla:
             id,
             **kwargs
         )
-        return self.parse_expansion_json(
+        return self.client._parse(
+            self.parse_expansion_json,
             self.client._request("/expansion", post_params=params, dry_run=dry_run),
             locations,
             expansion_properties,
@@ -794,6 +998,7 @@ class Valhalla:
         filters_action: Optional[str] = None,
         options: Optional[dict] = None,
         dry_run: Optional[bool] = None,
+        encode_locations: Optional[bool] = None,
         **kwargs
     ) -> MatchedResults:
         """
@@ -817,6 +1022,8 @@ class Valhalla:
             will be filled automatically. For more information, visit:
             https://github.com/valhalla/valhalla/blob/master/docs/api/turn-by-turn/api-reference.md#costing-options
         :param dry_run: Print URL and parameters without sending the request.
+        :param encode_locations: Send the locations as ``encoded_polyline`` instead of a list of points, which
+            shrinks the request several-fold for long traces. Only for plain coordinates, not :class:`Waypoint`.
 
         :raises: ValueError if 'locations' and 'encoded_polyline' was specified
         :returns: A :class:`MatchedResults` object with matched edges and points set.
@@ -825,11 +1032,20 @@ class Valhalla:
             raise ValueError
 
         params = self.get_trace_attributes_params(
-            locations, profile, shape_match, encoded_polyline, filters, filters_action, options, **kwargs
+            locations,
+            profile,
+            shape_match,
+            encoded_polyline,
+            filters,
+            filters_action,
+            options,
+            encode_locations,
+            **kwargs
         )
 
-        return self.parse_trace_attributes_json(
-            self.client._request("/trace_attributes", post_params=params, dry_run=dry_run)
+        return self.client._parse(
+            self.parse_trace_attributes_json,
+            self.client._request("/trace_attributes", post_params=params, dry_run=dry_run),
         )
 
     @classmethod
@@ -842,10 +1058,15 @@ class Valhalla:
         filters: Optional[List[str]] = None,
         filters_action: Optional[str] = None,
         options: Optional[dict] = None,
+        encode_locations: Optional[bool] = None,
         **kwargs
     ):
         params = dict()
-        if locations:
+        if locations and encode_locations:
+            if any(isinstance(location, cls.Waypoint) for location in locations):
+                raise ValueError("Waypoints can't be encoded, only plain coordinates.")
+            params["encoded_polyline"] = utils.encode_polyline6(locations)
+        elif locations:
             params["shape"] = cls._build_locations(locations)
         elif encoded_polyline:
             params["encoded_polyline"] = encoded_polyline
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Incremental parsing of large JSON responses, which requires the optional ``ijson`` package, e.g.
+``pip install routingpy[streaming]``.
+
+The routers use it when requesting a matrix with ``stream=True``: the response body is read in chunks and only
+the matrices themselves are built, without holding the response text or the complete decoded response in
+memory at any time.
+"""
+
+from contextlib import contextmanager
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+
+def _check_ijson():
+    if ijson is None:  # pragma: no cover
+        raise ImportError(
+            "Streamed responses require the ijson package, install it with 'pip install routingpy[streaming]'."
+        )
+
+
+@contextmanager
+def closing_body(body):
+    """
+    Closes a streamed response body once it was parsed, also if parsing failed, and hands its connection back to
+    the client's pool.
+
+    :param body: The JSON document as binary file-like object, e.g. :attr:`requests.Response.raw`.
+    :type body: file-like
+    """
+    try:
+        yield body
+    finally:
+        body.close()
+        # Like requests.Response.close(), urllib3 responses return their connection separately
+        release_conn = getattr(body, "release_conn", None)
+        if release_conn is not None:
+            release_conn()
+
+
+def parse_members(body, members):
+    """
+    Reads a JSON object from a file-like object and returns the selected top-level members. Each member's value
+    is built directly from the stream, other members are only tokenized, no Python objects are built for them.
+
+    :param body: The JSON object as binary file-like object.
+    :type body: file-like
+
+    :param members: The names of the members to return.
+    :type members: iterable of str
+
+    :returns: The values of those selected members which are present.
+    :rtype: dict
+    """
+    # A top-level member's prefix is its name
+    return dict(iter_prefixed_items(body, members))
+
+
+def iter_prefixed_items(body, prefixes):
+    """
+    Yields the values at any of ``prefixes`` one by one in a single pass, together with their prefix, e.g. the
+    rows of matrices whose structure is only known once they're read. Everything else is skipped without
+    building it.
+
+    :param body: The JSON document as binary file-like object.
+    :type body: file-like
+
+    :param prefixes: The ijson prefixes of the values, i.e. their dot-separated paths with ``item`` for array
+        elements, e.g. ``"sources_to_targets.item"`` for the rows of a matrix.
+    :type prefixes: iterable of str
+
+    :returns: Pairs of prefix and item.
+    :rtype: iterator
+    """
+    _check_ijson()
+    prefixes = set(prefixes)
+
+    builder, current = None, None
+    for prefix, event, value in ijson.parse(body, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            # The item ends with the closing event at its own prefix, nested ones have longer prefixes
+            if prefix == current and event in ("end_map", "end_array"):
+                yield current, builder.value
+                builder = None
+        elif prefix in prefixes:
+            if event in ("start_map", "start_array"):
+                builder, current = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            else:
+                yield prefix, value
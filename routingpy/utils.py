@@ -16,9 +16,19 @@
 #
 
 import logging
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 logger = logging.getLogger("routingpy")
 
+#: Polylines with at least this many characters are decoded and encoded with numpy, if installed. Below
+#: that the pure Python implementation is faster.
+VECTORIZE_MIN_LENGTH = 200
+
 
 def _trans(value, index):
     """
@@ -46,6 +56,13 @@ def _decode(expression, precision=5, is3d=False, order="lnglat"):
 
     https://github.com/hicsail/polyline/commit/ddd12e85c53d394404952754e39c91f63a808656
     """
+    _check_order(order)
+
+    if np is not None and len(expression) >= VECTORIZE_MIN_LENGTH:
+        coordinates = _decode_vectorized(expression, precision, is3d, order)
+        if coordinates is not None:
+            return coordinates
+
     coordinates, index, lat, lng, z, length, factor = (
         [],
         0,
@@ -55,24 +72,83 @@ def _decode(expression, precision=5, is3d=False, order="lnglat"):
         len(expression),
         float(10**precision),
     )
+    latlng = order == "latlng"
 
     while index < length:
         lat_change, index = _trans(expression, index)
         lng_change, index = _trans(expression, index)
         lat += lat_change
         lng += lng_change
+        coords = (lat / factor, lng / factor) if latlng else (lng / factor, lat / factor)
         if not is3d:
-            coordinates.append(_get_coords(lat, lng, factor, order=order))
+            coordinates.append(coords)
         else:
             z_change, index = _trans(expression, index)
             z += z_change
-            coordinates.append((*_get_coords(lat, lng, factor, order=order), z / 100))
+            coordinates.append((*coords, z / 100))
 
     return coordinates
 
 
+def _decode_vectorized(expression, precision=5, is3d=False, order="lnglat"):
+    """
+    Decodes a polyline with numpy in a few passes over the whole string instead of one Python iteration
+    per character. The result is identical to the pure Python decoder, as both divide the same integers.
+
+    Returns None for input the vectorized decoder can't handle, i.e. non-ASCII or truncated polylines,
+    so that the pure Python decoder raises the usual error.
+    """
+    columns = _decode_columns(expression, precision, is3d, order)
+    if columns is None:
+        return None
+
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+def _decode_columns(expression, precision=5, is3d=False, order="lnglat"):
+    """Decodes a polyline with numpy to one float64 array per coordinate component, in the requested order.
+
+    Returns None for input the vectorized decoder can't handle.
+    """
+    try:
+        buffer = expression.encode("ascii")
+    except UnicodeEncodeError:
+        return None
+
+    chunks = np.frombuffer(buffer, dtype=np.uint8).astype(np.int64) - 63
+
+    # Each value is a sequence of 5 bit chunks, the last one without the continuation bit 0x20
+    ends = np.flatnonzero(chunks < 0x20)
+    dimensions = 3 if is3d else 2
+    if not len(ends) or ends[-1] != len(chunks) - 1 or len(ends) % dimensions:
+        return None
+
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Values beyond 60 bit would overflow
+    if (ends - starts).max() >= 12:
+        return None
+    shifts = (np.arange(len(chunks)) - np.repeat(starts, ends - starts + 1)) * 5
+    values = np.add.reduceat((chunks & 0x1F) << shifts, starts)
+
+    # Undo the zigzag encoding of the sign and the delta encoding
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+    values = np.cumsum(values.reshape(-1, dimensions), axis=0)
+
+    factor = float(10**precision)
+    columns = [values[:, 0] / factor, values[:, 1] / factor]
+    if order == "lnglat":
+        columns.reverse()
+    if is3d:
+        columns.append(values[:, 2] / 100)
+
+    return columns
+
+
 def decode_polyline5(polyline, is3d=False, order="lnglat"):
     """Decodes an encoded polyline string which was encoded with a precision of 5.
+    Polylines of at least :data:`VECTORIZE_MIN_LENGTH` characters are decoded with numpy, if installed.
 
     :param polyline: An encoded polyline, only the geometry.
     :type polyline: str
@@ -93,6 +169,7 @@ def decode_polyline5(polyline, is3d=False, order="lnglat"):
 
 def decode_polyline6(polyline, is3d=False, order="lnglat"):
     """Decodes an encoded polyline string which was encoded with a precision of 6.
+    Polylines of at least :data:`VECTORIZE_MIN_LENGTH` characters are decoded with numpy, if installed.
 
     :param polyline: An encoded polyline, only the geometry.
     :type polyline: str
@@ -112,6 +189,151 @@ def decode_polyline6(polyline, is3d=False, order="lnglat"):
     return _decode(polyline, precision=6, is3d=is3d, order=order)
 
 
+def _round(value):
+    """Rounds half away from zero like the reference implementation, unlike Python's round()."""
+    return int(math.copysign(math.floor(abs(value) + 0.5), value))
+
+
+def _encode_value(value, chunks):
+    # Zigzag encode the sign into the lowest bit, then split into 5 bit chunks
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+
+
+def _encode(coordinates, precision=5, is3d=False, order="lnglat"):
+    _check_order(order)
+
+    # About 5 characters per point
+    if np is not None and len(coordinates) * 5 >= VECTORIZE_MIN_LENGTH:
+        return _encode_vectorized(coordinates, precision, is3d, order)
+
+    factor = 10**precision
+    lat_index, lng_index = (0, 1) if order == "latlng" else (1, 0)
+    chunks = []
+    previous = [0, 0, 0]
+
+    for coord in coordinates:
+        values = [_round(coord[lat_index] * factor), _round(coord[lng_index] * factor)]
+        if is3d:
+            values.append(_round(coord[2] * 100))
+        for i, value in enumerate(values):
+            _encode_value(value - previous[i], chunks)
+        previous = values
+
+    return "".join(chunks)
+
+
+def _encode_vectorized(coordinates, precision=5, is3d=False, order="lnglat"):
+    """Encodes coordinates with numpy, the result is identical to the pure Python encoder."""
+    dimensions = 3 if is3d else 2
+    coordinates = np.asarray(coordinates, dtype=np.float64)[:, :dimensions]
+    if order == "lnglat":
+        coordinates = coordinates[:, [1, 0, 2][:dimensions]]
+    coordinates = coordinates * np.array(
+        [10**precision, 10**precision, 100][:dimensions], dtype=np.float64
+    )
+
+    values = (np.sign(coordinates) * np.floor(np.abs(coordinates) + 0.5)).astype(np.int64)
+    values = np.diff(values, axis=0, prepend=0).ravel()
+    values = (values << 1) ^ (values >> 63)
+
+    # Split each value into 5 bit chunks, up to the highest set bit but at least one
+    shifted = values[:, np.newaxis] >> np.arange(0, 60, 5, dtype=np.int64)
+    n_chunks = np.maximum(1, np.count_nonzero(shifted, axis=1))
+    position = np.arange(shifted.shape[1])
+    chunks = shifted & 0x1F
+    chunks[position < (n_chunks - 1)[:, np.newaxis]] |= 0x20
+    keep = position < n_chunks[:, np.newaxis]
+
+    return (chunks[keep] + 63).astype(np.uint8).tobytes().decode("ascii")
+
+
+def encode_polyline5(coordinates, is3d=False, order="lnglat"):
+    """Encodes coordinates to a polyline string with a precision of 5.
+
+    :param coordinates: The coordinates to encode.
+    :type coordinates: list of list
+
+    :param is3d: Specifies if the coordinates contain a Z component, which is encoded with a precision of 2.
+        Default False.
+    :type is3d: bool
+
+    :param order: Specifies the order of the coordinates' components.
+                  Options: latlng, lnglat. Defaults to 'lnglat'.
+    :type order: str
+
+    :returns: The encoded polyline.
+    :rtype: str
+    """
+    return _encode(coordinates, precision=5, is3d=is3d, order=order)
+
+
+def encode_polyline6(coordinates, is3d=False, order="lnglat"):
+    """Encodes coordinates to a polyline string with a precision of 6.
+
+    :param coordinates: The coordinates to encode.
+    :type coordinates: list of list
+
+    :param is3d: Specifies if the coordinates contain a Z component, which is encoded with a precision of 2.
+        Default False.
+    :type is3d: bool
+
+    :param order: Specifies the order of the coordinates' components.
+                  Options: latlng, lnglat. Defaults to 'lnglat'.
+    :type order: str
+
+    :returns: The encoded polyline.
+    :rtype: str
+    """
+    return _encode(coordinates, precision=6, is3d=is3d, order=order)
+
+
+class EncodedPolyline(object):
+    """
+    One or more encoded polylines, e.g. of a route's legs, which are only decoded when needed.
+    :class:`routingpy.direction.Direction` decodes them on first access of its ``geometry``.
+    """
+
+    __slots__ = ("polylines", "precision", "is3d", "order")
+
+    def __init__(self, polylines, precision=5, is3d=False, order="lnglat"):
+        """
+        :param polylines: An encoded polyline or a list of them, whose coordinates are concatenated.
+        :type polylines: str or list of str
+
+        :param precision: The precision the polylines were encoded with, 5 or 6. Default 5.
+        :type precision: int
+
+        :param is3d: Specifies if the polylines contain a Z component. Default False.
+        :type is3d: bool
+
+        :param order: Specifies the order in which the coordinates are returned.
+                      Options: latlng, lnglat. Defaults to 'lnglat'.
+        :type order: str
+        """
+        self.polylines = [polylines] if isinstance(polylines, str) else polylines
+        self.precision = precision
+        self.is3d = is3d
+        self.order = order
+
+    def decode(self):
+        """Decodes and concatenates the polylines.
+
+        :rtype: list
+        """
+        coordinates = []
+        for polyline in self.polylines:
+            coordinates.extend(_decode(polyline, self.precision, self.is3d, self.order))
+
+        return coordinates
+
+    def __repr__(self):  # pragma: no cover
+        return "EncodedPolyline({}, {})".format(self.polylines, self.precision)
+
+
 def get_ordinal(number):
     """Produces an ordinal (1st, 2nd, 3rd, 4th) from a number"""
 
@@ -125,8 +347,6 @@ def get_ordinal(number):
         return "th"
 
 
-def _get_coords(lat, lng, factor, order="lnglat"):
-    """Determines coordinate order."""
+def _check_order(order):
     if order not in ("lnglat", "latlng"):
         raise ValueError(f"order must be either 'latlng' or 'lnglat', not {order}.")
-    return (lat / factor, lng / factor) if order == "latlng" else (lng / factor, lat / factor)
@@ -18,7 +18,8 @@
 from enum import Enum
 from typing import List, Optional, Tuple, Union
 
-from routingpy.utils import decode_polyline6
+from routingpy.geometry import convert_geometry
+from routingpy.utils import EncodedPolyline
 
 
 class MatchDiscontinuity(str, Enum):
@@ -113,7 +114,7 @@ class MatchedEdge:
     """
 
     def __init__(self, edge: dict, coords: List[List[float]]):
-        self._geometry = coords
+        self._geometry = convert_geometry(coords)
         self._traversability: Optional[Traversability] = (
             Traversability(edge.get("traversability", "")) or None
         )
@@ -148,7 +149,7 @@ class MatchedEdge:
     @property
     def geometry(self) -> List[List[float]]:
         """
-        The geometry of the edge as [[lon1, lat1], [lon2, lat2]] list.
+        The geometry of the edge as [[lon1, lat1], [lon2, lat2]] list or :class:`routingpy.geometry.Geometry`.
         """
         return self._geometry
 
@@ -374,7 +375,8 @@ class MatchedResults:
         if not response:
             return
 
-        geometry = decode_polyline6(response["shape"])
+        # Edges share the buffer of array-backed geometries
+        geometry = convert_geometry(EncodedPolyline(response["shape"], 6))
         # fill the edges
         for edge in response["edges"]:
             coords: List[List[float]] = geometry[
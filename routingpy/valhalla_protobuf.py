@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""
+Reader for Valhalla's protobuf responses, which are requested with ``"format": "pbf"``. The message definitions
+below are the subset of Valhalla's ``proto/*.proto`` routingpy needs, so neither the protobuf package nor generated
+code is required. Unknown fields are skipped.
+
+>>> api = Api(body)
+>>> api.directions.routes[0].legs[0].summary.time
+1234.5
+"""
+import struct
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: The content type of Valhalla's protobuf responses.
+CONTENT_TYPE = "application/x-protobuf"
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_FIXED32 = 5
+
+_SCALARS = {
+    "uint32": _VARINT,
+    "uint64": _VARINT,
+    "enum": _VARINT,
+    "bool": _VARINT,
+    "float": _FIXED32,
+    "double": _FIXED64,
+}
+_F32 = struct.Struct("<f")
+_F64 = struct.Struct("<d")
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_packed(buf, start, end, field_type):
+    """Reads a packed repeated scalar field."""
+    if _SCALARS[field_type] == _FIXED32:
+        values = array("f")
+        values.frombytes(bytes(buf[start:end]))
+        return values.tolist()
+    elif _SCALARS[field_type] == _FIXED64:
+        values = array("d")
+        values.frombytes(bytes(buf[start:end]))
+        return values.tolist()
+
+    if np is not None and end - start > 64:
+        return _read_packed_varints_vectorized(buf, start, end)
+
+    values = []
+    pos = start
+    while pos < end:
+        value, pos = _read_varint(buf, pos)
+        values.append(value)
+    return values
+
+
+def _read_packed_varints_vectorized(buf, start, end):
+    data = np.frombuffer(buf, dtype=np.uint8, count=end - start, offset=start)
+    # Each value ends with the first byte without continuation bit
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = 7 * (np.arange(len(data)) - np.repeat(starts, ends - starts + 1))
+    chunks = (data & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.add.reduceat(chunks, starts).tolist()
+
+
+class Message(object):
+    """
+    A protobuf message, decoded on construction. Subclasses define their fields in ``FIELDS`` as
+    ``{number: (name, type, repeated)}``, where the type is a scalar type name, "string" or a :class:`Message`
+    subclass. Fields which aren't set have their proto3 default, repeated ones an empty list.
+    """
+
+    FIELDS = {}
+
+    def __init__(self, buf, start=0, end=None):
+        """
+        :param buf: The serialized message, e.g. the response body.
+        :type buf: bytes or bytearray or memoryview
+
+        :param start: Where the message starts in ``buf``. Default 0.
+        :type start: int
+
+        :param end: Where the message ends in ``buf``. Default the end of ``buf``.
+        :type end: int
+        """
+        for name, field_type, repeated in self.FIELDS.values():
+            setattr(self, name, [] if repeated else self._default(field_type))
+
+        end = len(buf) if end is None else end
+        pos = start
+        while pos < end:
+            key, pos = _read_varint(buf, pos)
+            number, wire_type = key >> 3, key & 0x7
+            value, pos = self._read_value(buf, pos, wire_type)
+
+            field = self.FIELDS.get(number)
+            if field is None:
+                continue
+            name, field_type, repeated = field
+
+            if wire_type == _LENGTH_DELIMITED and field_type in _SCALARS:
+                # Packed repeated scalars
+                getattr(self, name).extend(_read_packed(buf, value[0], value[1], field_type))
+                continue
+
+            value = self._convert(buf, value, field_type)
+            if repeated:
+                getattr(self, name).append(value)
+            else:
+                setattr(self, name, value)
+
+    @staticmethod
+    def _default(field_type):
+        if field_type == "string":
+            return ""
+        elif field_type in ("float", "double"):
+            return 0.0
+        elif field_type == "bool":
+            return False
+        elif field_type in _SCALARS:
+            return 0
+        return None
+
+    @staticmethod
+    def _read_value(buf, pos, wire_type):
+        if wire_type == _VARINT:
+            return _read_varint(buf, pos)
+        elif wire_type == _FIXED64:
+            return buf[pos : pos + 8], pos + 8
+        elif wire_type == _LENGTH_DELIMITED:
+            length, pos = _read_varint(buf, pos)
+            return (pos, pos + length), pos + length
+        elif wire_type == _FIXED32:
+            return buf[pos : pos + 4], pos + 4
+
+        raise ValueError("Unsupported protobuf wire type {}.".format(wire_type))
+
+    @staticmethod
+    def _convert(buf, value, field_type):
+        if field_type == "float":
+            return _F32.unpack(value)[0]
+        elif field_type == "double":
+            return _F64.unpack(value)[0]
+        elif field_type == "bool":
+            return bool(value)
+        elif field_type == "string":
+            return bytes(buf[value[0] : value[1]]).decode("utf-8")
+        elif isinstance(field_type, type) and issubclass(field_type, Message):
+            return field_type(buf, value[0], value[1])
+        return value
+
+
+class Summary(Message):
+    """``valhalla.DirectionsLeg.Summary``: the leg's ``length`` in the request's units and ``time`` in seconds."""
+
+    FIELDS = {1: ("length", "float", False), 2: ("time", "double", False)}
+
+
+class DirectionsLeg(Message):
+    """``valhalla.DirectionsLeg``: the leg's ``summary`` and its ``shape`` as polyline with precision 6."""
+
+    FIELDS = {5: ("summary", Summary, False), 7: ("shape", "string", False)}
+
+
+class DirectionsRoute(Message):
+    """``valhalla.DirectionsRoute``"""
+
+    FIELDS = {1: ("legs", DirectionsLeg, True)}
+
+
+class Directions(Message):
+    """``valhalla.Directions``"""
+
+    FIELDS = {1: ("routes", DirectionsRoute, True)}
+
+
+class Matrix(Message):
+    """``valhalla.Matrix``: ``distances`` in meters and ``times`` in seconds for each pair of source and target,
+    source by source, with the indices of each cell's source and target."""
+
+    FIELDS = {
+        2: ("distances", "uint32", True),
+        3: ("times", "float", True),
+        4: ("from_indices", "uint32", True),
+        5: ("to_indices", "uint32", True),
+    }
+
+
+class Api(Message):
+    """``valhalla.Api``, the root of every response."""
+
+    FIELDS = {3: ("directions", Directions, False), 5: ("matrix", Matrix, False)}
@@ -41,6 +41,12 @@ setup(
     url="https://github.com/gis-ops/routing-py",
     packages=find_packages(exclude=["*tests*"]),
     install_requires=["requests>=2.20.0"],
+    extras_require={
+        "async": ["aiohttp>=3.8.0"],
+        "speedups": ["orjson>=3.8.0"],
+        "streaming": ["ijson>=3.1"],
+        "numpy": ["numpy>=1.20"],
+    },
     license="Apache 2.0",
     classifiers=[
         "License :: OSI Approved :: Apache Software License",
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the balancer module."""
+
+import random
+import time
+
+import responses
+
+import tests as _test
+from routingpy import OSRM
+from routingpy.balancer import EndpointPool
+from routingpy.retry import RetryPolicy
+from tests.test_helper import *
+
+
+class EndpointPoolTest(_test.TestCase):
+    def test_round_robin(self):
+        pool = EndpointPool(["a", "b", "c"])
+        picked = [pool.acquire().url for _ in range(6)]
+        self.assertEqual(["a", "b", "c", "a", "b", "c"], picked)
+        self.assertEqual(["a", "b", "c"], pool.urls)
+
+    def test_least_outstanding(self):
+        pool = EndpointPool(["a", "b"], strategy="least_outstanding")
+        a = pool.acquire()
+        self.assertEqual("a", a.url)
+
+        b = pool.acquire()
+        self.assertEqual("b", b.url)
+        pool.release(b, 0.1)
+
+        # a is still busy
+        self.assertEqual("b", pool.acquire().url)
+        self.assertEqual(1, pool.stats["a"]["outstanding"])
+
+    def test_latency(self):
+        random.seed(0)
+        pool = EndpointPool(["fast", "slow"], strategy="latency", latency_decay=0.5)
+        fast, slow = pool.endpoints
+
+        def measure(endpoint, latency):
+            endpoint.outstanding += 1
+            pool.release(endpoint, latency)
+
+        measure(fast, 0.01)
+        measure(fast, 0.03)
+        self.assertAlmostEqual(0.02, fast.latency)
+        self.assertIsNone(slow.latency)
+
+        # Unmeasured replicas count as the fastest
+        picked = [pool.acquire() for _ in range(100)]
+        self.assertGreater(sum(endpoint is slow for endpoint in picked), 30)
+
+        for endpoint in picked:
+            pool.release(endpoint)
+        measure(slow, 1.0)
+        picked = [pool.acquire().url for _ in range(1000)]
+        self.assertGreater(picked.count("fast"), 900)
+        self.assertGreater(picked.count("slow"), 0)
+
+    def test_ejection(self):
+        pool = EndpointPool(["a", "b"], max_failures=2, cooldown=0.1)
+        a, b = pool.endpoints
+
+        pool.release(pool.acquire(), failed=True)
+        pool.release(pool.acquire(), failed=False)
+        pool.release(pool.acquire(), failed=True)
+        self.assertTrue(pool.stats["a"]["ejected"])
+        self.assertEqual(["b", "b"], [pool.acquire().url for _ in range(2)])
+
+        # Back on probation after the cooldown
+        time.sleep(0.1)
+        self.assertFalse(pool.stats["a"]["ejected"])
+        self.assertEqual({"a", "b"}, {pool.acquire().url, pool.acquire().url})
+        pool.release(a, failed=True)
+        pool.release(b)
+        self.assertTrue(pool.stats["a"]["ejected"])
+        self.assertEqual(2, a.ejections)
+
+        # Without any replica in rotation, the one returning first is used
+        b._consecutive_failures = 1
+        pool.release(b, failed=True)
+        self.assertEqual("a", pool.acquire().url)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            EndpointPool([])
+        with self.assertRaises(ValueError):
+            EndpointPool(["a"], strategy="random")
+
+
+class ClientBalancingTest(_test.TestCase):
+    name = "osrm"
+    base_urls = ["https://osrm-1.test", "https://osrm-2.test", "https://osrm-3.test"]
+
+    def add_responses(self, status_by_url):
+        for base_url, status in status_by_url.items():
+            responses.add(
+                responses.GET,
+                base_url + "/table/v1/walking/8.688641,49.420577;8.680916,49.415776;8.780916,49.445776",
+                status=status,
+                json=ENDPOINTS_RESPONSES[self.name]["matrix"] if status == 200 else {"message": "Down"},
+                content_type="application/json",
+            )
+
+    def called_urls(self):
+        return [call.request.url.split("/table")[0] for call in responses.calls]
+
+    @responses.activate
+    def test_round_robin(self):
+        self.add_responses(dict.fromkeys(self.base_urls, 200))
+        router = OSRM(self.base_urls)
+        self.assertEqual(self.base_urls[0], router.client.base_url)
+
+        for _ in range(6):
+            router.matrix(**ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        self.assertEqual(self.base_urls * 2, self.called_urls())
+        stats = router.client.endpoint_pool.stats
+        for base_url in self.base_urls:
+            self.assertEqual(2, stats[base_url]["requests"])
+            self.assertIsNotNone(stats[base_url]["latency"])
+
+    @responses.activate
+    def test_failover(self):
+        self.add_responses({self.base_urls[0]: 200, self.base_urls[1]: 503, self.base_urls[2]: 200})
+        router = OSRM(
+            self.base_urls,
+            balancing="least_outstanding",
+            retry_policy=RetryPolicy(backoff_factor=0.01),
+        )
+        router.client.endpoint_pool.max_failures = 1
+
+        with self.assertWarns(UserWarning):
+            for _ in range(6):
+                router.matrix(**ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        # The failing replica is out of rotation after its first failure, the retry went elsewhere
+        self.assertEqual(1, self.called_urls().count(self.base_urls[1]))
+        self.assertEqual(7, len(responses.calls))
+        stats = router.client.endpoint_pool.stats[self.base_urls[1]]
+        self.assertEqual(
+            {"requests": 1, "failures": 1, "ejected": True, "ejections": 1},
+            {k: stats[k] for k in ("requests", "failures", "ejected", "ejections")},
+        )
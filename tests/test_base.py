@@ -16,6 +16,7 @@
 #
 """Tests for client module."""
 
+import json
 import time
 
 import requests
@@ -24,7 +25,9 @@ import responses
 import routingpy
 import tests as _test
 from routingpy import client_default
+from routingpy.json_backend import BACKENDS, get_json_backend
 from routingpy.routers import options
+from tests.test_helper import ENDPOINTS_RESPONSES
 
 
 class ClientMock(client_default.Client):
@@ -171,6 +174,21 @@ class BaseTest(_test.TestCase):
         self.assertDictContainsSubset(timeout, client.kwargs)
         self.assertDictContainsSubset(headers["headers"], client.kwargs["headers"])
 
+    def test_connection_pool(self):
+        client = ClientMock("https://httpbin.org", pool_connections=2, pool_maxsize=50, pool_block=True)
+        adapter = client.session.get_adapter("https://httpbin.org")
+        self.assertEqual(2, adapter._pool_connections)
+        self.assertEqual(50, adapter._pool_maxsize)
+        self.assertTrue(adapter._pool_block)
+        self.assertNotIn("Connection", client.headers)
+
+        # Routers can share one pooled session
+        osrm = routingpy.OSRM("https://httpbin.org", session=client.session)
+        valhalla = routingpy.Valhalla("https://httpbin.org", session=client.session, keep_alive=False)
+        self.assertIs(osrm.client.session, valhalla.client.session)
+        self.assertEqual("close", valhalla.client.headers["Connection"])
+        self.assertNotIn("session", valhalla.client.kwargs)
+
     @responses.activate
     def test_req_property(self):
         # Test if the req property is a PreparedRequest
@@ -187,3 +205,53 @@ class BaseTest(_test.TestCase):
 
         assert isinstance(self.client.req, requests.PreparedRequest)
         self.assertEqual("https://httpbin.org/routes?a=b", self.client.req.url)
+
+    def test_json_backends(self):
+        with self.assertRaises(ValueError):
+            get_json_backend("yaml")
+
+        self.assertIn(get_json_backend().name, BACKENDS)
+        for name in BACKENDS:
+            try:
+                backend = get_json_backend(name)
+            except ImportError:
+                continue
+
+            for responses_ in ENDPOINTS_RESPONSES.values():
+                for response in responses_.values():
+                    encoded = backend.dumps(response)
+                    self.assertIsInstance(encoded, bytes)
+                    self.assertEqual(response, backend.loads(encoded))
+                    self.assertEqual(response, json.loads(encoded))
+
+            with self.assertRaises(ValueError):
+                backend.loads(b"{'no': json")
+
+    @responses.activate
+    def test_json_backend_client(self):
+        responses.add(
+            responses.POST,
+            "https://httpbin.org/routes",
+            body='{"a": [1.5, null, "\u00fc"]}',
+            status=200,
+            content_type="application/json",
+        )
+        responses.add(
+            responses.GET,
+            "https://httpbin.org/invalid",
+            body="{'no': json",
+            status=200,
+            content_type="application/json",
+        )
+
+        client = ClientMock("https://httpbin.org", json_backend="json")
+        self.assertEqual("json", client.json_backend.name)
+        self.assertEqual(
+            {"a": [1.5, None, "\u00fc"]},
+            client.directions(url="/routes", post_params={"b": "\u00fc", "c": [1]}),
+        )
+        self.assertEqual({"b": "\u00fc", "c": [1]}, json.loads(responses.calls[0].request.body))
+        self.assertEqual("application/json", responses.calls[0].request.headers["Content-Type"])
+
+        with self.assertRaises(routingpy.exceptions.JSONParseError):
+            client.directions(url="/invalid")
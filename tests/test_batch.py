@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the batch module."""
+
+import json
+import unittest
+from copy import deepcopy
+from urllib.parse import parse_qs
+
+import responses
+
+import routingpy
+import tests as _test
+from routingpy import OSRM, Google, MapboxOSRM, OpenTripPlannerV2, Valhalla
+from routingpy.batch import run_many
+from routingpy.direction import ChunkedDirection, Direction
+from routingpy.isochrone import Isochrones
+from routingpy.matrix import Matrix, TiledMatrix
+from tests.test_helper import *
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class BatchTest(_test.TestCase):
+    name = "valhalla"
+
+    def setUp(self):
+        self.router = Valhalla("https://api.mapbox.com/valhalla/v1")
+
+    def test_run_many_order(self):
+        results = run_many(lambda x, y=0: x + y, [(3,), {"x": 1}, (2,)], max_workers=2, y=10)
+        self.assertEqual([13, 11, 12], results)
+
+        # A list could be positional arguments or e.g. a single location
+        with self.assertRaises(TypeError):
+            run_many(lambda x: x, [[8.5, 47.3]])
+
+    def test_unsupported(self):
+        router = OpenTripPlannerV2()
+        with self.assertRaises(NotImplementedError):
+            router.matrix_many([{"locations": [[0, 0], [1, 1]]}])
+        with self.assertRaises(NotImplementedError):
+            router.matrix_tiled([[0, 0], [1, 1]], tile_size=1)
+
+    def test_run_many_exceptions(self):
+        def func(x):
+            if x == 1:
+                raise ValueError(x)
+            return x
+
+        with self.assertRaises(ValueError):
+            run_many(func, [(0,), (1,), (2,)])
+
+        results = run_many(func, [(0,), (1,), (2,)], return_exceptions=True)
+        self.assertEqual(0, results[0])
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(2, results[2])
+
+        with self.assertRaises(TypeError):
+            run_many(func, [0])
+
+    @responses.activate
+    def test_directions_many(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        profile = query.pop("profile")
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        queries = [dict(query, id=idx) for idx in range(1, 11)]
+        routes = self.router.directions_many(queries, max_workers=4, profile=profile)
+
+        self.assertEqual(10, len(responses.calls))
+        self.assertEqual(
+            list(range(1, 11)),
+            sorted(json.loads(call.request.body)["id"] for call in responses.calls),
+        )
+        self.assertEqual(10, len(routes))
+        for route in routes:
+            self.assertIsInstance(route, Direction)
+            self.assertEqual(150, route.duration)
+
+    @responses.activate
+    def test_matrix_many_api_error(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=400,
+            json={"error": "no route"},
+            content_type="application/json",
+        )
+
+        # Only the first call succeeds, responses repeats the last registered one afterwards
+        results = self.router.matrix_many([query, query, query], max_workers=1, return_exceptions=True)
+        self.assertIsInstance(results[0], Matrix)
+        self.assertIsInstance(results[1], routingpy.exceptions.RouterApiError)
+        self.assertIsInstance(results[2], routingpy.exceptions.RouterApiError)
+
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", skip_api_error=True)
+        with self.assertWarns(UserWarning):
+            results = router.matrix_many([query, query], max_workers=1)
+        for result in results:
+            self.assertIsInstance(result, Matrix)
+            self.assertIsNone(result.durations)
+
+    @responses.activate
+    def test_isochrones_many(self):
+        query = ENDPOINTS_QUERIES[self.name]["isochrones"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/isochrone",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["isochrones"],
+            content_type="application/json",
+        )
+
+        results = self.router.isochrones_many([query] * 3)
+        self.assertEqual(3, len(responses.calls))
+        for result in results:
+            self.assertIsInstance(result, Isochrones)
+
+    @staticmethod
+    def _add_tiled_matrix_responses():
+        def matrix_response(request):
+            body = json.loads(request.body)
+            # Location i is at [i, 0], the duration from i to j is 100 * i + j
+            if any(source["lon"] == 6 for source in body["sources"]):
+                return 400, {}, json.dumps({"error": "no route"})
+            return (
+                200,
+                {},
+                json.dumps(
+                    {
+                        "sources_to_targets": [
+                            [
+                                {"time": 100 * source["lon"] + target["lon"], "distance": 1}
+                                for target in body["targets"]
+                            ]
+                            for source in body["sources"]
+                        ]
+                    }
+                ),
+            )
+
+        responses.add_callback(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            callback=matrix_response,
+            content_type="application/json",
+        )
+
+    @responses.activate
+    def test_matrix_tiled(self):
+        self._add_tiled_matrix_responses()
+
+        locations = [[i, 0] for i in range(8)]
+        sources = [0, 2, 3, 4, 6, 7]
+        destinations = [5, 1, 0, 3, 2]
+        matrix = self.router.matrix_tiled(
+            locations,
+            "auto",
+            sources=sources,
+            destinations=destinations,
+            tile_size=(2, 3),
+            max_workers=1,
+        )
+
+        # 3 x 2 tiles, each only with the locations it needs
+        self.assertIsInstance(matrix, TiledMatrix)
+        self.assertEqual(6, len(responses.calls))
+        self.assertEqual(6, len(matrix.tiles))
+        body = json.loads(responses.calls[0].request.body)
+        self.assertEqual([[0, 0], [2, 0]], [[loc["lon"], loc["lat"]] for loc in body["sources"]])
+        self.assertEqual([[5, 0], [1, 0], [0, 0]], [[loc["lon"], loc["lat"]] for loc in body["targets"]])
+
+        # The tiles with source 6 failed
+        self.assertEqual(2, len(matrix.failed_tiles))
+        for tile in matrix.failed_tiles:
+            self.assertEqual([6, 7], tile.sources)
+            self.assertIsInstance(tile.error, routingpy.exceptions.RouterApiError)
+
+        expected = [[100 * i + j for j in destinations] for i in sources]
+        expected[4] = expected[5] = [None] * len(destinations)
+        self.assertEqual(expected, matrix.durations)
+        self.assertEqual([[1000] * len(destinations)] * 4 + expected[4:], matrix.distances)
+
+        with self.assertRaises(routingpy.exceptions.RouterApiError):
+            self.router.matrix_tiled(
+                locations, "auto", sources=sources, tile_size=2, raise_on_error=True
+            )
+
+    @unittest.skipIf(np is None, "numpy is required for array-backed matrices")
+    @responses.activate
+    def test_matrix_tiled_numpy(self):
+        self._add_tiled_matrix_responses()
+
+        locations = [[i, 0] for i in range(8)]
+        sources = [0, 2, 3, 4, 6, 7]
+        destinations = [5, 1, 0, 3, 2]
+        matrix = self.router.matrix_tiled(
+            locations,
+            "auto",
+            sources=sources,
+            destinations=destinations,
+            tile_size=(2, 3),
+            max_workers=1,
+            array_backend="numpy",
+        )
+        self.assertEqual((6, 5), matrix.durations.shape)
+        self.assertEqual("float32", matrix.durations.dtype)
+        # The failed tiles are NaN
+        self.assertTrue(np.isnan(matrix.durations[4:]).all())
+        self.assertEqual(
+            [[100 * i + j for j in destinations] for i in sources[:4]], matrix.durations[:4].tolist()
+        )
+
+    @responses.activate
+    def test_matrix_tiled_location_params(self):
+        responses.add(
+            responses.GET,
+            "https://routing.openstreetmap.de/routed-bike/table/v1/driving/0,0;1,0;2,0",
+            status=200,
+            json={"durations": [[1.0, 2.0]]},
+            content_type="application/json",
+        )
+        responses.add(
+            responses.GET,
+            "https://routing.openstreetmap.de/routed-bike/table/v1/driving/2,0;1,0",
+            status=200,
+            json={"durations": [[3.0, 4.0]]},
+            content_type="application/json",
+        )
+
+        matrix = OSRM().matrix_tiled(
+            [[0, 0], [1, 0], [2, 0]],
+            sources=[0, 2],
+            destinations=[1, 2],
+            radiuses=[10, 11, 12],
+            tile_size=(1, 2),
+            max_workers=1,
+        )
+
+        self.assertEqual([[1.0, 2.0], [3.0, 4.0]], matrix.durations)
+        self.assertIsNone(matrix.distances)
+        self.assertEqual([], matrix.failed_tiles)
+        self.assertIn("radiuses=10%3B11%3B12", responses.calls[0].request.url)
+        self.assertIn("radiuses=12%3B11", responses.calls[1].request.url)
+
+    @responses.activate
+    def test_directions_chunked(self):
+        def directions_response(request):
+            body = parse_qs(request.body)
+            # Location i is at [i, 0], every leg takes 10 s and 100 m
+            coords = [[float(c) for c in pair.split(",")] for pair in body["coordinates"][0].split(";")]
+            legs = [
+                {"summary": "{}-{}".format(int(a[0]), int(b[0]))} for a, b in zip(coords, coords[1:])
+            ]
+            route = {
+                "geometry": {"type": "LineString", "coordinates": coords},
+                "duration": 10.0 * len(legs),
+                "distance": 100.0 * len(legs),
+                "legs": legs,
+            }
+            return 200, {}, json.dumps({"routes": [route]})
+
+        responses.add_callback(
+            responses.POST,
+            "https://api.mapbox.com/directions/v5/mapbox/driving",
+            callback=directions_response,
+            content_type="application/json",
+        )
+
+        router = MapboxOSRM(api_key="sample_key")
+        locations = [[i, 0] for i in range(60)]
+        route = router.directions_chunked(
+            locations,
+            "driving",
+            geometries="geojson",
+            radiuses=list(range(60)),
+            max_workers=1,
+        )
+
+        # 25 locations per request, the sections share their first and last location
+        self.assertIsInstance(route, ChunkedDirection)
+        self.assertEqual(3, len(responses.calls))
+        self.assertEqual(3, len(route.chunks))
+        self.assertEqual(3, len(route.raw))
+        bodies = [parse_qs(call.request.body) for call in responses.calls]
+        self.assertEqual(["0,0", "24,0"], bodies[0]["coordinates"][0].split(";")[::24])
+        self.assertEqual("24;25", bodies[1]["radiuses"][0][:5])
+        self.assertEqual(12, len(bodies[2]["coordinates"][0].split(";")))
+
+        self.assertEqual(590, route.duration)
+        self.assertEqual(5900, route.distance)
+        self.assertEqual([[float(i), 0.0] for i in range(60)], route.geometry)
+        self.assertEqual(
+            ["{}-{}".format(i, i + 1) for i in range(59)], [leg["summary"] for leg in route.legs]
+        )
+
+        # Within the limit it's a single request
+        route = router.directions_chunked(locations[:3], "driving", geometries="geojson")
+        self.assertEqual(4, len(responses.calls))
+        self.assertEqual(1, len(route.chunks))
+        self.assertEqual(20, route.duration)
+
+        with self.assertRaises(ValueError):
+            router.directions_chunked(locations, "driving", alternatives=True)
+        with self.assertRaises(ValueError):
+            router.directions_chunked(locations, "driving", chunk_size=1)
+        with self.assertRaises(ValueError):
+            self.router.directions_chunked(locations, "auto")
+
+    @responses.activate
+    def test_directions_chunked_google(self):
+        responses.add(
+            responses.GET,
+            "https://maps.googleapis.com/maps/api/directions/json",
+            status=200,
+            json=ENDPOINTS_RESPONSES["google"]["directions"],
+            content_type="application/json",
+        )
+
+        router = Google(api_key="sample_key")
+        route = router.directions_chunked([[i, 0] for i in range(30)], "driving", metrics_only=True)
+
+        # Origin, destination and 25 waypoints per request
+        self.assertEqual(2, len(responses.calls))
+        self.assertIsNone(route.geometry)
+        self.assertEqual(2 * route.chunks[0].duration, route.duration)
+        self.assertEqual(2 * len(route.chunks[0].raw["routes"][0]["legs"]), len(route.legs))
+        with self.assertRaises(ValueError):
+            router.directions_chunked([[i, 0] for i in range(30)], "driving", optimize=True)
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the cache module."""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import responses
+
+import tests as _test
+from routingpy import Valhalla
+from routingpy.cache import CacheKey, MemoryCache, SQLiteCache, bypass_cache
+from routingpy.direction import Direction
+from tests.test_helper import *
+
+
+class MemoryCacheTest(_test.TestCase):
+    def test_lru_eviction(self):
+        cache = MemoryCache(maxsize=2)
+        keys = [CacheKey("GET", "https://foo.bar", "/route?a={}".format(i), None) for i in range(3)]
+
+        cache.set(keys[0], {"a": 0})
+        cache.set(keys[1], {"a": 1})
+        # Touch the first entry, so the second one is the least recently used
+        self.assertEqual({"a": 0}, cache.get(keys[0]))
+        cache.set(keys[2], {"a": 2})
+
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual({"a": 2}, cache.get(keys[2]))
+        self.assertEqual({"hits": 2, "misses": 1, "evictions": 1, "size": 2}, cache.stats)
+
+    def test_ttl(self):
+        cache = MemoryCache(ttl=0.1)
+        key = CacheKey("GET", "https://foo.bar", "/route", None)
+
+        cache.set(key, {"a": 0})
+        cache.set(key._replace(url="/matrix"), {"a": 1}, ttl=100)
+        self.assertEqual({"a": 0}, cache.get(key))
+
+        time.sleep(0.15)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual({"a": 1}, cache.get(key._replace(url="/matrix")))
+        self.assertEqual(1, len(cache))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+
+class SQLiteCacheTest(_test.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "cache.sqlite")
+        self.key = CacheKey("POST", "https://foo.bar", "/route", '{"a":1}')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_persistence(self):
+        cache = SQLiteCache(self.path)
+        cache.set(self.key, {"a": [1.5, None, "b"]})
+        cache.set(self.key._replace(url="/raster"), b"\x00\x01tiff")
+        cache.close()
+
+        # A new instance, e.g. in another process, reads the same entries
+        cache = SQLiteCache(self.path)
+        self.assertEqual({"a": [1.5, None, "b"]}, cache.get(self.key))
+        self.assertEqual(b"\x00\x01tiff", cache.get(self.key._replace(url="/raster")))
+        self.assertIsNone(cache.get(self.key._replace(body='{"a":2}')))
+        self.assertEqual({"hits": 2, "misses": 1, "evictions": 0, "size": 2}, cache.stats)
+
+    def test_ttl(self):
+        cache = SQLiteCache(self.path, ttl=0.1)
+        cache.set(self.key, {"a": 0})
+        cache.set(self.key._replace(url="/matrix"), {"a": 1}, ttl=100)
+
+        time.sleep(0.15)
+        self.assertIsNone(cache.get(self.key))
+        self.assertEqual({"a": 1}, cache.get(self.key._replace(url="/matrix")))
+        self.assertEqual(1, len(cache))
+
+    def test_max_bytes(self):
+        cache = SQLiteCache(self.path, max_bytes=100, compression_level=0)
+        keys = [self.key._replace(url="/route{}".format(i)) for i in range(3)]
+
+        # ~40 bytes each uncompressed
+        cache.set(keys[0], {"a": "x" * 30})
+        cache.set(keys[1], {"a": "y" * 30})
+        time.sleep(0.01)
+        cache.get(keys[0])
+        cache.set(keys[2], {"a": "z" * 30})
+
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(1, cache.stats["evictions"])
+
+    def test_hit_without_write_lock(self):
+        cache = SQLiteCache(self.path, timeout=5, flush_size=1)
+        cache.set(self.key, {"a": 0})
+
+        # Hits are served while another process writes, their access time is written later
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        writer.execute("BEGIN IMMEDIATE")
+        start = time.monotonic()
+        self.assertEqual({"a": 0}, cache.get(self.key))
+        self.assertLess(time.monotonic() - start, 1)
+        writer.execute("ROLLBACK")
+        writer.close()
+        self.assertEqual(1, len(cache._accessed))
+
+        cache.get(self.key)
+        self.assertEqual({}, cache._accessed)
+
+    def test_invalidate(self):
+        cache = SQLiteCache(self.path)
+        cache.set(self.key, {"a": 0})
+        cache.set(self.key._replace(url="/matrix"), {"a": 0})
+        cache.set(self.key._replace(base_url="https://other.bar"), {"a": 0})
+
+        self.assertEqual(2, cache.invalidate(base_url="https://foo.bar"))
+        self.assertEqual(1, len(cache))
+        self.assertIsNotNone(cache.get(self.key._replace(base_url="https://other.bar")))
+
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+    def test_concurrent_access(self):
+        caches = [SQLiteCache(self.path), SQLiteCache(self.path)]
+
+        def work(i):
+            cache = caches[i % 2]
+            key = self.key._replace(url="/route{}".format(i % 10))
+            cache.set(key, {"i": i % 10})
+            return cache.get(key)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(work, range(100)))
+
+        self.assertEqual([{"i": i % 10} for i in range(100)], results)
+        self.assertEqual(10, len(caches[0]))
+
+
+class ClientCacheTest(_test.TestCase):
+    name = "valhalla"
+
+    def setUp(self):
+        self.cache = MemoryCache()
+        self.router = Valhalla("https://api.mapbox.com/valhalla/v1", cache=self.cache)
+
+    @responses.activate
+    def test_cached_directions(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        first = self.router.directions(**query)
+        second = self.router.directions(**query)
+
+        self.assertEqual(1, len(responses.calls))
+        self.assertIsInstance(second, Direction)
+        self.assertEqual(first.geometry, second.geometry)
+        self.assertEqual({"hits": 1, "misses": 1, "evictions": 0, "size": 1}, self.cache.stats)
+
+        # Shared between routers with the same base URL
+        other_router = Valhalla("https://api.mapbox.com/valhalla/v1", cache=self.cache)
+        other_router.directions(**query)
+        self.assertEqual(1, len(responses.calls))
+
+        # But not with another base URL
+        responses.add(
+            responses.POST,
+            "https://valhalla1.openstreetmap.de/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+        Valhalla(cache=self.cache).directions(**query)
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_canonical_post_body(self):
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json={},
+            content_type="application/json",
+        )
+        responses.add(
+            responses.GET,
+            "https://api.mapbox.com/valhalla/v1/route?a=2",
+            status=200,
+            json={},
+            content_type="application/json",
+        )
+
+        self.router.client._request("/route", post_params={"a": 1, "b": {"c": 2, "d": 3}})
+        self.router.client._request("/route", post_params={"b": {"d": 3, "c": 2}, "a": 1})
+        self.assertEqual(1, len(responses.calls))
+
+        self.router.client._request("/route", post_params={"b": {"d": 3, "c": 2}, "a": 2})
+        self.router.client._request("/route", get_params={"a": 2})
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_bypass_and_dry_run(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        self.router.directions(**query)
+        with bypass_cache():
+            self.router.directions(**query)
+        self.assertEqual(2, len(responses.calls))
+
+        self.router.directions(**query, dry_run=True)
+        self.assertEqual({"hits": 0, "misses": 1, "evictions": 0, "size": 1}, self.cache.stats)
+
+    @responses.activate
+    def test_api_error_not_cached(self):
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=400,
+            json={"error": "no route"},
+            content_type="application/json",
+        )
+
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", skip_api_error=True, cache=self.cache)
+        with self.assertWarns(UserWarning):
+            router.directions(**ENDPOINTS_QUERIES[self.name]["directions"])
+        self.assertEqual(0, len(self.cache))
+
+    @responses.activate
+    def test_sqlite_cache(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "cache.sqlite")
+            first = Valhalla("https://api.mapbox.com/valhalla/v1", cache=SQLiteCache(path)).directions(
+                **query
+            )
+            second = Valhalla("https://api.mapbox.com/valhalla/v1", cache=SQLiteCache(path)).directions(
+                **query
+            )
+        finally:
+            shutil.rmtree(tmpdir)
+
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual(first.raw, second.raw)
+        self.assertEqual(first.geometry, second.geometry)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the circuit module."""
+
+import time
+
+import responses
+
+import tests as _test
+from routingpy import Valhalla, exceptions
+from routingpy.circuit import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    circuit_states,
+    get_circuit_breaker,
+    set_circuit_breaker,
+)
+from routingpy.retry import RetryPolicy
+from tests.test_helper import *
+
+
+class CircuitBreakerTest(_test.TestCase):
+    def test_states(self):
+        changes = []
+        breaker = CircuitBreaker(
+            failure_threshold=2,
+            recovery_timeout=0.1,
+            on_state_change=lambda breaker, old, new: changes.append((old, new)),
+        )
+
+        breaker.allow()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(CLOSED, breaker.state)
+        breaker.record_failure()
+        self.assertEqual(OPEN, breaker.state)
+
+        with self.assertRaises(exceptions.CircuitOpen) as cm:
+            breaker.allow()
+        self.assertAlmostEqual(0.1, cm.exception.retry_in, delta=0.05)
+
+        time.sleep(0.1)
+        self.assertEqual(HALF_OPEN, breaker.state)
+        # Only one trial request at a time
+        breaker.allow()
+        with self.assertRaises(exceptions.CircuitOpen):
+            breaker.allow()
+
+        # A failed trial opens the circuit again
+        breaker.record_failure()
+        self.assertEqual(OPEN, breaker.state)
+        time.sleep(0.1)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(CLOSED, breaker.state)
+
+        self.assertEqual(
+            [
+                (CLOSED, OPEN),
+                (OPEN, HALF_OPEN),
+                (HALF_OPEN, OPEN),
+                (OPEN, HALF_OPEN),
+                (HALF_OPEN, CLOSED),
+            ],
+            changes,
+        )
+        stats = breaker.stats
+        self.assertEqual(
+            {"state": CLOSED, "failures": 0, "opened": 2, "rejected": 2},
+            {k: stats[k] for k in ("state", "failures", "opened", "rejected")},
+        )
+
+    def test_success_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.1, success_threshold=3)
+        breaker.record_failure()
+        time.sleep(0.1)
+
+        # Every finished trial admits the next one right away
+        for _ in range(2):
+            breaker.allow()
+            breaker.record_success()
+            self.assertEqual(HALF_OPEN, breaker.state)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(CLOSED, breaker.state)
+        self.assertEqual(0, breaker.rejected)
+
+    def test_reset(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        self.assertEqual(OPEN, breaker.stats["state"])
+        self.assertGreater(breaker.stats["retry_in"], 29)
+
+        breaker.reset()
+        breaker.allow()
+        self.assertEqual(CLOSED, breaker.state)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            CircuitBreaker(failure_threshold=0)
+
+
+class ClientCircuitBreakerTest(_test.TestCase):
+    name = "valhalla"
+    base_url = "https://api.mapbox.com/valhalla/v1"
+
+    def setUp(self):
+        self.url = self.base_url + "/sources_to_targets"
+        self.query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        self.policy = RetryPolicy(backoff_factor=0.01)
+
+    def tearDown(self):
+        set_circuit_breaker(self.base_url, None)
+
+    @responses.activate
+    def test_fail_fast(self):
+        responses.add(responses.POST, self.url, status=503, body="Down")
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        router = Valhalla(self.base_url, retry_policy=self.policy, circuit_breaker=breaker)
+
+        # The retries stop as soon as the circuit opens, long before retry_timeout
+        start = time.monotonic()
+        with self.assertWarns(UserWarning), self.assertRaises(exceptions.CircuitOpen):
+            router.matrix(**self.query)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(3, len(responses.calls))
+
+        with self.assertRaises(exceptions.CircuitOpen):
+            router.matrix(**self.query)
+        self.assertEqual(3, len(responses.calls))
+        self.assertEqual(OPEN, router.client.circuit_breaker.stats["state"])
+        self.assertEqual(2, router.client.circuit_breaker.stats["rejected"])
+
+    @responses.activate
+    def test_shared(self):
+        responses.add(responses.POST, self.url, status=500, body="Internal error")
+        responses.add(
+            responses.POST,
+            self.url,
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+        set_circuit_breaker(self.base_url, CircuitBreaker(failure_threshold=1, recovery_timeout=0.1))
+
+        router = Valhalla(self.base_url)
+        other_router = Valhalla(self.base_url, circuit_breaker=True)
+        self.assertIs(get_circuit_breaker(self.base_url), router.client.circuit_breaker)
+        self.assertIs(router.client.circuit_breaker, other_router.client.circuit_breaker)
+
+        with self.assertRaises(exceptions.RouterServerError):
+            router.matrix(**self.query)
+        with self.assertRaises(exceptions.CircuitOpen):
+            other_router.matrix(**self.query)
+        self.assertEqual(OPEN, circuit_states()[self.base_url]["state"])
+
+        # The trial request closes the circuit
+        time.sleep(0.1)
+        other_router.matrix(**self.query)
+        self.assertEqual(CLOSED, circuit_states()[self.base_url]["state"])
+        self.assertEqual(2, len(responses.calls))
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the asynchronous client module."""
+
+import asyncio
+import json
+import re
+import threading
+import unittest
+from copy import deepcopy
+
+try:
+    import aiohttp
+    from aioresponses import aioresponses
+except ImportError:  # pragma: no cover
+    aioresponses = None
+
+import routingpy
+from routingpy import OpenTripPlannerV2, Valhalla
+from routingpy.cache import MemoryCache
+from routingpy.direction import Direction
+from routingpy.matrix import Matrix
+from routingpy.raster import Raster
+from routingpy.ratelimit import RateLimiter, get_rate_limiter
+from routingpy.retry import RetryPolicy
+from tests.test_helper import *
+
+if aioresponses is not None:
+    from routingpy.client_async import AsyncClient
+
+
+@unittest.skipIf(aioresponses is None, "aiohttp and aioresponses are required for the async client")
+class AsyncClientTest(unittest.IsolatedAsyncioTestCase):
+    name = "valhalla"
+
+    async def asyncSetUp(self):
+        self.router = Valhalla("https://api.mapbox.com/valhalla/v1", client=AsyncClient)
+
+    async def asyncTearDown(self):
+        await self.router.client.close()
+
+    async def test_directions(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+        expected = ENDPOINTS_EXPECTED[self.name]["directions"]
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/route",
+                payload=ENDPOINTS_RESPONSES[self.name]["directions"],
+            )
+            route = await self.router.directions(**query)
+
+            (calls,) = m.requests.values()
+            self.assertEqual(expected, json.loads(calls[0].kwargs["data"]))
+
+        self.assertIsInstance(route, Direction)
+        self.assertIsInstance(route.distance, int)
+        self.assertIsInstance(route.duration, int)
+        self.assertIsInstance(route.geometry, list)
+
+    async def test_many_in_flight(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                repeat=True,
+            )
+            matrices = await asyncio.gather(*[self.router.matrix(**query) for _ in range(20)])
+
+        self.assertEqual(20, len(matrices))
+        for matrix in matrices:
+            self.assertIsInstance(matrix, Matrix)
+            self.assertEqual(matrices[0].durations, matrix.durations)
+
+    async def test_coalesce(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", client=AsyncClient, coalesce=True)
+
+        async def slow_response(url, **kwargs):
+            await asyncio.sleep(0.1)
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                callback=slow_response,
+                repeat=True,
+            )
+            matrices = await asyncio.gather(*[router.matrix(**query) for _ in range(5)])
+            (calls,) = m.requests.values()
+        await router.client.close()
+
+        self.assertEqual(1, len(calls))
+        self.assertEqual({"calls": 1, "coalesced": 4, "in_flight": 0}, router.client.single_flight.stats)
+        for matrix in matrices:
+            self.assertEqual(matrices[0].durations, matrix.durations)
+
+    async def test_blocking_cache(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        threads = []
+
+        class BlockingCache(MemoryCache):
+            blocking = True
+
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return super(BlockingCache, self).get(key)
+
+        cache = BlockingCache()
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", client=AsyncClient, cache=cache)
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            )
+            await router.matrix(**query)
+            await router.matrix(**query)
+        await router.client.close()
+
+        # Queried off the event loop's thread
+        self.assertEqual(2, len(threads))
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual({"hits": 1, "misses": 1}, {k: cache.stats[k] for k in ("hits", "misses")})
+
+    async def test_matrix_stream(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                repeat=True,
+            )
+            expected = await self.router.matrix(**query)
+            matrix = await self.router.matrix(**query, stream=True)
+
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertIsNone(matrix.raw)
+
+    async def test_matrix_many(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                repeat=True,
+            )
+            matrices = await self.router.matrix_many([query] * 5, max_workers=2)
+
+        self.assertEqual(5, len(matrices))
+        for matrix in matrices:
+            self.assertIsInstance(matrix, Matrix)
+
+    async def test_rate_limit(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        limiter = RateLimiter(per_second=10, burst=1)
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", client=AsyncClient, rate_limit=limiter)
+
+        with aioresponses() as m:
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+                payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                repeat=True,
+            )
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*[router.matrix(**query) for _ in range(4)])
+            self.assertGreaterEqual(loop.time() - start, 0.29)
+
+        await router.client.close()
+        self.assertEqual(
+            {"requests": 4, "delayed": 3}, {k: limiter.stats[k] for k in ("requests", "delayed")}
+        )
+
+    async def test_retry_after(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        url = "https://api.mapbox.com/valhalla/v1/sources_to_targets"
+
+        with aioresponses() as m:
+            m.post(url, status=503, body="Down for maintenance", headers={"Retry-After": "0.2"})
+            m.post(url, payload=ENDPOINTS_RESPONSES[self.name]["matrix"])
+            router = Valhalla(
+                "https://api.mapbox.com/valhalla/v1",
+                client=AsyncClient,
+                retry_policy=RetryPolicy(backoff_factor=0.05),
+            )
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            with self.assertWarns(UserWarning):
+                matrix = await router.matrix(**query)
+            elapsed = loop.time() - start
+        await router.client.close()
+
+        self.assertIsInstance(matrix, Matrix)
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 0.45)
+        self.assertIsNone(get_rate_limiter("https://api.mapbox.com/valhalla/v1"))
+
+    async def test_retry_policy(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        url = "https://api.mapbox.com/valhalla/v1/sources_to_targets"
+        policy = RetryPolicy(
+            statuses=(502,), exceptions=(routingpy.exceptions.TransportError,), backoff_factor=0.01
+        )
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", client=AsyncClient, retry_policy=policy)
+
+        with aioresponses() as m:
+            m.post(url, exception=aiohttp.ServerDisconnectedError())
+            m.post(url, status=502, body="Bad gateway")
+            m.post(url, payload=ENDPOINTS_RESPONSES[self.name]["matrix"])
+            with self.assertWarns(UserWarning):
+                matrix = await router.matrix(**query)
+
+            (calls,) = m.requests.values()
+            self.assertEqual(3, len(calls))
+
+        await router.client.close()
+        self.assertIsInstance(matrix, Matrix)
+
+    async def test_balancing(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        base_urls = ["https://valhalla-1.test", "https://valhalla-2.test"]
+        router = Valhalla(base_urls, client=AsyncClient)
+
+        with aioresponses() as m:
+            for base_url in base_urls:
+                m.post(
+                    base_url + "/sources_to_targets",
+                    payload=ENDPOINTS_RESPONSES[self.name]["matrix"],
+                    repeat=True,
+                )
+            await asyncio.gather(*[router.matrix(**query) for _ in range(4)])
+
+            self.assertEqual([2, 2], [len(calls) for calls in m.requests.values()])
+
+        await router.client.close()
+        stats = router.client.endpoint_pool.stats
+        self.assertEqual([2, 2], [stats[base_url]["requests"] for base_url in base_urls])
+        self.assertEqual([0, 0], [stats[base_url]["outstanding"] for base_url in base_urls])
+
+    async def test_retriable_status(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        with aioresponses() as m:
+            m.post("https://api.mapbox.com/valhalla/v1/route", status=503)
+            m.post(
+                "https://api.mapbox.com/valhalla/v1/route",
+                payload=ENDPOINTS_RESPONSES[self.name]["directions"],
+            )
+            with self.assertWarns(UserWarning):
+                route = await self.router.directions(**query)
+
+        self.assertIsInstance(route, Direction)
+
+    async def test_api_error(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        with aioresponses() as m:
+            m.post("https://api.mapbox.com/valhalla/v1/route", status=400, payload={"error": "no route"})
+            with self.assertRaises(routingpy.exceptions.RouterApiError):
+                await self.router.directions(**query)
+
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", skip_api_error=True, client=AsyncClient)
+        with aioresponses() as m:
+            m.post("https://api.mapbox.com/valhalla/v1/route", status=400, payload={"error": "no route"})
+            with self.assertWarns(UserWarning):
+                route = await router.directions(**query)
+        await router.client.close()
+
+        self.assertIsNone(route.geometry)
+
+    async def test_dry_run(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+
+        with aioresponses() as m:
+            route = await self.router.directions(**query, dry_run=True)
+            self.assertEqual(0, len(m.requests))
+
+        self.assertIsInstance(route, Direction)
+
+    async def test_raster(self):
+        router = OpenTripPlannerV2(client=AsyncClient)
+        query = ENDPOINTS_QUERIES["otp_v2"]["raster"]
+
+        with open("tests/raster_example.tiff", "rb") as raster_file:
+            image = raster_file.read()
+
+        with aioresponses() as m:
+            m.get(
+                re.compile(r"^http://localhost:8080/otp/traveltime/surface\?.*$"),
+                body=image,
+                content_type="image/tiff",
+            )
+            raster = await router.raster(**query)
+        await router.client.close()
+
+        self.assertIsInstance(raster, Raster)
+        self.assertEqual(image, raster.image)
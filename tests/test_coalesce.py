@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the coalesce module."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import responses
+
+import tests as _test
+from routingpy import Valhalla
+from routingpy.coalesce import AsyncSingleFlight, SingleFlight
+from routingpy.matrix import Matrix
+from tests.test_helper import *
+
+
+class SingleFlightTest(_test.TestCase):
+    def test_do(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func(x):
+            calls.append(x)
+            started.set()
+            release.wait()
+            return {"x": x}
+
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            leader = pool.submit(single_flight.do, "key", func, 1)
+            started.wait()
+            followers = [pool.submit(single_flight.do, "key", func, 2) for _ in range(4)]
+            other = pool.submit(single_flight.do, "other", lambda: "other")
+            self.assertEqual("other", other.result())
+
+            # Wait until all followers are queued on the leader's call
+            while single_flight.coalesced < 4:
+                time.sleep(0.01)
+            release.set()
+
+        self.assertEqual([1], calls)
+        self.assertEqual({"x": 1}, leader.result())
+        for follower in followers:
+            self.assertIs(leader.result(), follower.result())
+        self.assertEqual({"calls": 2, "coalesced": 4, "in_flight": 0}, single_flight.stats)
+
+    def test_exception(self):
+        single_flight = SingleFlight()
+
+        def func():
+            raise ValueError("failed")
+
+        with self.assertRaises(ValueError):
+            single_flight.do("key", func)
+
+        # Failed calls aren't remembered
+        self.assertEqual("ok", single_flight.do("key", lambda: "ok"))
+
+
+class AsyncSingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_leader_cancelled(self):
+        single_flight = AsyncSingleFlight()
+        release = asyncio.Event()
+        calls = []
+
+        async def func(x):
+            calls.append(x)
+            await release.wait()
+            return {"x": x}
+
+        leader = asyncio.ensure_future(single_flight.do("key", func, 1))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(single_flight.do("key", func, 2)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        # The others still receive the result of the call the cancelled caller started
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*followers)
+
+        self.assertTrue(leader.cancelled())
+        self.assertEqual([1], calls)
+        self.assertEqual([{"x": 1}] * 3, results)
+        self.assertEqual({"calls": 1, "coalesced": 3, "in_flight": 0}, single_flight.stats)
+
+    async def test_all_cancelled(self):
+        single_flight = AsyncSingleFlight()
+        cancelled = asyncio.Event()
+
+        async def func():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.ensure_future(single_flight.do("key", func)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for caller in callers:
+            caller.cancel()
+
+        # Nobody waits for the call anymore, so it's cancelled too
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(0, single_flight.stats["in_flight"])
+
+
+class ClientCoalesceTest(_test.TestCase):
+    name = "valhalla"
+
+    @responses.activate
+    def test_coalesce(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+        def slow_response(request):
+            time.sleep(0.2)
+            return 200, {}, json.dumps(ENDPOINTS_RESPONSES[self.name]["matrix"])
+
+        responses.add_callback(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            callback=slow_response,
+            content_type="application/json",
+        )
+
+        router = Valhalla("https://api.mapbox.com/valhalla/v1", coalesce=True)
+        matrices = router.matrix_many([query] * 5, max_workers=5)
+
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual({"calls": 1, "coalesced": 4, "in_flight": 0}, router.client.single_flight.stats)
+        for matrix in matrices:
+            self.assertIsInstance(matrix, Matrix)
+            self.assertEqual(matrices[0].durations, matrix.durations)
+
+        # Different requests aren't coalesced
+        other_query = dict(query, locations=query["locations"][::-1])
+        router.matrix_many([query, other_query], max_workers=2)
+        self.assertEqual(3, len(responses.calls))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the geometry module."""
+
+import pickle
+import unittest
+
+import responses
+
+import tests as _test
+from routingpy import Valhalla, utils
+from routingpy.geometry import Geometry, convert_geometry
+from routingpy.routers import options
+from tests.test_helper import *
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+class GeometryTest(_test.TestCase):
+    def setUp(self):
+        self.coords = [[8.688641, 49.420577], [8.680916, 49.415776], [8.780916, 49.445776]]
+
+    def tearDown(self):
+        options.default_geometry_backend = None
+
+    def test_sequence(self):
+        geometry = Geometry(self.coords)
+
+        self.assertEqual(3, len(geometry))
+        self.assertEqual(2, geometry.dims)
+        self.assertEqual(48, geometry.nbytes)
+        self.assertEqual((8.680916, 49.415776), geometry[1])
+        self.assertEqual((8.780916, 49.445776), geometry[-1])
+        self.assertEqual([tuple(coord) for coord in self.coords], list(geometry))
+        self.assertEqual(self.coords, geometry.tolist())
+        self.assertEqual(geometry, self.coords)
+        self.assertNotEqual(geometry, self.coords[:2])
+        self.assertEqual(Geometry(self.coords[1:]), geometry[1:])
+        self.assertEqual(self.coords[::2], geometry[::2])
+        self.assertEqual(Geometry(), geometry[2:1])
+        with self.assertRaises(IndexError):
+            geometry[3]
+
+        with self.assertRaises(ValueError):
+            Geometry([[1.0, 2.0], [1.0, 2.0, 3.0]])
+        with self.assertRaises(ValueError):
+            Geometry([[1.0]])
+
+    @unittest.skipIf(np is None, "numpy is required to test the buffer protocol")
+    def test_buffer(self):
+        geometry = Geometry(self.coords)
+        array = np.asarray(geometry)
+
+        self.assertEqual((3, 2), array.shape)
+        self.assertEqual(np.float64, array.dtype)
+        self.assertEqual(self.coords, array.tolist())
+        self.assertEqual((3, 2), geometry.buffer.shape)
+        self.assertEqual(self.coords, geometry.buffer.tolist())
+
+        # Slices and arrays share the buffer
+        tail = geometry[1:]
+        self.assertTrue(np.shares_memory(np.asarray(tail), array))
+        self.assertTrue(np.shares_memory(np.asarray(Geometry(array)), array))
+
+        self.assertEqual(geometry, pickle.loads(pickle.dumps(geometry)))
+        self.assertEqual(tail, pickle.loads(pickle.dumps(tail)))
+
+    def test_from_polyline(self):
+        polylines = [r"aqkg}Aa_iqO`kHxaN", r"aqkg}Aa_iqO`kHxaN" + r"~jHy`N_kHxaN" * 100]
+        for polyline in (polylines[0], polylines):
+            expected = utils.EncodedPolyline(polyline, 6).decode()
+            self.assertEqual(expected, Geometry.from_polyline(polyline, 6))
+            self.assertEqual(
+                [coord[::-1] for coord in expected], Geometry.from_polyline(polyline, 6, order="latlng")
+            )
+
+        self.assertEqual(
+            utils.decode_polyline5(r"smslH__`t@_sV~\fo@etjG", True),
+            Geometry.from_polyline(r"smslH__`t@_sV~\fo@etjG", is3d=True),
+        )
+        self.assertEqual(0, len(Geometry.from_polyline("")))
+
+    def test_convert_geometry(self):
+        rings = [self.coords, self.coords[:2]]
+
+        self.assertIs(rings, convert_geometry(rings))
+        self.assertEqual(
+            [Geometry(self.coords), Geometry(self.coords[:2])], convert_geometry(rings, "array")
+        )
+        self.assertEqual(self.coords[0], convert_geometry(self.coords[0], "array"))
+        self.assertIsNone(convert_geometry(None, "array"))
+        with self.assertRaises(ValueError):
+            convert_geometry(rings, "numpy")
+
+        options.default_geometry_backend = "array"
+        self.assertIsInstance(convert_geometry(self.coords), Geometry)
+
+    @responses.activate
+    def test_router_geometries(self):
+        options.default_geometry_backend = "array"
+        router = Valhalla("https://api.mapbox.com/valhalla/v1")
+        for endpoint, url in (("directions", "route"), ("trace_attributes", "trace_attributes")):
+            responses.add(
+                responses.POST,
+                "https://api.mapbox.com/valhalla/v1/" + url,
+                status=200,
+                json=ENDPOINTS_RESPONSES["valhalla"][endpoint],
+                content_type="application/json",
+            )
+
+        route = router.directions(**ENDPOINTS_QUERIES["valhalla"]["directions"])
+        self.assertIsInstance(route.geometry, Geometry)
+        shapes = [leg["shape"] for leg in ENDPOINTS_RESPONSES["valhalla"]["directions"]["trip"]["legs"]]
+        self.assertEqual(utils.EncodedPolyline(shapes, 6).decode(), route.geometry)
+
+        matched = router.trace_attributes(**ENDPOINTS_QUERIES["valhalla"]["trace_attributes"])
+        for edge in matched.matched_edges:
+            self.assertIsInstance(edge.geometry, Geometry)
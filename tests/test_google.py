@@ -64,6 +64,23 @@ class GoogleTest(_test.TestCase):
         self.assertIsInstance(routes[0].duration, int)
         self.assertIsInstance(routes[0].raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+
+        responses.add(
+            responses.GET,
+            "https://maps.googleapis.com/maps/api/directions/json",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        routes = self.client.directions(**query, metrics_only=True)
+        for route in routes:
+            self.assertIsNone(route.geometry)
+            self.assertIsInstance(route.duration, int)
+
     @responses.activate
     def test_full_directions_no_alternatives(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
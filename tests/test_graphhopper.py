@@ -61,6 +61,27 @@ class GraphhopperTest(_test.TestCase):
         self.assertIsInstance(routes.distance, int)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        query["algorithm"] = None
+
+        responses.add(
+            responses.POST,
+            "https://graphhopper.com/api/1/route",
+            status=200,
+            json={"paths": [{"time": 100000, "distance": 200.5}]},
+            content_type="application/json",
+        )
+
+        route = self.client.directions(**query, metrics_only=True)
+        body = json.loads(responses.calls[0].request.body.decode("utf-8"))
+        self.assertFalse(body["calc_points"])
+        self.assertFalse(body["instructions"])
+        self.assertIsNone(route.geometry)
+        self.assertEqual(100, route.duration)
+        self.assertEqual(200, route.distance)
+
     @responses.activate
     def test_full_directions_alternatives(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
@@ -167,6 +188,29 @@ class GraphhopperTest(_test.TestCase):
         self.assertIsInstance(matrix.distances, list)
         self.assertIsInstance(matrix.raw, dict)
 
+    @responses.activate
+    def test_matrix_stream(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        responses.add(
+            responses.GET,
+            "https://graphhopper.com/api/1/matrix",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+            stream=True,
+        )
+
+        expected = self.client.matrix(**query)
+        matrix = self.client.matrix(**query, stream=True)
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertURLEqual(responses.calls[0].request.url, responses.calls[1].request.url)
+        self.assertIsInstance(matrix, Matrix)
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertIsNone(matrix.raw)
+
     @responses.activate
     def test_few_sources_destinations_matrix(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
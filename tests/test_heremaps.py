@@ -104,6 +104,27 @@ class HereMapsTest(_test.TestCase):
         self.assertIsInstance(routes.distance, int)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        query["alternatives"] = 1
+
+        responses.add(
+            responses.GET,
+            "https://route.api.here.com/routing/7.2/calculateroute.json",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+
+        route = self.client.directions(**query, metrics_only=True)
+        url = responses.calls[0].request.url
+        self.assertIn("representation=overview", url)
+        self.assertIn("routeAttributes=summary&", url)
+        self.assertNotIn("maneuverAttributes", url)
+        self.assertIsNone(route.geometry)
+        self.assertIsInstance(route.duration, int)
+
     @responses.activate
     def test_directions_object_response_alternatives(self):
         query = ENDPOINTS_QUERIES[self.name]["directions"]
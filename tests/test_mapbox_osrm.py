@@ -70,6 +70,27 @@ class MapboxOSRMTest(_test.TestCase):
         self.assertIsInstance(routes.distance, int)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        query["alternatives"] = False
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/directions/v5/mapbox/{}".format(query["profile"]),
+            status=200,
+            json={"routes": [{"duration": 100.5, "distance": 200.5}]},
+            content_type="application/json",
+        )
+
+        route = self.client.directions(**query, metrics_only=True)
+        body = responses.calls[0].request.body
+        self.assertIn("overview=false", body)
+        self.assertIn("steps=false", body)
+        self.assertNotIn("voice_instructions", body)
+        self.assertIsNone(route.geometry)
+        self.assertEqual(100, route.duration)
+
     @responses.activate
     def test_full_directions_alternatives(self):
         query = ENDPOINTS_QUERIES[self.name]["directions"]
@@ -63,6 +63,26 @@ class ORSTest(_test.TestCase):
         self.assertIsInstance(routes.distance, int)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+
+        responses.add(
+            responses.POST,
+            "https://api.openrouteservice.org/v2/directions/{}/json".format(query["profile"]),
+            status=200,
+            json={"routes": [{"summary": {"duration": 100.5, "distance": 200.5}}]},
+            content_type="application/json",
+        )
+
+        route = self.client.directions(**query, metrics_only=True)
+        body = json.loads(responses.calls[0].request.body.decode("utf-8"))
+        self.assertFalse(body["geometry"])
+        self.assertFalse(body["instructions"])
+        self.assertNotIn("maneuvers", body)
+        self.assertIsNone(route.geometry)
+        self.assertEqual(100, route.duration)
+
     @responses.activate
     def test_directions_geojson(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
@@ -150,6 +170,29 @@ class ORSTest(_test.TestCase):
         self.assertIsInstance(matrix.distances, list)
         self.assertIsInstance(matrix.raw, dict)
 
+    @responses.activate
+    def test_matrix_stream(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        responses.add(
+            responses.POST,
+            "https://api.openrouteservice.org/v2/matrix/{}/json".format(query["profile"]),
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+            stream=True,
+        )
+
+        expected = self.client.matrix(**query)
+        matrix = self.client.matrix(**query, stream=True)
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertURLEqual(responses.calls[0].request.url, responses.calls[1].request.url)
+        self.assertIsInstance(matrix, Matrix)
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertIsNone(matrix.raw)
+
     @responses.activate
     def test_key_in_header(self):
         # Test that API key is being put in the Authorization header
@@ -16,6 +16,7 @@
 #
 """Tests for the OpenTripPlannerV2 module."""
 
+import json
 import urllib.parse
 from copy import deepcopy
 
@@ -57,6 +58,22 @@ class OpenTripPlannerV2Test(_test.TestCase):
         self.assertIsInstance(routes.geometry, list)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        responses.add(
+            responses.POST,
+            "http://localhost:8080/otp/routers/default/index/graphql",
+            status=200,
+            json=ENDPOINTS_RESPONSES["otp_v2"]["directions"],
+            content_type="application/json",
+        )
+        route = self.client.directions(**query, metrics_only=True)
+
+        self.assertNotIn("legGeometry", json.loads(responses.calls[0].request.body)["query"])
+        self.assertIsNone(route.geometry)
+        self.assertIsInstance(route.distance, int)
+
     @responses.activate
     def test_directions_alternative(self):
         query = ENDPOINTS_QUERIES[self.name]["directions_alternative"]
@@ -16,16 +16,92 @@
 #
 """Tests for the OSRM module."""
 
+import io
+import struct
+import unittest
 from copy import deepcopy
 
 import responses
 
 import tests as _test
-from routingpy import OSRM, convert
+from routingpy import OSRM, convert, osrm_flatbuffers, utils
 from routingpy.direction import Direction, Directions
+from routingpy.hints import HintCache
 from routingpy.matrix import Matrix
 from tests.test_helper import *
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def build_flatbuffer(fields):
+    """
+    Builds a FlatBuffers table for the reader tests. ``fields`` holds one (type, value) pair or None per field of
+    the schema, with types "bool", "u16", "f32", "position", "str", "floats", "positions", "table" and "tables".
+    """
+    buf = bytearray(4)
+
+    def align():
+        buf.extend(b"\0" * (-len(buf) % 4))
+
+    def write_table(fields):
+        align()
+        # The vtable, then the table with 4 bytes per field and 8 bytes per position
+        sizes = [0 if field is None else 8 if field[0] == "position" else 4 for field in fields]
+        offsets, offset = [], 4
+        for size in sizes:
+            offsets.append(offset if size else 0)
+            offset += size
+        vtable_pos = len(buf)
+        buf.extend(struct.pack("<HH", 4 + 2 * len(fields), offset))
+        buf.extend(struct.pack("<{}H".format(len(fields)), *offsets))
+        align()
+        table_pos = len(buf)
+        buf.extend(struct.pack("<i", table_pos - vtable_pos))
+        buf.extend(b"\0" * (offset - 4))
+
+        for field, field_offset in zip(fields, offsets):
+            if field is None:
+                continue
+            kind, value = field
+            pos = table_pos + field_offset
+            if kind in ("bool", "u16", "f32", "position"):
+                fmt = {"bool": "<?", "u16": "<H", "f32": "<f", "position": "<ff"}[kind]
+                struct.pack_into(fmt, buf, pos, *(value if kind == "position" else [value]))
+                continue
+
+            child_pos = write_child(kind, value)
+            struct.pack_into("<I", buf, pos, child_pos - pos)
+
+        return table_pos
+
+    def write_child(kind, value):
+        if kind == "table":
+            return write_table(value)
+
+        align()
+        child_pos = len(buf)
+        if kind == "str":
+            encoded = value.encode("utf-8")
+            buf.extend(struct.pack("<I", len(encoded)) + encoded + b"\0")
+        elif kind == "floats":
+            buf.extend(struct.pack("<I{}f".format(len(value)), len(value), *value))
+        elif kind == "positions":
+            buf.extend(struct.pack("<I", len(value)))
+            for position in value:
+                buf.extend(struct.pack("<ff", *position))
+        elif kind == "tables":
+            buf.extend(struct.pack("<I", len(value)) + b"\0" * 4 * len(value))
+            for idx, table in enumerate(value):
+                slot = child_pos + 4 + 4 * idx
+                struct.pack_into("<I", buf, slot, write_table(table) - slot)
+        return child_pos
+
+    struct.pack_into("<I", buf, 0, write_table(fields))
+    return bytes(buf)
+
 
 class OSRMTest(_test.TestCase):
     name = "osrm"
@@ -62,6 +138,49 @@ class OSRMTest(_test.TestCase):
         self.assertIsInstance(routes.geometry, list)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_encode_locations(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+
+        responses.add(
+            responses.GET,
+            f"https://routing.openstreetmap.de/routed-bike/route/v1/{query['profile']}/"
+            "polyline6(aqkg%7DAa_iqO%60kHxaN_ry%40_ibE)",
+            status=200,
+            json=ENDPOINTS_RESPONSES["osrm"]["directions_geojson"],
+            content_type="application/json",
+        )
+
+        routes = self.client.directions(**query, encode_locations=True)
+        self.assertEqual(1, len(responses.calls))
+        self.assertEqual(
+            query["locations"],
+            [list(coord) for coord in utils.decode_polyline6("aqkg}Aa_iqO`kHxaN_ry@_ibE")],
+        )
+        self.assertNotIn("encode_locations", responses.calls[0].request.url)
+        self.assertIsInstance(routes, Directions)
+
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        query["alternatives"] = False
+        coords = convert.delimit_list([convert.delimit_list(pair) for pair in query["locations"]], ";")
+
+        responses.add(
+            responses.GET,
+            f"https://routing.openstreetmap.de/routed-bike/route/v1/{query['profile']}/{coords}",
+            status=200,
+            json={"routes": [{"duration": 100.5, "distance": 200.5}]},
+            content_type="application/json",
+        )
+
+        route = self.client.directions(**query, metrics_only=True)
+        self.assertIn("overview=false", responses.calls[0].request.url)
+        self.assertIn("steps=false", responses.calls[0].request.url)
+        self.assertIsNone(route.geometry)
+        self.assertEqual(100, route.duration)
+        self.assertEqual(200, route.distance)
+
     @responses.activate
     def test_full_directions_alternatives(self):
         query = ENDPOINTS_QUERIES[self.name]["directions"]
@@ -249,6 +368,55 @@ class OSRMTest(_test.TestCase):
         self.assertIsInstance(matrix.distances, list)
         self.assertIsInstance(matrix.raw, dict)
 
+    @responses.activate
+    def test_matrix_stream(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        responses.add(
+            responses.GET,
+            "https://routing.openstreetmap.de/routed-bike/table/v1/{}/{}".format(
+                query["profile"],
+                convert.delimit_list([convert.delimit_list(pair) for pair in query["locations"]], ";"),
+            ),
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+            stream=True,
+        )
+
+        expected = self.client.matrix(**query)
+        matrix = self.client.matrix(**query, stream=True)
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertURLEqual(responses.calls[0].request.url, responses.calls[1].request.url)
+        self.assertIsInstance(matrix, Matrix)
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertIsNone(matrix.raw)
+
+        # Nested members around the matrices are skipped
+        body = io.BytesIO(
+            b'{"sources": [{"hint": "a", "location": [1, 2]}], "durations": [[0, 1.5], [null, 0]], '
+            b'"destinations": [[{"durations": []}]], "code": "Ok"}'
+        )
+        matrix = self.client.parse_matrix_stream(body)
+        self.assertEqual([[0, 1.5], [None, 0]], matrix.durations)
+        self.assertIsNone(matrix.distances)
+
+    def test_matrix_stream_closed_on_error(self):
+        class Body(io.BytesIO):
+            released = False
+
+            def release_conn(self):
+                self.released = True
+
+        # A truncated response fails while parsing, the connection is released nonetheless
+        body = Body(b'{"durations": [[0.0, 1.5], [1.5')
+        with self.assertRaises(Exception):
+            self.client.parse_matrix_stream(body)
+        self.assertTrue(body.closed)
+        self.assertTrue(body.released)
+
     @responses.activate
     def test_few_sources_destinations_matrix(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
@@ -273,3 +441,200 @@ class OSRMTest(_test.TestCase):
             f"https://routing.openstreetmap.de/routed-bike/table/v1/{query['profile']}/8.688641,49.420577;8.680916,49.415776;8.780916,49.445776?annotations=distance%2Cduration&bearings=50%2C50%3B50%2C50%3B50%2C50&destinations=0%3B2&radiuses=500%3B500%3B500&sources=1%3B2",
             responses.calls[0].request.url,
         )
+
+    @responses.activate
+    def test_hint_cache(self):
+        locations = [[8.688641, 49.420577], [8.680916, 49.415776], [8.780916, 49.445776]]
+        coords = convert.delimit_list([convert.delimit_list(pair) for pair in locations], ";")
+        url = f"https://routing.openstreetmap.de/routed-bike/route/v1/driving/{coords}"
+
+        def route_response(data_version):
+            return {
+                "routes": [{"duration": 100.5, "distance": 200.5}],
+                "waypoints": [{"hint": "{}-{}".format(data_version, idx)} for idx in range(3)],
+                "data_version": data_version,
+            }
+
+        responses.add(responses.GET, url, status=200, json=route_response("v1"))
+        responses.add(responses.GET, url, status=200, json=route_response("v1"))
+        responses.add(responses.GET, url, status=200, json=route_response(None))
+        responses.add(responses.GET, url, status=200, json=route_response("v2"))
+
+        router = OSRM(hint_cache=HintCache())
+        router.directions(locations, metrics_only=True)
+        self.assertNotIn("hints", responses.calls[0].request.url)
+
+        # Coordinates are matched after rounding
+        nearby = [[lon + 1e-7, lat] for lon, lat in locations]
+        router.directions(nearby, metrics_only=True)
+        self.assertIn("hints=v1-0%3Bv1-1%3Bv1-2", responses.calls[1].request.url)
+
+        # Another profile has its own hints
+        self.assertEqual([None, None, None], router.hint_cache.get("foot", locations))
+
+        # A response without data_version keeps the hints of the known dataset
+        router.directions(locations, metrics_only=True)
+        self.assertEqual(0, router.hint_cache.invalidations)
+
+        # A new dataset drops the old hints
+        router.directions(locations, metrics_only=True)
+        self.assertEqual(["v2-0", "v2-1", "v2-2"], router.hint_cache.get("driving", locations))
+        self.assertEqual(
+            {"hits": 12, "misses": 6, "invalidations": 1, "size": 3}, router.hint_cache.stats
+        )
+
+        # Explicit hints take precedence
+        responses.add(responses.GET, url, status=200, json=route_response("v2"))
+        router.directions(locations, metrics_only=True, hints=["a", None, "c"])
+        self.assertIn("hints=a%3B%3Bc", responses.calls[4].request.url)
+
+    @responses.activate
+    def test_hint_cache_matrix(self):
+        locations = [[8.688641, 49.420577], [8.680916, 49.415776], [8.780916, 49.445776]]
+        coords = convert.delimit_list([convert.delimit_list(pair) for pair in locations], ";")
+
+        responses.add(
+            responses.GET,
+            f"https://routing.openstreetmap.de/routed-bike/table/v1/driving/{coords}",
+            status=200,
+            json={
+                "durations": [[1.0, 2.0]],
+                "sources": [{"hint": "s2"}],
+                "destinations": [{"hint": "d0"}, {"hint": "d1"}],
+            },
+        )
+
+        hint_cache = HintCache()
+        router = OSRM(hint_cache=hint_cache)
+        router.matrix(locations, sources=[2], destinations=[0, 1])
+        self.assertEqual(["d0", "d1", "s2"], hint_cache.get("driving", locations))
+
+        router.matrix(locations, sources=[2], destinations=[0, 1])
+        self.assertIn("hints=d0%3Bd1%3Bs2", responses.calls[1].request.url)
+
+    @responses.activate
+    def test_directions_flatbuffers(self):
+        locations = [[8.688641, 49.420577], [8.680916, 49.415776]]
+        coords = convert.delimit_list([convert.delimit_list(pair) for pair in locations], ";")
+        routes = [
+            [("f32", 200.5), ("f32", 100.5), None, None, None, ("str", "_p~iF~ps|U_ulLnnqC")],
+            [("f32", 300.5), ("f32", 150.5), None, None, None, ("str", "_p~iF~ps|U")],
+        ]
+        body = build_flatbuffer(
+            [
+                None,
+                None,
+                ("str", "v1"),
+                ("tables", [[("str", "h0")], [("str", "h1")]]),
+                ("tables", routes),
+            ]
+        )
+
+        responses.add(
+            responses.GET,
+            f"https://routing.openstreetmap.de/routed-bike/route/v1/driving/{coords}.flatbuffers",
+            status=200,
+            body=body,
+            content_type="application/x-flatbuffers;schema=osrm.engine.api.fbresult",
+        )
+
+        router = OSRM(hint_cache=HintCache())
+        route = router.directions(locations, format="flatbuffers")
+        self.assertIsInstance(route, Direction)
+        self.assertEqual(100, route.duration)
+        self.assertEqual(200, route.distance)
+        self.assertEqual(utils.decode_polyline5("_p~iF~ps|U_ulLnnqC"), route.geometry)
+        self.assertEqual(body, route.raw)
+        self.assertEqual(["h0", "h1"], router.hint_cache.get("driving", locations))
+
+        routes = router.directions(locations, alternatives=True, format="flatbuffers")
+        self.assertIsInstance(routes, Directions)
+        self.assertEqual([100, 150], [route.duration for route in routes])
+        self.assertIn("hints=h0%3Bh1", responses.calls[1].request.url)
+
+        with self.assertRaises(ValueError):
+            router.directions(locations, format="xml")
+
+    @staticmethod
+    def _add_matrix_flatbuffers_response():
+        """Adds a FlatBuffers table response for the first two of the returned locations as sources and all of
+        them as destinations."""
+        locations = [[8.688641, 49.420577], [8.680916, 49.415776], [8.780916, 49.445776]]
+        coords = convert.delimit_list([convert.delimit_list(pair) for pair in locations], ";")
+
+        def waypoints(prefix, positions):
+            return [
+                [("str", "{}{}".format(prefix, idx)), None, None, ("position", position)]
+                for idx, position in enumerate(positions)
+            ]
+
+        # Source 0 snapped onto destination 0, OSRM writes the unreachable cell (1, 1) as 0 too
+        table = [
+            ("floats", [0.0, 10.5, 1.1, 30.0, 0.0, 40.0]),
+            ("u16", 2),
+            ("u16", 3),
+            ("floats", [0.0, 100.0, 200.0, 300.0, 0.0, 400.0]),
+            ("tables", waypoints("d", [(8.5, 49.5), (8.6, 49.5), (8.7, 49.5)])),
+        ]
+        body = build_flatbuffer(
+            [
+                None,
+                None,
+                None,
+                ("tables", waypoints("s", [(8.5, 49.5), (8.9, 49.5)])),
+                None,
+                ("table", table),
+            ]
+        )
+
+        responses.add(
+            responses.GET,
+            f"https://routing.openstreetmap.de/routed-bike/table/v1/driving/{coords}.flatbuffers",
+            status=200,
+            body=body,
+            content_type="application/x-flatbuffers;schema=osrm.engine.api.fbresult",
+        )
+        return locations, body
+
+    @responses.activate
+    def test_matrix_flatbuffers(self):
+        locations, body = self._add_matrix_flatbuffers_response()
+
+        matrix = self.client.matrix(locations, sources=[0, 1], format="flatbuffers")
+        self.assertIsInstance(matrix, Matrix)
+        # float32 values compare equal to the ones from JSON responses, unreachable cells are None as well
+        self.assertEqual([[0.0, 10.5, 1.1], [30.0, None, 40.0]], matrix.durations)
+        self.assertEqual([[0.0, 100.0, 200.0], [300.0, None, 400.0]], matrix.distances)
+        self.assertEqual(body, matrix.raw)
+
+        self.assertEqual(
+            {"sources": [{"hint": "s0"}, {"hint": "s1"}], "data_version": None},
+            {
+                key: value
+                for key, value in OSRM._flatbuffers_hints(body).items()
+                if key != "destinations"
+            },
+        )
+        self.assertEqual(
+            ["d0", "d1", "d2"], [w.hint for w in osrm_flatbuffers.Result(body).table.destinations]
+        )
+
+        with self.assertRaises(ValueError):
+            self.client.matrix(locations, format="flatbuffers", stream=True)
+
+    @unittest.skipIf(np is None, "numpy is required for array-backed matrices")
+    @responses.activate
+    def test_matrix_flatbuffers_numpy(self):
+        locations, body = self._add_matrix_flatbuffers_response()
+
+        matrix = self.client.matrix(
+            locations, sources=[0, 1], format="flatbuffers", array_backend="numpy"
+        )
+        self.assertEqual((2, 3), matrix.durations.shape)
+        self.assertEqual("float32", matrix.durations.dtype)
+        self.assertEqual(np.float32(1.1), matrix.durations[0][2])
+        self.assertTrue(np.isnan(matrix.durations[1][1]))
+        self.assertEqual(
+            [[0.0, 100.0, 200.0], [300.0, 400.0]],
+            [[value for value in row if not np.isnan(value)] for row in matrix.distances.tolist()],
+        )
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the ratelimit module."""
+
+import json
+import time
+from email.utils import formatdate
+
+import responses
+
+import tests as _test
+from routingpy import Valhalla, exceptions
+from routingpy.ratelimit import (
+    RateLimiter,
+    TokenBucket,
+    get_rate_limiter,
+    parse_rate_limit_headers,
+    set_rate_limit,
+)
+from routingpy.retry import RetryPolicy
+from routingpy.routers import options
+from tests.test_helper import *
+
+
+class TokenBucketTest(_test.TestCase):
+    def test_reserve(self):
+        bucket = TokenBucket(4, burst=2)
+
+        # The burst is available at once, then requests are spaced by the rate
+        delays = [bucket.reserve() for _ in range(5)]
+        self.assertEqual([0.0, 0.0], delays[:2])
+        for expected, delay in zip([0.25, 0.5, 0.75], delays[2:]):
+            self.assertAlmostEqual(expected, delay, delta=0.05)
+        self.assertAlmostEqual(1.0, bucket.wait_time, delta=0.05)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+
+
+class RateLimiterTest(_test.TestCase):
+    def test_buckets(self):
+        limiter = RateLimiter(per_second=100, per_minute=3)
+
+        self.assertEqual(0.0, limiter.wait_time)
+        delays = [limiter.reserve() for _ in range(4)]
+
+        # The per-minute bucket is the bottleneck
+        self.assertEqual([0.0, 0.0, 0.0], delays[:3])
+        self.assertAlmostEqual(20.0, delays[3], delta=0.05)
+        self.assertAlmostEqual(40.0, limiter.wait_time, delta=0.05)
+
+        stats = limiter.stats
+        self.assertEqual(4, stats["requests"])
+        self.assertEqual(1, stats["delayed"])
+        self.assertAlmostEqual(20.0, stats["waited"], delta=0.05)
+
+    def test_update_quota(self):
+        limiter = RateLimiter()
+        self.assertEqual(0.0, limiter.reserve())
+
+        limiter.update_quota(2, 0.3)
+        # An older response's higher quota of the same window is ignored
+        limiter.update_quota(5, 0.3)
+        self.assertEqual([0.0, 0.0], [limiter.reserve(), limiter.reserve()])
+        self.assertEqual(0, limiter.stats["remaining"])
+        self.assertAlmostEqual(0.3, limiter.wait_time, delta=0.05)
+        self.assertAlmostEqual(0.3, limiter.reserve(), delta=0.05)
+
+        time.sleep(0.3)
+        self.assertEqual(0.0, limiter.reserve())
+        self.assertIsNone(limiter.stats["remaining"])
+
+    def test_parse_headers(self):
+        # ORS
+        headers = parse_rate_limit_headers(
+            {"X-RateLimit-Remaining": "39", "X-RateLimit-Reset": str(int(time.time()) + 30)}
+        )
+        self.assertIsNone(headers.retry_after)
+        self.assertEqual(39, headers.remaining)
+        self.assertAlmostEqual(30, headers.reset, delta=1.5)
+
+        # Mapbox
+        headers = parse_rate_limit_headers(
+            {"X-Rate-Limit-Limit": "300", "X-Rate-Limit-Reset": str(int(time.time()) + 10)}
+        )
+        self.assertIsNone(headers.remaining)
+        self.assertAlmostEqual(10, headers.reset, delta=1.5)
+
+        # GraphHopper resets in seconds from now
+        headers = parse_rate_limit_headers({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "12"})
+        self.assertEqual((None, 0, 12.0), headers)
+
+        self.assertEqual((2.5, None, None), parse_rate_limit_headers({"Retry-After": "2.5"}))
+        headers = parse_rate_limit_headers({"Retry-After": formatdate(time.time() + 20, usegmt=True)})
+        self.assertAlmostEqual(20, headers.retry_after, delta=1.5)
+        self.assertEqual((None, None, None), parse_rate_limit_headers({"Retry-After": "soon"}))
+
+    def test_registry(self):
+        base_url = "https://ratelimit.test"
+        self.assertIsNone(get_rate_limiter(base_url))
+
+        limiter = get_rate_limiter(base_url, per_second=10)
+        self.assertIs(limiter, get_rate_limiter(base_url, per_second=20))
+        self.assertIs(limiter, set_rate_limit(base_url, None))
+        self.assertIsNone(get_rate_limiter(base_url))
+
+        self.assertEqual([], get_rate_limiter(base_url, create=True).buckets)
+        set_rate_limit(base_url, None)
+
+
+class ClientRateLimitTest(_test.TestCase):
+    name = "valhalla"
+    base_url = "https://api.mapbox.com/valhalla/v1"
+
+    def setUp(self):
+        self.retry_over_query_limit = options.default_retry_over_query_limit
+        options.default_retry_over_query_limit = True
+
+    def tearDown(self):
+        options.default_retry_over_query_limit = self.retry_over_query_limit
+        set_rate_limit(self.base_url, None)
+
+    @responses.activate
+    def test_rate_limit(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        responses.add(
+            responses.POST,
+            self.base_url + "/sources_to_targets",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+
+        # Routers passed the same limiter share it
+        limiter = RateLimiter(per_second=20)
+        router = Valhalla(self.base_url, rate_limit=limiter)
+        other_router = Valhalla(self.base_url, rate_limit=limiter)
+        self.assertIs(limiter, other_router.client.rate_limiter)
+
+        start = time.monotonic()
+        router.matrix_many([query] * 3, max_workers=3)
+        other_router.matrix(**query)
+        self.assertEqual(4, len(responses.calls))
+
+        # The burst of 20 requests isn't used up yet
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(4, router.client.rate_limiter.stats["requests"])
+
+    def test_rate_limit_number(self):
+        # A number limits this router only, other routers of the base URL keep their limiter
+        limiter = get_rate_limiter(self.base_url, create=True)
+        router = Valhalla(self.base_url, rate_limit=10)
+        other_router = Valhalla(self.base_url, rate_limit=5)
+        self.assertEqual([10], [bucket.rate for bucket in router.client.rate_limiter.buckets])
+        self.assertEqual([5], [bucket.rate for bucket in other_router.client.rate_limiter.buckets])
+        self.assertEqual([], limiter.buckets)
+        self.assertIs(limiter, Valhalla(self.base_url).client.rate_limiter)
+
+    @responses.activate
+    def test_rate_limit_paced(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        responses.add(
+            responses.POST,
+            self.base_url + "/sources_to_targets",
+            status=200,
+            body=json.dumps(ENDPOINTS_RESPONSES[self.name]["matrix"]),
+            content_type="application/json",
+        )
+
+        # Registered limiters apply to existing routers too
+        router = Valhalla(self.base_url)
+        self.assertIsNone(router.client.rate_limiter)
+        limiter = RateLimiter(per_second=10, burst=1)
+        set_rate_limit(self.base_url, limiter)
+        self.assertIs(limiter, router.client.rate_limiter)
+
+        start = time.monotonic()
+        router.matrix_many([query] * 4, max_workers=4)
+        self.assertGreaterEqual(time.monotonic() - start, 0.29)
+        self.assertEqual(3, limiter.stats["delayed"])
+
+    @responses.activate
+    def test_retry_after(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        url = self.base_url + "/sources_to_targets"
+        responses.add(
+            responses.POST, url, status=429, body="Too many requests", headers={"Retry-After": "0.2"}
+        )
+        responses.add(
+            responses.POST,
+            url,
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+
+        router = Valhalla(
+            self.base_url, retry_over_query_limit=True, retry_policy=RetryPolicy(backoff_factor=0.05)
+        )
+        start = time.monotonic()
+        with self.assertWarns(UserWarning):
+            router.matrix(**query)
+        elapsed = time.monotonic() - start
+
+        # Waited as told, which is longer than the backoff
+        self.assertEqual(2, len(responses.calls))
+        self.assertGreaterEqual(elapsed, 0.19)
+        self.assertLess(elapsed, 0.45)
+
+        # The quota is tracked by the client, nothing is registered for the base URL
+        self.assertIsNotNone(router.client.rate_limiter)
+        self.assertIsNone(get_rate_limiter(self.base_url))
+        self.assertIsNone(Valhalla(self.base_url).client.rate_limiter)
+
+    @responses.activate
+    def test_retry_after_zero(self):
+        url = self.base_url + "/sources_to_targets"
+        responses.add(responses.POST, url, status=503, body="Busy", headers={"Retry-After": "0"})
+        responses.add(
+            responses.POST,
+            url,
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+
+        # A shorter Retry-After doesn't cut the backoff short
+        router = Valhalla(self.base_url, retry_policy=RetryPolicy(backoff_factor=0.2, jitter=0))
+        start = time.monotonic()
+        with self.assertWarns(UserWarning):
+            router.matrix(**ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    @responses.activate
+    def test_retry_after_timeout(self):
+        responses.add(
+            responses.POST,
+            self.base_url + "/sources_to_targets",
+            status=503,
+            body="Down for maintenance",
+            headers={"Retry-After": "3600"},
+        )
+
+        router = Valhalla(self.base_url, retry_timeout=10)
+        start = time.monotonic()
+        with self.assertWarns(UserWarning), self.assertRaises(exceptions.Timeout):
+            router.matrix(**ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        self.assertEqual(1, len(responses.calls))
+        self.assertLess(time.monotonic() - start, 1)
+
+    @responses.activate
+    def test_remaining_quota(self):
+        query = ENDPOINTS_QUERIES[self.name]["matrix"]
+        responses.add(
+            responses.POST,
+            self.base_url + "/sources_to_targets",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+            headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0.3"},
+        )
+
+        # A registered limiter gets the quota of all clients of the base URL
+        limiter = get_rate_limiter(self.base_url, per_second=100)
+        router = Valhalla(self.base_url)
+        router.matrix(**query)
+        self.assertIs(limiter, router.client.rate_limiter)
+        self.assertAlmostEqual(0.3, router.client.rate_limiter.wait_time, delta=0.05)
+
+        # The exhausted quota delays the next request until the window resets
+        start = time.monotonic()
+        router.matrix(**query)
+        self.assertGreaterEqual(time.monotonic() - start, 0.25)
+        self.assertEqual(1, router.client.rate_limiter.stats["delayed"])
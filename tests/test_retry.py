@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 GIS OPS UG
+#
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy of
+# the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations under
+# the License.
+#
+"""Tests for the retry module."""
+
+import time
+import warnings
+
+import requests
+import responses
+
+import tests as _test
+from routingpy import Valhalla, exceptions
+from routingpy.retry import DEFAULT_RETRY_POLICY, RetryPolicy
+from routingpy.routers import options
+from tests.test_helper import *
+
+
+class RetryPolicyTest(_test.TestCase):
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor=2, backoff_base=3, max_backoff=10, jitter=0)
+        self.assertEqual([2, 6, 10, 10], [policy.backoff(retry) for retry in range(1, 5)])
+
+        for retry in range(1, 5):
+            delay = DEFAULT_RETRY_POLICY.backoff(retry)
+            self.assertTrue(0.5 * 1.5 ** (retry - 1) <= delay <= 1.5 * 1.5 ** (retry - 1))
+
+    def test_decisions(self):
+        policy = RetryPolicy(statuses=[502], exceptions=(exceptions.Timeout,), max_attempts=3)
+        self.assertTrue(policy.retries_status(502))
+        self.assertFalse(policy.retries_status(503))
+        self.assertTrue(policy.retries_exception(exceptions.Timeout()))
+        self.assertFalse(policy.retries_exception(exceptions.TransportError()))
+        self.assertTrue(policy.can_retry(2))
+        self.assertFalse(policy.can_retry(3))
+
+        with self.assertRaises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+
+class ClientRetryTest(_test.TestCase):
+    name = "valhalla"
+    base_url = "https://api.mapbox.com/valhalla/v1"
+
+    def setUp(self):
+        self.url = self.base_url + "/sources_to_targets"
+        self.query = ENDPOINTS_QUERIES[self.name]["matrix"]
+
+    def add_success(self):
+        responses.add(
+            responses.POST,
+            self.url,
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+        )
+
+    @responses.activate
+    def test_statuses(self):
+        responses.add(responses.POST, self.url, status=502, body="Bad gateway")
+        policy = RetryPolicy(statuses=(502,), max_attempts=3, backoff_factor=0.01)
+        router = Valhalla(self.base_url, retry_policy=policy)
+        self.assertIs(policy, router.client.retry_policy)
+
+        with self.assertWarns(UserWarning), self.assertRaises(exceptions.RouterServerError):
+            router.matrix(**self.query)
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_connection_errors(self):
+        responses.add(responses.POST, self.url, body=requests.exceptions.ConnectionError("reset"))
+        responses.add(responses.POST, self.url, body=requests.exceptions.ReadTimeout("timed out"))
+        self.add_success()
+
+        with self.assertRaises(exceptions.TransportError):
+            Valhalla(self.base_url).matrix(**self.query)
+
+        policy = RetryPolicy(
+            exceptions=(exceptions.Timeout, exceptions.TransportError), backoff_factor=0.01
+        )
+        router = Valhalla(self.base_url, retry_policy=policy)
+        with self.assertWarns(UserWarning):
+            router.matrix(**self.query)
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_timeout_not_retried(self):
+        responses.add(responses.POST, self.url, body=requests.exceptions.ReadTimeout("timed out"))
+
+        with self.assertRaises(exceptions.Timeout) as cm:
+            Valhalla(self.base_url).matrix(**self.query)
+        self.assertIsInstance(cm.exception.__cause__, requests.exceptions.ReadTimeout)
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_deadline(self):
+        responses.add(responses.POST, self.url, status=503, body="Down")
+        policy = RetryPolicy(deadline=0.3, backoff_factor=0.1, backoff_base=1, jitter=0)
+
+        start = time.monotonic()
+        with self.assertWarns(UserWarning), self.assertRaises(exceptions.Timeout):
+            Valhalla(self.base_url, retry_timeout=60, retry_policy=policy).matrix(**self.query)
+        self.assertLess(time.monotonic() - start, 1)
+
+    @responses.activate
+    def test_many_attempts(self):
+        # Retries don't grow the stack
+        responses.add(responses.POST, self.url, status=503, body="Down")
+        policy = RetryPolicy(max_attempts=1500, backoff_factor=0)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with self.assertRaises(exceptions.RouterServerError):
+                Valhalla(self.base_url, retry_policy=policy).matrix(**self.query)
+        self.assertEqual(1500, len(responses.calls))
+
+    @responses.activate
+    def test_default_policy(self):
+        responses.add(responses.POST, self.url, status=500, body="Internal error")
+        self.add_success()
+
+        policy = RetryPolicy(exceptions=(exceptions.RouterServerError,), backoff_factor=0.01)
+        default_policy = options.default_retry_policy
+        options.default_retry_policy = policy
+        try:
+            router = Valhalla(self.base_url)
+            with self.assertWarns(UserWarning):
+                router.matrix(**self.query)
+        finally:
+            options.default_retry_policy = default_policy
+
+        self.assertIs(policy, router.client.retry_policy)
+        self.assertEqual(2, len(responses.calls))
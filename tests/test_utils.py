@@ -47,6 +47,52 @@ class UtilsTest(_test.TestCase):
         decoded = [(49.420577, 8.688641, 120.96), (49.415776, 8.680916, 1491.39)]
         self.assertEqual(decoded, utils.decode_polyline6(self.coords3d_6prec, True, order="latlng"))
 
+    def test_polyline_vectorized_decoding(self):
+        # A long route of repeated segments, so that it's decoded with numpy
+        coords2d_6prec = self.coords2d_6prec + r"~jHy`N_kHxaN" * 100
+        coords3d_5prec = self.coords3d_5prec + r"_]g@fo@~\fo@etjG" * 100
+        self.assertGreaterEqual(len(coords2d_6prec), utils.VECTORIZE_MIN_LENGTH)
+
+        for polyline, precision, is3d in ((coords2d_6prec, 6, False), (coords3d_5prec, 5, True)):
+            for order in ("lnglat", "latlng"):
+                decoded = utils._decode(polyline, precision, is3d, order)
+                utils.VECTORIZE_MIN_LENGTH, min_length = float("inf"), utils.VECTORIZE_MIN_LENGTH
+                try:
+                    expected = utils._decode(polyline, precision, is3d, order)
+                finally:
+                    utils.VECTORIZE_MIN_LENGTH = min_length
+                self.assertEqual(expected, decoded)
+                self.assertEqual(202, len(decoded))
+
+        with self.assertRaises(IndexError):
+            utils.decode_polyline6(coords2d_6prec[:-1])
+
+        with self.assertRaises(ValueError):
+            utils.decode_polyline6(coords2d_6prec, order="xy")
+
+    def test_polyline_encoding(self):
+        self.assertEqual(
+            self.coords2d_5prec, utils.encode_polyline5([(8.68864, 49.42058), (8.68092, 49.41578)])
+        )
+        self.assertEqual(
+            self.coords3d_6prec,
+            utils.encode_polyline6(
+                [(49.420577, 8.688641, 120.96), (49.415776, 8.680916, 1491.39)], True, order="latlng"
+            ),
+        )
+        self.assertEqual("", utils.encode_polyline6([]))
+
+        # Long enough to be encoded with numpy, rounding half away from zero
+        coordinates = [(8.688641, 49.420577), (-0.0000005, 0.0000015), (179.999999, -89.999999)] * 100
+        encoded = utils.encode_polyline6(coordinates)
+        utils.VECTORIZE_MIN_LENGTH, min_length = float("inf"), utils.VECTORIZE_MIN_LENGTH
+        try:
+            self.assertEqual(utils.encode_polyline6(coordinates), encoded)
+        finally:
+            utils.VECTORIZE_MIN_LENGTH = min_length
+        self.assertEqual((-0.000001, 0.000002), utils.decode_polyline6(encoded)[1])
+        self.assertEqual(coordinates[2::3], utils.decode_polyline6(encoded)[2::3])
+
     def test_get_ordinal(self):
         self.assertEqual(utils.get_ordinal(0), "th")
         self.assertEqual(utils.get_ordinal(1), "st")
@@ -17,16 +17,19 @@
 """Tests for the Valhalla module."""
 
 import json
+import struct
+import unittest
 from copy import deepcopy
 
 import responses
 
 import tests as _test
-from routingpy import Valhalla
+from routingpy import Valhalla, valhalla_protobuf
 from routingpy.direction import Direction
 from routingpy.expansion import Expansions
 from routingpy.isochrone import Isochrone, Isochrones
 from routingpy.matrix import Matrix
+from routingpy.utils import EncodedPolyline, decode_polyline6
 from routingpy.valhalla_attributes import (
     MatchedEdge,
     MatchedPoint,
@@ -37,6 +40,50 @@ from routingpy.valhalla_attributes import (
 )
 from tests.test_helper import *
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def encode_pbf(fields):
+    """
+    Encodes a protobuf message for the reader tests from (number, type, value) triples, with types "varint",
+    "float", "double", "string", "message" (a list of triples), "packed_varint" and "packed_float".
+    """
+
+    def varint(value):
+        encoded = bytearray()
+        while True:
+            byte = value & 0x7F
+            value >>= 7
+            if value:
+                encoded.append(byte | 0x80)
+            else:
+                encoded.append(byte)
+                return bytes(encoded)
+
+    def delimited(number, payload):
+        return varint(number << 3 | 2) + varint(len(payload)) + payload
+
+    message = b""
+    for number, kind, value in fields:
+        if kind == "varint":
+            message += varint(number << 3) + varint(value)
+        elif kind == "float":
+            message += varint(number << 3 | 5) + struct.pack("<f", value)
+        elif kind == "double":
+            message += varint(number << 3 | 1) + struct.pack("<d", value)
+        elif kind == "string":
+            message += delimited(number, value.encode("utf-8"))
+        elif kind == "message":
+            message += delimited(number, encode_pbf(value))
+        elif kind == "packed_varint":
+            message += delimited(number, b"".join(varint(v) for v in value))
+        elif kind == "packed_float":
+            message += delimited(number, struct.pack("<{}f".format(len(value)), *value))
+    return message
+
 
 class ValhallaTest(_test.TestCase):
     name = "valhalla"
@@ -66,6 +113,46 @@ class ValhallaTest(_test.TestCase):
         self.assertIsInstance(routes.geometry, list)
         self.assertIsInstance(routes.raw, dict)
 
+    @responses.activate
+    def test_directions_metrics_only(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["directions"],
+            content_type="application/json",
+        )
+        route = self.client.directions(**query, metrics_only=True)
+
+        body = json.loads(responses.calls[0].request.body.decode("utf-8"))
+        self.assertEqual("none", body["directions_options"]["directions_type"])
+        self.assertIsNone(route.geometry)
+        self.assertEqual(150, route.duration)
+
+    @responses.activate
+    def test_directions_lazy_geometry(self):
+        query = ENDPOINTS_QUERIES[self.name]["directions"]
+        response = ENDPOINTS_RESPONSES[self.name]["directions"]
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=response,
+            content_type="application/json",
+        )
+        route = self.client.directions(**query)
+
+        # Only decoded on first access
+        self.assertIsInstance(route._geometry, EncodedPolyline)
+        expected = [
+            coord for leg in response["trip"]["legs"] for coord in decode_polyline6(leg["shape"])
+        ]
+        self.assertEqual(expected, route.geometry)
+        self.assertIs(route.geometry, route.geometry)
+
     @responses.activate
     def test_waypoint_generator(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
@@ -172,6 +259,274 @@ class ValhallaTest(_test.TestCase):
         self.assertIsInstance(matrix.distances, list)
         self.assertIsInstance(matrix.raw, dict)
 
+    @responses.activate
+    def test_matrix_stream(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["matrix"],
+            content_type="application/json",
+            stream=True,
+        )
+
+        expected = self.client.matrix(**query)
+        matrix = self.client.matrix(**query, stream=True)
+
+        self.assertEqual(2, len(responses.calls))
+        self.assertURLEqual(responses.calls[0].request.url, responses.calls[1].request.url)
+        self.assertIsInstance(matrix, Matrix)
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertIsNone(matrix.raw)
+
+    @responses.activate
+    def test_directions_pbf(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["directions"])
+        legs = ENDPOINTS_RESPONSES[self.name]["directions"]["trip"]["legs"]
+        json_response = {
+            "trip": {
+                "legs": [
+                    dict(legs[0], summary={"length": 100.123, "time": 100.5}),
+                    dict(legs[1], summary={"length": 50.457, "time": 50.75}),
+                ]
+            }
+        }
+        body = encode_pbf(
+            [
+                (
+                    3,
+                    "message",
+                    [
+                        (
+                            1,
+                            "message",
+                            [
+                                (
+                                    1,
+                                    "message",
+                                    [
+                                        (1, "varint", idx),
+                                        (5, "message", [(1, "float", length), (2, "double", time)]),
+                                        (7, "string", leg["shape"]),
+                                    ],
+                                )
+                                for idx, leg, length, time in (
+                                    (0, legs[0], 100.123, 100.5),
+                                    (1, legs[1], 50.457, 50.75),
+                                )
+                            ],
+                        )
+                    ],
+                ),
+                (20, "message", [(1, "string", "unknown fields are skipped")]),
+            ]
+        )
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            json=json_response,
+            content_type="application/json",
+        )
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/route",
+            status=200,
+            body=body,
+            content_type="application/x-protobuf",
+        )
+
+        expected = self.client.directions(**query)
+        route = self.client.directions(**query, format="pbf")
+
+        self.assertEqual("pbf", json.loads(responses.calls[1].request.body)["format"])
+        self.assertIsInstance(route, Direction)
+        self.assertEqual(expected.duration, route.duration)
+        self.assertEqual(expected.distance, route.distance)
+        self.assertEqual(expected.geometry, route.geometry)
+        self.assertEqual(body, route.raw)
+
+        with self.assertRaises(ValueError):
+            self.client.directions(**query, format="xml")
+
+    @responses.activate
+    def test_matrix_pbf(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+        query["units"] = "km"
+        times = [0.0, 100.6, 3.4028234663852886e38, 0.0, 60.2, 61.9]
+        distances = [0, 1234, 0, 0, 5679, 999]
+        json_response = {
+            "sources_to_targets": [
+                [
+                    {"time": 0, "distance": 0.0},
+                    {"time": 100, "distance": 1.234},
+                    {"time": None, "distance": None},
+                ],
+                [
+                    {"time": 0, "distance": 0.0},
+                    {"time": 60, "distance": 5.679},
+                    {"time": 61, "distance": 0.999},
+                ],
+            ]
+        }
+        body = encode_pbf(
+            [
+                (
+                    5,
+                    "message",
+                    [
+                        (2, "packed_varint", distances),
+                        (3, "packed_float", times),
+                        (4, "packed_varint", [0, 0, 0, 1, 1, 1]),
+                        (5, "packed_varint", [0, 1, 2, 0, 1, 2]),
+                        (7, "varint", 1),
+                    ],
+                )
+            ]
+        )
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=json_response,
+            content_type="application/json",
+        )
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            body=body,
+            content_type="application/x-protobuf",
+        )
+
+        expected = self.client.matrix(**query)
+        matrix = self.client.matrix(**query, format="pbf")
+
+        self.assertEqual("pbf", json.loads(responses.calls[1].request.body)["format"])
+        self.assertEqual(expected.durations, matrix.durations)
+        self.assertEqual(expected.distances, matrix.distances)
+        self.assertEqual([[0, 100, None], [0, 60, 61]], matrix.durations)
+        self.assertEqual(body, matrix.raw)
+
+        if np is not None:
+            matrix = self.client.matrix(**query, format="pbf", array_backend="numpy")
+            self.assertEqual((2, 3), matrix.durations.shape)
+            self.assertTrue(np.isnan(matrix.distances[0][2]))
+
+        with self.assertRaises(ValueError):
+            self.client.matrix(**query, format="pbf", stream=True)
+
+        # Long packed fields are decoded vectorized
+        values = [0, 127, 128, 300, 2**21, 2**32 - 1] * 20
+        self.assertEqual(
+            values, valhalla_protobuf.Matrix(encode_pbf([(2, "packed_varint", values)])).distances
+        )
+
+    @responses.activate
+    def test_matrix_concise(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+        response = deepcopy(ENDPOINTS_RESPONSES[self.name]["matrix"])
+        response["sources_to_targets"][0][1].update(time=None, distance=None)
+        concise_response = {
+            "sources_to_targets": {
+                "durations": [[cell["time"] for cell in row] for row in response["sources_to_targets"]],
+                "distances": [
+                    [cell["distance"] for cell in row] for row in response["sources_to_targets"]
+                ],
+            },
+            "units": "miles",
+        }
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=response,
+            content_type="application/json",
+        )
+        expected = self.client.matrix(**query)
+
+        responses.replace(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=concise_response,
+            content_type="application/json",
+            stream=True,
+        )
+        for matrix in (
+            self.client.matrix(**query, verbose=False),
+            self.client.matrix(**query, verbose=False, stream=True),
+        ):
+            self.assertEqual(expected.durations, matrix.durations)
+            self.assertEqual(expected.distances, matrix.distances)
+        self.assertFalse(json.loads(responses.calls[1].request.body)["verbose"])
+
+        if np is not None:
+            matrix = self.client.matrix(**query, verbose=False, array_backend="numpy")
+            self.assertEqual((2, 2), matrix.durations.shape)
+            self.assertTrue(np.isnan(matrix.distances[0][1]))
+
+        # Servers without the concise output answer verbosely
+        responses.replace(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=response,
+            content_type="application/json",
+            stream=True,
+        )
+        for matrix in (
+            self.client.matrix(**query, verbose=False),
+            self.client.matrix(**query, verbose=False, stream=True),
+        ):
+            self.assertEqual(expected.durations, matrix.durations)
+            self.assertEqual(expected.distances, matrix.distances)
+
+    @unittest.skipIf(np is None, "numpy is required for array-backed matrices")
+    @responses.activate
+    def test_matrix_numpy(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
+        response = deepcopy(ENDPOINTS_RESPONSES[self.name]["matrix"])
+        response["sources_to_targets"][0][1].update(time=None, distance=None)
+
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/sources_to_targets",
+            status=200,
+            json=response,
+            content_type="application/json",
+            stream=True,
+        )
+
+        expected = self.client.matrix(**query)
+        for matrix in (
+            self.client.matrix(**query, array_backend="numpy"),
+            self.client.matrix(**query, array_backend="numpy", stream=True),
+            expected.as_numpy(),
+        ):
+            self.assertEqual("float32", matrix.durations.dtype)
+            self.assertEqual((2, 2), matrix.distances.shape)
+            self.assertTrue(matrix.durations.flags.c_contiguous)
+            self.assertTrue(np.isnan(matrix.durations[0][1]))
+            self.assertEqual(
+                expected.durations,
+                [[None if np.isnan(v) else v for v in row] for row in matrix.durations.tolist()],
+            )
+            self.assertEqual(
+                expected.distances,
+                [[None if np.isnan(v) else v for v in row] for row in matrix.distances.tolist()],
+            )
+
+        self.assertEqual("float64", expected.as_numpy("float64").durations.dtype)
+        with self.assertRaises(ValueError):
+            self.client.matrix(**query, array_backend="pandas")
+
     @responses.activate
     def test_few_sources_destinations_matrix(self):
         query = deepcopy(ENDPOINTS_QUERIES[self.name]["matrix"])
@@ -218,6 +573,29 @@ class ValhallaTest(_test.TestCase):
         self.assertEqual(expansion.interval_type, "time")
         self.assertIsInstance(expansion.raw, dict)
 
+    @responses.activate
+    def test_trace_attributes_encode_locations(self):
+        query = deepcopy(ENDPOINTS_QUERIES[self.name]["trace_attributes"])
+        responses.add(
+            responses.POST,
+            "https://api.mapbox.com/valhalla/v1/trace_attributes",
+            status=200,
+            json=ENDPOINTS_RESPONSES[self.name]["trace_attributes"],
+            content_type="application/json",
+        )
+        self.client.trace_attributes(**query, encode_locations=True)
+
+        body = json.loads(responses.calls[0].request.body.decode("utf-8"))
+        self.assertNotIn("shape", body)
+        self.assertEqual(
+            [tuple(location) for location in query["locations"]],
+            decode_polyline6(body["encoded_polyline"]),
+        )
+
+        query["locations"][0] = Valhalla.Waypoint(query["locations"][0])
+        with self.assertRaises(ValueError):
+            self.client.trace_attributes(**query, encode_locations=True)
+
     @responses.activate
     def test_trace_attributes(self):
         query = ENDPOINTS_QUERIES[self.name]["trace_attributes"]